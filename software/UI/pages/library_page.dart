@@ -20,6 +20,7 @@ import 'package:path/path.dart' as p;
 import 'package:flutter/foundation.dart';
 import 'dart:ui' as ui;
 
+import '../services/thumb_service.dart';
 import '../widgets/battery_indicator.dart';
 import 'focus_sequence_page.dart';
 
@@ -40,6 +41,13 @@ class _LibraryPageState extends State<LibraryPage> {
 
   final Map<String, Uint8List> _gifFirstFrameCache = <String, Uint8List>{};
 
+  // Cached small previews (thumbCache.py) of the items shown so far
+  final Map<String, String> _thumbs = <String, String>{};
+  // Items whose preview is being resolved; they show a placeholder instead of decoding the original
+  final Set<String> _thumbsPending = <String>{};
+  int _thumbsRequested = 0;
+  int _listingGeneration = 0;
+
   // Export selection state
   bool _selectingForExport = false;
   final Set<String> _selectedExport = <String>{};
@@ -65,6 +73,10 @@ class _LibraryPageState extends State<LibraryPage> {
       _loading = true;
       _files.clear();
       _visibleCount = 0;
+      _thumbs.clear();
+      _thumbsPending.clear();
+      _thumbsRequested = 0;
+      _listingGeneration++;
     });
     final dir = Directory(widget.dirPath);
     if (!await dir.exists()) {
@@ -106,6 +118,27 @@ class _LibraryPageState extends State<LibraryPage> {
       _loading = false;
       _visibleCount = (_files.length < 24) ? _files.length : 24;
     });
+    _requestThumbs();
+  }
+
+  /// Resolves previews for the newly visible items in one thumbCache.py call.
+  Future<void> _requestThumbs() async {
+    if (_thumbsRequested >= _visibleCount) return;
+    final List<File> batch = _files.sublist(_thumbsRequested, _visibleCount);
+    _thumbsRequested = _visibleCount;
+    final int generation = _listingGeneration;
+    final List<String> paths = batch.map((f) => f.path).toList();
+    setState(() => _thumbsPending.addAll(paths));
+    final Map<String, String> found = await galleryThumbnails(
+      paths,
+      cacheDir: p.join(widget.dirPath, 'thumbs'),
+    );
+    // Ignore results of a listing that has been reloaded meanwhile
+    if (!mounted || generation != _listingGeneration) return;
+    setState(() {
+      _thumbs.addAll(found);
+      _thumbsPending.removeAll(paths);
+    });
   }
 
   void _onScroll() {
@@ -117,6 +150,7 @@ class _LibraryPageState extends State<LibraryPage> {
         setState(() {
           _visibleCount = (_visibleCount + add).clamp(0, _files.length);
         });
+        _requestThumbs();
       }
     }
   }
@@ -514,6 +548,13 @@ class _LibraryPageState extends State<LibraryPage> {
                             final isGif = file.path.toLowerCase().endsWith(
                               '.gif',
                             );
+                            final String? thumb = _thumbs[file.path];
+                            // Without a preview yet, wait for it rather than decoding the full file
+                            final Widget? pending =
+                                thumb == null &&
+                                    _thumbsPending.contains(file.path)
+                                ? const ColoredBox(color: Colors.black12)
+                                : null;
                             if (isGif) {
                               return AspectRatio(
                                 aspectRatio: 1,
@@ -568,34 +609,45 @@ class _LibraryPageState extends State<LibraryPage> {
                                             await _reload();
                                           }
                                         },
-                                        child: FutureBuilder<Uint8List?>(
-                                          future: _loadGifFirstFrame(
-                                            file,
-                                            targetPx + 50,
-                                          ),
-                                          builder: (context, snap) {
-                                            if (snap.hasData &&
-                                                snap.data != null) {
-                                              return SizedBox.expand(
-                                                child: Image.memory(
-                                                  snap.data!,
+                                        child: thumb != null
+                                            ? SizedBox.expand(
+                                                child: Image.file(
+                                                  File(thumb),
                                                   fit: BoxFit.cover,
                                                   filterQuality:
                                                       FilterQuality.low,
-                                                  isAntiAlias: true,
                                                   gaplessPlayback: true,
                                                 ),
-                                              );
-                                            }
-                                            return const ColoredBox(
-                                              color: Colors.black12,
-                                              child: Center(
-                                                child:
-                                                    CircularProgressIndicator(),
+                                              )
+                                            : pending ??
+                                              FutureBuilder<Uint8List?>(
+                                                future: _loadGifFirstFrame(
+                                                  file,
+                                                  targetPx + 50,
+                                                ),
+                                                builder: (context, snap) {
+                                                  if (snap.hasData &&
+                                                      snap.data != null) {
+                                                    return SizedBox.expand(
+                                                      child: Image.memory(
+                                                        snap.data!,
+                                                        fit: BoxFit.cover,
+                                                        filterQuality:
+                                                            FilterQuality.low,
+                                                        isAntiAlias: true,
+                                                        gaplessPlayback: true,
+                                                      ),
+                                                    );
+                                                  }
+                                                  return const ColoredBox(
+                                                    color: Colors.black12,
+                                                    child: Center(
+                                                      child:
+                                                          CircularProgressIndicator(),
+                                                    ),
+                                                  );
+                                                },
                                               ),
-                                            );
-                                          },
-                                        ),
                                       ),
                                     ),
                                     if (_selectingForExport)
@@ -637,9 +689,9 @@ class _LibraryPageState extends State<LibraryPage> {
                                       ),
                                       child: ClipRRect(
                                         borderRadius: BorderRadius.circular(8),
-                                        child: SizedBox.expand(
+                                        child: pending ?? SizedBox.expand(
                                           child: Image.file(
-                                            file,
+                                            thumb != null ? File(thumb) : file,
                                             fit: BoxFit.cover,
                                             cacheWidth: targetPx + 50,
                                             filterQuality: FilterQuality.low,
@@ -0,0 +1,93 @@
+/**
+ * A majority of this code was written by AI.
+ *
+ * Script Name: thumb_service.dart
+ * Description:
+ *   Service wrapper for `thumbCache.py`. Maps gallery items to their cached
+ *   small JPEG previews (images/thumbs/), creating missing ones, so the
+ *   library grid decodes small files instead of full frames and GIFs.
+ */
+
+import 'dart:async';
+import 'dart:convert';
+import 'dart:io';
+import 'package:path/path.dart' as p;
+
+/// Returns {item path: preview path} for the given gallery items.
+/// Items without a preview (unreadable, or the script is missing) are left out,
+/// so the caller falls back to the original file.
+Future<Map<String, String>> galleryThumbnails(
+  List<String> paths, {
+  String? cacheDir,
+}) async {
+  const String _pythonExec = 'python3';
+  const String _thumbScriptRel = 'scripts/thumbCache.py';
+
+  Future<String?> _findInParents(
+    String relativePath, {
+    int maxLevels = 8,
+  }) async {
+    // 1) Direct relative
+    final direct = File(relativePath);
+    if (await direct.exists()) return direct.absolute.path;
+
+    // 2) From CWD
+    final cwd = Directory.current.path;
+    final fromCwd = File(p.join(cwd, relativePath));
+    if (await fromCwd.exists()) return fromCwd.absolute.path;
+
+    // 3) From executable dir
+    final execDir = Directory(p.dirname(Platform.resolvedExecutable));
+    final fromExec = File(p.join(execDir.path, relativePath));
+    if (await fromExec.exists()) return fromExec.absolute.path;
+
+    // 4) Walk up parents from CWD
+    Directory probe = Directory(cwd);
+    for (int i = 0; i < maxLevels; i++) {
+      final candidate = File(p.join(probe.path, relativePath));
+      if (await candidate.exists()) return candidate.absolute.path;
+      final next = probe.parent;
+      if (next.path == probe.path) break;
+      probe = next;
+    }
+    return null;
+  }
+
+  final Map<String, String> result = <String, String>{};
+  if (paths.isEmpty) return result;
+
+  final String? scriptPath = await _findInParents(_thumbScriptRel);
+  if (scriptPath == null) {
+    // ignore: avoid_print
+    print('thumbCache.py not found relative to app. Looked for: $_thumbScriptRel');
+    return result;
+  }
+
+  // One process for the whole batch; it prints one preview path per input line
+  final List<String> args = <String>[scriptPath, ...paths];
+  if (cacheDir != null) {
+    args.addAll(['--cache-dir', cacheDir]);
+  }
+
+  try {
+    final ProcessResult res = await Process.run(
+      _pythonExec,
+      args,
+      workingDirectory: Directory(p.dirname(p.dirname(scriptPath))).path,
+      stdoutEncoding: utf8,
+    );
+    final List<String> lines = const LineSplitter().convert(res.stdout as String);
+    for (int i = 0; i < paths.length && i < lines.length; i++) {
+      final String thumb = lines[i].trim();
+      if (thumb.isNotEmpty) result[paths[i]] = thumb;
+    }
+    if (res.exitCode != 0) {
+      // ignore: avoid_print
+      print('[thumbCache.py exit ${res.exitCode}] ${res.stderr}');
+    }
+  } on ProcessException catch (e) {
+    // ignore: avoid_print
+    print('Failed to start thumbCache.py: ${e.message}');
+  }
+  return result;
+}
@@ -0,0 +1,177 @@
+"""
+Script Name: autoAlign.py
+Description:
+    Automatic focus-point matching for the wiggler pipeline. Given the four
+    frames of a capture and (optionally) one focus point in frame 1, finds the
+    same scene point in frames 2-4 with normalized cross-correlation on a
+    coarse-to-fine image pyramid: a wide search on the smallest level, then a
+    +/- REFINE_RADIUS search on every finer level. The points it returns are in
+    the same (EXIF-corrected) pixel coordinates as hand-picked focus points, so
+    they feed the existing remapCoordinates/calculateCrop logic unchanged.
+"""
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+PYRAMID_LEVELS = 3
+# Template is (2 * TEMPLATE_RADIUS + 1)^2 pixels on every pyramid level
+TEMPLATE_RADIUS = 8
+# Widest expected offset between cameras, as a fraction of the frame width
+SEARCH_FRACTION = 0.2
+REFINE_RADIUS = 3
+# Peaks below this NCC score are reported as unreliable
+MIN_SCORE = 0.5
+
+
+def _gray(frame: np.ndarray) -> np.ndarray:
+    """float32 luminance of an (H, W[, C]) uint8 frame."""
+    f = np.asarray(frame, dtype=np.float32)
+    if f.ndim == 2:
+        return f
+    return f[..., 0] * 0.299 + f[..., 1] * 0.587 + f[..., 2] * 0.114
+
+
+def _pyramid(gray: np.ndarray, levels: int) -> list:
+    """[full, 1/2, 1/4, ...] by 2x2 averaging."""
+    out = [gray]
+    for _ in range(levels):
+        g = out[-1]
+        h, w = g.shape[0] // 2 * 2, g.shape[1] // 2 * 2
+        if h < 4 * TEMPLATE_RADIUS or w < 4 * TEMPLATE_RADIUS:
+            break
+        g = g[:h, :w]
+        out.append((g[0::2, 0::2] + g[1::2, 0::2] + g[0::2, 1::2] + g[1::2, 1::2]) * 0.25)
+    return out
+
+
+def _box_sum(a: np.ndarray, th: int, tw: int) -> np.ndarray:
+    """Sums of every th x tw window of a, via an integral image."""
+    ii = np.pad(a, ((1, 0), (1, 0))).cumsum(0, dtype=np.float64).cumsum(1)
+    return ii[th:, tw:] - ii[:-th, tw:] - ii[th:, :-tw] + ii[:-th, :-tw]
+
+
+def ncc_map(template: np.ndarray, search: np.ndarray) -> np.ndarray:
+    """Normalized cross-correlation of template at every valid position in search."""
+    th, tw = template.shape
+    n = th * tw
+    t = template - template.mean()
+    t_norm = np.sqrt((t * t).sum())
+    # With a zero-mean template, sum((w - mean_w) * t) == sum(w * t)
+    num = np.einsum("ijkl,kl->ij", sliding_window_view(search, (th, tw)), t, optimize=True)
+    s1 = _box_sum(search, th, tw)
+    s2 = _box_sum(search * search, th, tw)
+    var = np.maximum(s2 - s1 * s1 / n, 0.0)
+    den = np.sqrt(var) * t_norm
+    return np.where(den > 1e-6, num / np.maximum(den, 1e-6), 0.0)
+
+
+def _subpixel_peak(scores: np.ndarray, iy: int, ix: int) -> tuple:
+    """Parabola-fit offsets (dx, dy) of the NCC peak, each within +/- 0.5."""
+    def _vertex(a, b, c):
+        den = a - 2.0 * b + c
+        return 0.0 if den >= 0 else float(np.clip(0.5 * (a - c) / den, -0.5, 0.5))
+    h, w = scores.shape
+    dx = _vertex(scores[iy, ix - 1], scores[iy, ix], scores[iy, ix + 1]) if 0 < ix < w - 1 else 0.0
+    dy = _vertex(scores[iy - 1, ix], scores[iy, ix], scores[iy + 1, ix]) if 0 < iy < h - 1 else 0.0
+    return dx, dy
+
+
+def _match(ref: np.ndarray, target: np.ndarray, ref_xy, guess_xy, radius: int, subpixel: bool = False):
+    """
+    Best position of the template around ref_xy (in ref) inside target, searching
+    +/- radius around guess_xy. Returns ((x, y), score); x, y are floats with subpixel.
+    """
+    r = TEMPLATE_RADIUS
+    rx, ry = ref_xy
+    template = ref[ry - r:ry + r + 1, rx - r:rx + r + 1]
+    h, w = target.shape
+    gx, gy = guess_xy
+    x0, x1 = max(r, gx - radius), min(w - r - 1, gx + radius)
+    y0, y1 = max(r, gy - radius), min(h - r - 1, gy + radius)
+    if x1 < x0 or y1 < y0:
+        return (int(np.clip(gx, r, w - r - 1)), int(np.clip(gy, r, h - r - 1))), 0.0
+    search = target[y0 - r:y1 + r + 1, x0 - r:x1 + r + 1]
+    scores = ncc_map(template, search)
+    iy, ix = np.unravel_index(int(np.argmax(scores)), scores.shape)
+    if subpixel:
+        dx, dy = _subpixel_peak(scores, iy, ix)
+        return (float(x0 + ix + dx), float(y0 + iy + dy)), float(scores[iy, ix])
+    return (x0 + int(ix), y0 + int(iy)), float(scores[iy, ix])
+
+
+def pick_reference_point(frame: np.ndarray) -> tuple:
+    """
+    Most corner-like template-sized block in the central half of the frame
+    (largest smaller eigenvalue of the gradient structure tensor), so the
+    correlation peak is well defined in both directions when no focus point is given.
+    """
+    g = _gray(frame)
+    h, w = g.shape
+    size = 2 * TEMPLATE_RADIUS + 1
+    cy0, cx0 = h // 4, w // 4
+    centre = g[cy0:cy0 + h // 2, cx0:cx0 + w // 2]
+    gy, gx = np.gradient(centre)
+    a = _box_sum(gx * gx, size, size)
+    c = _box_sum(gy * gy, size, size)
+    b = _box_sum(gx * gy, size, size)
+    min_eig = (a + c) * 0.5 - np.sqrt(((a - c) * 0.5) ** 2 + b * b)
+    iy, ix = np.unravel_index(int(np.argmax(min_eig)), min_eig.shape)
+    return (cx0 + int(ix) + TEMPLATE_RADIUS, cy0 + int(iy) + TEMPLATE_RADIUS)
+
+
+def align_focus_points(frames: list, focus1=None, levels: int = PYRAMID_LEVELS, subpixel: bool = False):
+    """
+    Finds the frame-1 focus point in every other frame.
+
+    Args:
+        frames (list): The four frames as (H, W, C) arrays (None for a missing frame).
+        focus1 (tuple): (x, y) in frame 1; picked automatically when None.
+        levels (int): Pyramid levels below full resolution.
+        subpixel (bool): Refine the full-resolution peak with a parabola fit (float points).
+
+    Returns:
+        tuple: ([(x, y)] * 4 focus points, [NCC score per frame]); a missing
+        frame gets focus1 and score 0.
+    """
+    ref_frame = frames[0]
+    if ref_frame is None:
+        raise ValueError("auto-align needs frame 1 as the reference")
+    if focus1 is None:
+        focus1 = pick_reference_point(ref_frame)
+
+    ref_pyr = _pyramid(_gray(ref_frame), levels)
+    top = len(ref_pyr) - 1
+    h, w = ref_pyr[0].shape
+    r = TEMPLATE_RADIUS
+    # Keep the template inside the image on every level
+    fx = int(np.clip(focus1[0], (r + 1) << top, w - 1 - ((r + 1) << top)))
+    fy = int(np.clip(focus1[1], (r + 1) << top, h - 1 - ((r + 1) << top)))
+    search = max(REFINE_RADIUS, int(round(w * SEARCH_FRACTION)) >> top)
+
+    points, scores = [tuple(focus1)], [1.0]
+    for frame in frames[1:]:
+        if frame is None:
+            points.append(points[0])
+            scores.append(0.0)
+            continue
+        tgt_pyr = _pyramid(_gray(frame), top)
+        guess = (fx >> top, fy >> top)
+        score = 0.0
+        for lvl in range(top, -1, -1):
+            ref_xy = (fx >> lvl, fy >> lvl)
+            found, score = _match(ref_pyr[lvl], tgt_pyr[lvl], ref_xy, guess,
+                                  search if lvl == top else REFINE_RADIUS, subpixel and lvl == 0)
+            if lvl:
+                # Carry the displacement (not the position) down, so rounding of
+                # the reference point on each level does not accumulate
+                guess = ((fx >> (lvl - 1)) + 2 * (found[0] - ref_xy[0]), (fy >> (lvl - 1)) + 2 * (found[1] - ref_xy[1]))
+            else:
+                guess = found
+        # Apply the found offset to the caller's (unclamped) focus point
+        points.append((focus1[0] + guess[0] - fx, focus1[1] + guess[1] - fy))
+        scores.append(score)
+    return points, scores
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
@@ -0,0 +1,288 @@
+"""
+Script Name: cameraDaemon.py
+Description:
+    Long-lived camera service for the STM32 camera modules. Opens the
+    /dev/stm32_cam_* serial ports once, keeps the serial.Serial handles open and
+    accepts capture, reset and update commands over a local Unix socket, so a
+    shot no longer pays for a Python start-up and four port opens. Like the CLI,
+    every command first clears the DB live flag and waits for livePreview.c to
+    let go of the port. The camera operations themselves are the ones from
+    streamUSB (camera_operation), so both paths behave identically.
+
+Protocol (one JSON object per line, one JSON reply per line):
+    {"cmd": "capture", "reset": true, "grayscale": false, "cameras": [1, 2, 3, 4],
+     "format": "png", "png_level": 6}
+    {"cmd": "live"}                     (also takes "format"/"png_level")
+    {"cmd": "reset"}
+    {"cmd": "update", "exposure": 5, "diff": true}
+    {"cmd": "ping"} / {"cmd": "shutdown"}
+
+Usage:
+  python3 scripts/streamUSB.py --daemon
+"""
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
+
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+import uuid
+
+import serial
+
+import streamUSB
+
+SOCKET_PATH = os.environ.get("STM32_CAMERA_SOCKET", "/tmp/stm32_cameras.sock")
+CLIENT_TIMEOUT = 60
+# Same settle time the CLI waits between the reset and capture batches
+RESET_SETTLE_S = 0.5
+# Same wait the CLI gives livePreview.c to send 'X' and release the port
+LIVE_RELEASE_S = 0.5
+
+
+class CameraDaemon:
+    """Owns one persistent serial handle per camera and runs synchronized batches on them."""
+
+    def __init__(self, cameras: dict):
+        self.cameras = dict(cameras)
+        self.ports = {}
+        self.lock = threading.Lock()
+        self.encoder = streamUSB.ImageEncoder()
+        # The daemon's own --format/--png-level, used when a request does not name one
+        self.default_format = streamUSB.ENCODE_FORMAT
+        self.default_png_level = streamUSB.PNG_COMPRESS_LEVEL
+
+    def _port(self, cam_id):
+        """Returns the open port for cam_id, (re)opening it if needed."""
+        ser = self.ports.get(cam_id)
+        if ser is None or not ser.is_open:
+            ser = serial.Serial(self.cameras[cam_id], streamUSB.BAUD_RATE, timeout=streamUSB.TIMEOUT)
+            self.ports[cam_id] = ser
+        return ser
+
+    def _drop(self, cam_id):
+        """Closes a port after an error so the next command reopens it."""
+        ser = self.ports.pop(cam_id, None)
+        if ser is not None:
+            try:
+                ser.close()
+            except Exception:
+                pass
+
+    def open_all(self):
+        """Opens every port up front."""
+        for cam_id in self.cameras:
+            try:
+                self._port(cam_id)
+            except serial.SerialException as e:
+                print(f"[CAM {cam_id}] Port Error ({self.cameras[cam_id]}): {e}", flush=True)
+
+    def apply_encoding(self, request: dict):
+        """
+        Sets the saved-frame format for the next batch from the request.
+        Returns an error message for an unknown format or level, else None.
+        """
+        fmt = request.get("format") or self.default_format
+        level = request.get("png_level")
+        level = self.default_png_level if level is None else level
+        if fmt not in streamUSB.ENCODE_FORMATS:
+            return f"unknown format '{fmt}'"
+        if isinstance(level, bool) or not isinstance(level, int) or not 0 <= level <= 9:
+            return f"invalid png_level '{level}'"
+        # Safe under self.lock: run_batch waits for the encoder before the next request
+        streamUSB.ENCODE_FORMAT = fmt
+        streamUSB.PNG_COMPRESS_LEVEL = level
+        return None
+
+    def release_live(self, cam_ids):
+        """Clears the live flag of cam_ids and waits until livePreview.c has stopped its loop."""
+        for cam_id in cam_ids:
+            streamUSB.disable_live_mode(cam_id)
+        time.sleep(LIVE_RELEASE_S)
+
+    def close(self):
+        self.encoder.close()
+        for cam_id in list(self.ports):
+            self._drop(cam_id)
+
+    def run_batch(self, cam_ids, mode, dump_hex=False, batch_uuid=None, as_grayscale=False, is_live=False, exposure_value=None, diff_only=False) -> dict:
+        """
+        Runs one mode on the given cameras in parallel, released together by a
+        local trigger. Returns {cam_id: saved path or None}.
+        """
+        results = {}
+        trigger = threading.Event()
+
+        def _worker(cam_id):
+            try:
+                ser = self._port(cam_id)
+                trigger.wait()
+                results[cam_id] = streamUSB.camera_operation(
+                    ser, cam_id, mode, dump_hex, batch_uuid, as_grayscale, is_live, exposure_value, diff_only,
+                    self.encoder,
+                )
+            except (serial.SerialException, OSError) as e:
+                results[cam_id] = None
+                self._drop(cam_id)
+                with streamUSB.print_lock:
+                    print(f"[CAM {cam_id}] Port Error ({self.cameras.get(cam_id)}): {e}", flush=True)
+
+        threads = [threading.Thread(target=_worker, args=(c,)) for c in cam_ids]
+        for t in threads:
+            t.start()
+        trigger.set()
+        for t in threads:
+            t.join()
+        # Serial work is done; wait for the encoder to finish this batch's files
+        return {c: streamUSB.resolve_saved(r) for c, r in results.items()}
+
+    def handle(self, request: dict) -> dict:
+        """Executes one protocol command and builds the JSON-able reply."""
+        cmd = str(request.get("cmd", "")).lower()
+        if cmd == "ping":
+            return {"ok": True, "cameras": sorted(self.cameras)}
+        if cmd == "shutdown":
+            return {"ok": True}
+
+        cam_ids = [c for c in request.get("cameras") or self.cameras if c in self.cameras]
+        if not cam_ids:
+            return {"ok": False, "error": "no known cameras selected"}
+
+        with self.lock:
+            if cmd not in ("reset", "update", "live", "capture"):
+                return {"ok": False, "error": f"unknown command '{cmd}'"}
+            if cmd in ("live", "capture"):
+                error = self.apply_encoding(request)
+                if error:
+                    return {"ok": False, "error": error}
+            # The camera ignores 'R'/'S' while in its live loop, so stop the preview first
+            self.release_live(cam_ids)
+
+            if cmd == "reset":
+                self.run_batch(cam_ids, "RESET")
+                return {"ok": True}
+
+            if cmd == "update":
+                self.run_batch(cam_ids, "UPDATE", exposure_value=request.get("exposure"),
+                               diff_only=bool(request.get("diff", False)))
+                return {"ok": True}
+
+            if cmd == "live":
+                results = self.run_batch(cam_ids, "CAPTURE", is_live=True)
+                return _capture_reply(results)
+
+            if cmd == "capture":
+                grayscale = bool(request.get("grayscale", False))
+                # Like the CLI: a full capture resets first, a single camera does not
+                reset = bool(request.get("reset", len(cam_ids) > 1))
+                if len(cam_ids) == 1 and not reset:
+                    # Single-camera capture mirrors the CLI: no batch id, hex dump optional
+                    results = self.run_batch(cam_ids, "CAPTURE", bool(request.get("dump_hex", False)), as_grayscale=grayscale)
+                    return _capture_reply(results)
+                if reset:
+                    self.run_batch(cam_ids, "RESET")
+                    time.sleep(RESET_SETTLE_S)
+                batch_uuid = uuid.uuid4().hex[:8]
+                streamUSB.begin_batch(batch_uuid)
+                results = self.run_batch(cam_ids, "CAPTURE", batch_uuid=batch_uuid, as_grayscale=grayscale)
+                marker = streamUSB.commit_batch(batch_uuid, results)
+                reply = _capture_reply(results)
+                reply["batch"] = batch_uuid
+                reply["marker"] = str(marker) if marker else None
+                return reply
+
+
+def _capture_reply(results: dict) -> dict:
+    """Converts {cam_id: Path|None} into the reply format."""
+    files = {str(c): (str(p) if p else None) for c, p in results.items()}
+    return {"ok": all(files.values()), "files": files}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Reads JSON lines from one client and answers each with a JSON line."""
+
+    def handle(self):
+        daemon = self.server.daemon_obj
+        for line in self.rfile:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+                reply = daemon.handle(request)
+            except Exception as e:
+                request, reply = {}, {"ok": False, "error": str(e)}
+            self.wfile.write((json.dumps(reply) + "\n").encode("utf-8"))
+            self.wfile.flush()
+            if request.get("cmd") == "shutdown":
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+
+def serve(cameras: dict, socket_path: str = SOCKET_PATH) -> int:
+    """Runs the daemon until a 'shutdown' command or Ctrl+C."""
+    if os.path.exists(socket_path):
+        if send_command({"cmd": "ping"}, socket_path, timeout=1) is not None:
+            print(f"Camera daemon already running on {socket_path}", file=sys.stderr)
+            return 1
+        os.remove(socket_path)
+
+    daemon = CameraDaemon(cameras)
+    daemon.open_all()
+
+    server = socketserver.UnixStreamServer(socket_path, _Handler)
+    server.daemon_obj = daemon
+    print(f">>> CAMERA DAEMON LISTENING ON {socket_path} <<<", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        daemon.close()
+        try:
+            os.remove(socket_path)
+        except OSError:
+            pass
+    return 0
+
+
+def send_command(request: dict, socket_path: str = SOCKET_PATH, timeout: float = CLIENT_TIMEOUT):
+    """
+    Sends one command to a running daemon and returns its reply dict.
+    Returns None only if no daemon is listening, so callers can fall back to direct
+    port access. Once connected, a timeout, reset or empty reply is returned as an
+    error reply instead: the daemon may still hold the ports.
+    """
+    if not os.path.exists(socket_path):
+        return None
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        try:
+            sock.connect(socket_path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            return None
+        except OSError as e:
+            return {"ok": False, "error": f"could not connect to daemon: {e or type(e).__name__}"}
+        buf = b""
+        try:
+            sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+            while not buf.endswith(b"\n"):
+                chunk = sock.recv(4096)
+                if not chunk:
+                    break
+                buf += chunk
+        except OSError as e:
+            return {"ok": False, "error": f"daemon did not answer: {e or type(e).__name__}"}
+    if not buf.strip():
+        return {"ok": False, "error": "daemon closed the connection without a reply"}
+    try:
+        return json.loads(buf)
+    except ValueError as e:
+        return {"ok": False, "error": f"invalid daemon reply: {e}"}
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
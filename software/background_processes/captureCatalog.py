@@ -0,0 +1,245 @@
+"""
+Script Name: captureCatalog.py
+Description:
+    Capture catalog kept in camera.db. Every capture batch gets a row (name,
+    batch id, timestamp, derived GIF/animation path) and every saved frame a
+    row (camera, path, dimensions, orientation, exposure), written by
+    streamUSB when a frame is saved and by wiggler when an output is created.
+    wiggler's resolvers look frames up here by name instead of probing
+    {filename}_{i} with every extension, and the gallery can list captures
+    with one query instead of scanning images/ and images/raws/.
+    Captures that predate the catalog (or were copied in by hand) are still
+    found by the old filesystem probing; --rebuild imports them.
+
+Usage:
+  python3 scripts/captureCatalog.py --list [--json] [--limit 50]
+  python3 scripts/captureCatalog.py --rebuild [--images-dir DIR]
+"""
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+DB_PATH = Path(__file__).resolve().parent / "camera.db"
+IMAGES_DIR = Path(__file__).resolve().parent.parent / "images"
+
+_FRAME_EXTS = (".jpg", ".jpeg", ".png", ".bmp", ".npy")
+
+
+def _connect(db_path=None):
+    """Opens camera.db and makes sure the catalog tables exist."""
+    conn = sqlite3.connect(str(db_path or DB_PATH), timeout=5)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS catalog_batch ("
+        "name TEXT PRIMARY KEY, batch_uuid TEXT UNIQUE, created REAL NOT NULL, "
+        "output_path TEXT, output_format TEXT, completed REAL)"
+    )
+    if "completed" not in {r[1] for r in conn.execute("PRAGMA table_info(catalog_batch)")}:
+        # Catalogs created before batches were committed
+        conn.execute("ALTER TABLE catalog_batch ADD COLUMN completed REAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS catalog_frame ("
+        "name TEXT NOT NULL, cam_id INTEGER NOT NULL, path TEXT NOT NULL, "
+        "width INTEGER, height INTEGER, orientation INTEGER DEFAULT 1, exposure INTEGER, "
+        "PRIMARY KEY (name, cam_id))"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS catalog_batch_created ON catalog_batch (created)")
+    return conn
+
+
+def name_from_path(path) -> tuple:
+    """Splits '{name}_{cam_id}.ext' into (name, cam_id); cam_id is None if there is no numeric suffix."""
+    stem = Path(path).stem
+    base, _, idx = stem.rpartition("_")
+    if base and idx.isdigit():
+        return base, int(idx)
+    return stem, None
+
+
+def record_frame(batch_uuid, cam_id, path, width=None, height=None, orientation=1, exposure=None,
+                 created=None, db_path=None):
+    """
+    Records one saved frame of a batch. The first frame of a batch names it
+    (its '{name}_{cam_id}' prefix); later frames of the same batch join that
+    row even if their own file name differs. width/height are the stored
+    pixel size (before EXIF orientation), exposure is in sensor lines.
+    Returns the batch name, or None if the catalog could not be written.
+    """
+    name, _ = name_from_path(path)
+    try:
+        conn = _connect(db_path)
+        try:
+            with conn:
+                conn.execute("INSERT OR IGNORE INTO catalog_batch (name, batch_uuid, created) VALUES (?, ?, ?)",
+                             (name, batch_uuid, created if created is not None else time.time()))
+                if batch_uuid:
+                    row = conn.execute("SELECT name FROM catalog_batch WHERE batch_uuid = ?", (batch_uuid,)).fetchone()
+                    if row:
+                        name = row[0]
+                conn.execute(
+                    "INSERT OR REPLACE INTO catalog_frame (name, cam_id, path, width, height, orientation, exposure) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (name, int(cam_id), os.path.abspath(str(path)), width, height, orientation, exposure),
+                )
+        finally:
+            conn.close()
+        return name
+    except Exception as e:
+        print(f"[DB ERROR] Could not catalog frame {path}: {e}")
+        return None
+
+
+def record_output(name, output_path, output_format, db_path=None):
+    """Stores the derived GIF/animation of a capture (creating the batch row if it predates the catalog)."""
+    try:
+        conn = _connect(db_path)
+        try:
+            with conn:
+                conn.execute("INSERT OR IGNORE INTO catalog_batch (name, created) VALUES (?, ?)", (name, time.time()))
+                conn.execute("UPDATE catalog_batch SET output_path = ?, output_format = ? WHERE name = ?",
+                             (os.path.abspath(str(output_path)), output_format, name))
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"[DB ERROR] Could not catalog output of {name}: {e}")
+
+
+def mark_complete(name, completed=None, db_path=None):
+    """Stamps a batch as complete (all of its frames are on disk)."""
+    try:
+        conn = _connect(db_path)
+        try:
+            with conn:
+                conn.execute("UPDATE catalog_batch SET completed = ? WHERE name = ?",
+                             (completed if completed is not None else time.time(), name))
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"[DB ERROR] Could not mark {name} complete: {e}")
+
+
+def _entry(conn, name):
+    batch = conn.execute(
+        "SELECT name, batch_uuid, created, output_path, output_format, completed FROM catalog_batch WHERE name = ?",
+        (name,),
+    ).fetchone()
+    if batch is None:
+        return None
+    entry = dict(zip(("name", "batch_uuid", "created", "output_path", "output_format", "completed"), batch))
+    entry["frames"] = {
+        cam_id: {"path": path, "width": w, "height": h, "orientation": o, "exposure": exp}
+        for cam_id, path, w, h, o, exp in conn.execute(
+            "SELECT cam_id, path, width, height, orientation, exposure FROM catalog_frame WHERE name = ?", (name,)
+        )
+    }
+    return entry
+
+
+def lookup(name, db_path=None):
+    """
+    Returns the catalog entry of a capture as a dict (keys of catalog_batch plus
+    "frames": {cam_id: {"path", "width", "height", "orientation", "exposure"}}),
+    or None if it is not catalogued. "completed" is None until streamUSB has
+    committed the batch (and for captures imported by --rebuild).
+    """
+    try:
+        conn = _connect(db_path)
+        try:
+            return _entry(conn, name)
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"[DB ERROR] Could not read catalog entry {name}: {e}")
+        return None
+
+
+def list_batches(limit=None, db_path=None) -> list:
+    """Newest-first capture entries (as from lookup) for the gallery."""
+    try:
+        conn = _connect(db_path)
+        try:
+            names = [r[0] for r in conn.execute(
+                "SELECT name FROM catalog_batch ORDER BY created DESC LIMIT ?", (-1 if limit is None else int(limit),)
+            )]
+            return [_entry(conn, n) for n in names]
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"[DB ERROR] Could not list catalog: {e}")
+        return []
+
+
+def rebuild(images_dir=None, db_path=None) -> int:
+    """Imports captures found on disk under images/raws (and their outputs in images/); returns frames added."""
+    from PIL import Image
+
+    images_dir = Path(images_dir or IMAGES_DIR)
+    raws_dir = images_dir / "raws"
+    added = 0
+    try:
+        names = sorted(os.listdir(raws_dir))
+    except FileNotFoundError:
+        return 0
+    for fname in names:
+        path = raws_dir / fname
+        if path.suffix.lower() not in _FRAME_EXTS:
+            continue
+        name, cam_id = name_from_path(path)
+        if cam_id is None:
+            continue
+        width = height = None
+        orientation = 1
+        try:
+            if path.suffix.lower() == ".npy":
+                import numpy as np
+                height, width = np.load(path, mmap_mode="r").shape[:2]
+            else:
+                with Image.open(path) as img:
+                    width, height = img.size
+                    orientation = int(img.getexif().get(0x0112, 1))
+        except Exception:
+            pass
+        if record_frame(None, cam_id, path, width, height, orientation, created=path.stat().st_mtime,
+                        db_path=db_path):
+            added += 1
+    for fname in os.listdir(images_dir):
+        stem, ext = os.path.splitext(fname)
+        # APNG outputs share .png with frames, so only the unambiguous formats are imported
+        if ext.lower() in (".gif", ".webp", ".mp4") and lookup(stem, db_path):
+            record_output(stem, images_dir / fname, ext.lower().lstrip("."), db_path)
+    return added
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Inspect or rebuild the capture catalog in camera.db.")
+    parser.add_argument("--list", action="store_true", help="List catalogued captures, newest first")
+    parser.add_argument("--json", action="store_true", help="With --list, print one JSON object per line")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--rebuild", action="store_true", help="Import captures already on disk")
+    parser.add_argument("--images-dir", type=str, default=None, help="Path to images directory")
+    parser.add_argument("--db", type=str, default=None, help="Database path (default: scripts/camera.db)")
+    args = parser.parse_args(argv)
+
+    if args.rebuild:
+        print(f"catalogued {rebuild(args.images_dir, args.db)} frames")
+    if args.list or not args.rebuild:
+        for entry in list_batches(args.limit, args.db):
+            if args.json:
+                print(json.dumps(entry))
+            else:
+                out = entry["output_path"] or "-"
+                print(f"{entry['name']:<16} {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['created']))} "
+                      f"{len(entry['frames'])} frames  {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
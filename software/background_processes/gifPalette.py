@@ -0,0 +1,148 @@
+"""
+Script Name: gifPalette.py
+Description:
+    Palette quantization for the wiggle GIFs. Builds one global palette from a
+    subsampled union of all frames of a capture and maps every unique frame onto
+    it exactly once, so the boomerang sequence can reuse the palette-indexed
+    frames by reference instead of quantizing the reverse duplicates again.
+
+Modes:
+    "dither" : Pillow Floyd-Steinberg mapping onto the global palette (default)
+    "fast"   : no dithering, Pillow's nearest-colour mapping
+    "lut"    : no dithering, nearest colour through a 5-bit RGB lookup table
+               (NumPy; the table is cached per palette, so it pays off when one
+               palette is reused across captures)
+"""
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
+
+import numpy as np
+from PIL import Image
+
+QUANTIZE_MODES = ("dither", "fast", "lut")
+# Every SAMPLE_STEP-th pixel in both directions feeds the palette builder
+SAMPLE_STEP = 4
+LUT_BITS = 5
+_LUT_CACHE_SIZE = 4
+_lut_cache = {}
+
+try:
+    _FASTOCTREE = Image.Quantize.FASTOCTREE
+    _FLOYDSTEINBERG = Image.Dither.FLOYDSTEINBERG
+except AttributeError:
+    _FASTOCTREE = 2  # older Pillow
+    _FLOYDSTEINBERG = 1
+
+
+def _as_rgb_array(frame) -> np.ndarray:
+    """(H, W, 3) uint8 view of a PIL image or array."""
+    if isinstance(frame, Image.Image):
+        if frame.mode != "RGB":
+            frame = frame.convert("RGB")
+        return np.asarray(frame)
+    arr = np.asarray(frame, dtype=np.uint8)
+    if arr.ndim == 2:
+        arr = np.repeat(arr[..., None], 3, axis=2)
+    return arr[..., :3]
+
+
+def build_palette(frames, colors: int = 256, sample_step: int = SAMPLE_STEP) -> Image.Image:
+    """
+    Quantizes a subsample of all frames together and returns the resulting "P"
+    image, whose palette is shared by every frame of the animation.
+    """
+    samples = [_as_rgb_array(f)[::sample_step, ::sample_step].reshape(-1, 3) for f in frames]
+    union = np.ascontiguousarray(np.concatenate(samples)).reshape(-1, 1, 3)
+    try:
+        return Image.fromarray(union, "RGB").quantize(colors=colors, method=_FASTOCTREE)
+    except Exception:
+        return Image.fromarray(union, "RGB").quantize(colors=colors)
+
+
+def _palette_colors(palette_img: Image.Image) -> np.ndarray:
+    """(N, 3) int32 array of the colours actually defined in a "P" image's palette."""
+    pal = np.asarray(palette_img.getpalette()[:768], dtype=np.int32).reshape(-1, 3)
+    used = max(palette_img.getextrema()[1] + 1, 1)
+    return pal[:used]
+
+
+def palette_lut(palette_img: Image.Image, bits: int = LUT_BITS) -> np.ndarray:
+    """
+    Lookup table from a (bits, bits, bits)-quantized RGB key to the nearest
+    palette index. Distances are computed for the bin centres in one matrix
+    product (|c|^2 - 2 c.p + |p|^2), so building it is a few milliseconds.
+    """
+    pal = _palette_colors(palette_img).astype(np.float32)
+    levels = 1 << bits
+    centres = (np.arange(levels, dtype=np.float32) + 0.5) * (256 / levels)
+    r, g, b = np.meshgrid(centres, centres, centres, indexing="ij")
+    keys = np.stack([r.ravel(), g.ravel(), b.ravel()], axis=1)
+    dist = keys @ (-2.0 * pal.T)
+    dist += (pal * pal).sum(axis=1)
+    return dist.argmin(axis=1).astype(np.uint8)
+
+
+def _cached_lut(palette_img: Image.Image) -> np.ndarray:
+    """palette_lut, memoized on the palette bytes for reused palettes."""
+    key = bytes(palette_img.getpalette()[:768])
+    lut = _lut_cache.get(key)
+    if lut is None:
+        if len(_lut_cache) >= _LUT_CACHE_SIZE:
+            _lut_cache.pop(next(iter(_lut_cache)))
+        lut = _lut_cache[key] = palette_lut(palette_img)
+    return lut
+
+
+def map_with_lut(frame, lut: np.ndarray, palette_img: Image.Image, bits: int = LUT_BITS) -> Image.Image:
+    """Maps an RGB frame to palette indices through the LUT (no dithering)."""
+    arr = _as_rgb_array(frame)
+    shift = 8 - bits
+    # Packed uint16 key r|g|b, built in place
+    key = np.empty(arr.shape[:2], dtype=np.uint16)
+    np.right_shift(arr[..., 0], shift, out=key, casting="unsafe")
+    key <<= bits
+    key |= arr[..., 1] >> shift
+    key <<= bits
+    key |= arr[..., 2] >> shift
+    out = Image.fromarray(np.take(lut, key), "P")
+    out.putpalette(palette_img.getpalette())
+    return out
+
+
+def quantize_frames(frames, mode: str = "dither", colors: int = 256, sample_step: int = SAMPLE_STEP, palette=None) -> list:
+    """
+    Quantizes each unique frame once onto a shared global palette.
+
+    Args:
+        frames (list): Unique RGB frames (PIL images or arrays), in playback order.
+        mode (str): "dither" (Floyd-Steinberg), "fast" or "lut" (both without dithering).
+        palette (Image): Optional "P" image from build_palette to reuse instead of building one.
+
+    Returns:
+        list: "P" mode PIL images sharing one palette, same order as frames.
+    """
+    if mode not in QUANTIZE_MODES:
+        raise ValueError(f"Unknown quantize mode '{mode}' (expected one of {QUANTIZE_MODES})")
+    if not frames:
+        return []
+
+    palette_img = palette if palette is not None else build_palette(frames, colors, sample_step)
+    if mode == "lut":
+        lut = _cached_lut(palette_img)
+        return [map_with_lut(f, lut, palette_img) for f in frames]
+
+    dither = _FLOYDSTEINBERG if mode == "dither" else 0
+    out = []
+    for f in frames:
+        img = f if isinstance(f, Image.Image) else Image.fromarray(_as_rgb_array(f), "RGB")
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        out.append(img.quantize(palette=palette_img, dither=dither))
+    return out
+
+
+def boomerang(seq: list) -> list:
+    """Forward then backward order without repeating the endpoints; items are shared, not copied."""
+    return seq + seq[-2:0:-1] if len(seq) > 1 else list(seq)
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
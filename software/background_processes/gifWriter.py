@@ -0,0 +1,124 @@
+"""
+Script Name: gifWriter.py
+Description:
+    Animated GIF writer for the wiggle GIFs. Writes the container straight to a
+    file stream and, after the first frame, only emits the bounding box of the
+    pixels that changed since the previous frame, with unchanged pixels inside
+    that box set to a transparent palette index (disposal "do not dispose"). The
+    LZW coding of each sub-image is Pillow's C encoder (GifImagePlugin.getdata).
+
+    Frames are palette-indexed images sharing one global palette (gifPalette).
+    Repeated frame objects, like the backward half of a boomerang, are converted
+    to index arrays once; in full-frame mode their encoded bytes are reused, in
+    delta mode every distinct transition is encoded once.
+"""
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
+
+import os
+import struct
+
+import numpy as np
+from PIL import Image, GifImagePlugin
+
+_LOOP_EXT = b"!\xff\x0bNETSCAPE2.0\x03\x01"
+# Above this share of changed pixels in the box, scattered transparent pixels
+# break LZW runs more than they save, so the box is sent opaque
+DELTA_MAX_CHANGED = 0.5
+
+
+def _palette_bytes(img: Image.Image) -> bytes:
+    """The 768-byte global colour table of a "P" image (zero padded)."""
+    pal = bytes(img.getpalette() or [])[:768]
+    return pal + b"\0" * (768 - len(pal))
+
+
+def _header(width: int, height: int, palette: bytes, loop: int) -> bytes:
+    # Global colour table of 256 entries, 8 bits colour resolution
+    screen = struct.pack("<HHBBB", width, height, 0xF7, 0, 0)
+    return b"GIF89a" + screen + palette + _LOOP_EXT + struct.pack("<H", loop) + b"\0"
+
+
+def _encode(sub: np.ndarray, offset, duration: int, transparency) -> bytes:
+    """GCE + image descriptor + LZW data for one (sub-)frame, via Pillow's encoder."""
+    params = {"duration": duration, "disposal": 1}
+    if transparency is not None:
+        params["transparency"] = transparency
+    chunks = GifImagePlugin.getdata(Image.fromarray(np.ascontiguousarray(sub), "P"), offset, **params)
+    return b"".join(chunks)
+
+
+def _delta(prev: np.ndarray, cur: np.ndarray, transparency):
+    """Returns (sub-image, (x, y)) covering the pixels of cur that differ from prev."""
+    changed = prev != cur
+    rows = np.flatnonzero(changed.any(axis=1))
+    if rows.size == 0:
+        # Nothing moved: a single pixel keeps the frame (and its delay) in the sequence
+        px = np.full((1, 1), cur[0, 0] if transparency is None else transparency, dtype=np.uint8)
+        return px, (0, 0)
+    cols = np.flatnonzero(changed.any(axis=0))
+    y0, y1, x0, x1 = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+    sub = cur[y0:y1, x0:x1]
+    box_changed = changed[y0:y1, x0:x1]
+    if transparency is not None and box_changed.mean() <= DELTA_MAX_CHANGED:
+        sub = sub.copy()
+        sub[~box_changed] = transparency
+    return sub, (int(x0), int(y0))
+
+
+def write_gif(dest, frames, duration_ms: int, loop: int = 0, delta: bool = True) -> int:
+    """
+    Writes an animated GIF.
+
+    Args:
+        dest (str | file): Output path (written via a temp file and renamed) or a binary stream.
+        frames (list): "P" mode images sharing the palette of frames[0], in playback order.
+        duration_ms (int): Display time of every frame.
+        loop (int): Netscape loop count, 0 = forever.
+        delta (bool): Emit changed bounding boxes only; False writes full frames.
+
+    Returns:
+        int: Number of bytes written.
+    """
+    if not frames:
+        raise ValueError("write_gif needs at least one frame")
+
+    arrays = {}
+    for f in frames:
+        if id(f) not in arrays:
+            arrays[id(f)] = np.asarray(f)
+    seq = [arrays[id(f)] for f in frames]
+    height, width = seq[0].shape[:2]
+    if any(a.shape != seq[0].shape for a in seq):
+        delta = False
+
+    # First unused index is free to act as the transparent colour
+    used = max(int(a.max()) for a in arrays.values()) + 1
+    transparency = used if delta and used < 256 else None
+
+    if isinstance(dest, (str, os.PathLike)):
+        tmp = f"{os.fspath(dest)}.tmp"
+        with open(tmp, "wb") as fp:
+            size = write_gif(fp, frames, duration_ms, loop, delta)
+        os.replace(tmp, dest)
+        return size
+
+    fp = dest
+    written = fp.write(_header(width, height, _palette_bytes(frames[0]), loop))
+    encoded = {}
+    prev_key = None
+    for f, cur in zip(frames, seq):
+        key = (prev_key, id(f)) if delta else id(f)
+        chunk = encoded.get(key)
+        if chunk is None:
+            if delta and prev_key is not None:
+                sub, offset = _delta(arrays[prev_key], cur, transparency)
+            else:
+                sub, offset = cur, (0, 0)
+            chunk = encoded[key] = _encode(sub, offset, duration_ms, transparency if delta else None)
+        written += fp.write(chunk)
+        prev_key = id(f)
+    written += fp.write(b";")
+    return written
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
@@ -0,0 +1,150 @@
+"""
+Script Name: liveBuffer.py
+Description:
+    Memory-mapped ring buffer for live-preview frames. The streaming capture
+    (streamUSB.py --stream) decodes every camera's frames straight into a slot
+    of this file and then bumps a sequence counter, so consumers can map the
+    same file and detect new frames by comparing counters instead of polling
+    the filesystem for a rewritten PNG.
+
+File layout (little endian, default images/live/live.frames):
+    header  64 bytes : magic 'WGLV', version, width, height, channels, slots,
+                       camera count, global sequence (u64 @ 32)
+    per camera       : 64-byte camera header (cam id, sequence u64 @ 8,
+                       latest slot @ 16, monotonic timestamp f64 @ 24)
+                       followed by `slots` frames of height*width*channels bytes
+"""
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
+
+import mmap
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+MAGIC = b"WGLV"
+VERSION = 1
+HEADER_SIZE = 64
+CAM_HEADER_SIZE = 64
+DEFAULT_SLOTS = 3
+
+_HEADER = struct.Struct("<4sIIIIII")   # magic, version, width, height, channels, slots, cameras
+_GLOBAL_SEQ_OFFSET = 32
+_CAM_ID = struct.Struct("<I")
+_CAM_STATE = struct.Struct("<QId")     # sequence, latest slot, timestamp (at offset 8)
+
+
+def _layout(width, height, channels, slots, cameras):
+    frame_bytes = width * height * channels
+    section = CAM_HEADER_SIZE + slots * frame_bytes
+    return frame_bytes, section, HEADER_SIZE + cameras * section
+
+
+class LiveFrameWriter:
+    """Producer side: one ring of `slots` frames per camera inside a shared mmap file."""
+
+    def __init__(self, path, cam_ids, width, height, channels=3, slots=DEFAULT_SLOTS):
+        self.path = Path(path)
+        self.cam_ids = list(cam_ids)
+        self.width, self.height, self.channels, self.slots = width, height, channels, slots
+        self.frame_bytes, self.section, total = _layout(width, height, channels, slots, len(self.cam_ids))
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.ftruncate(fd, total)
+            self.mm = mmap.mmap(fd, total)
+        finally:
+            os.close(fd)
+
+        _HEADER.pack_into(self.mm, 0, MAGIC, VERSION, width, height, channels, slots, len(self.cam_ids))
+        struct.pack_into("<Q", self.mm, _GLOBAL_SEQ_OFFSET, 0)
+        self._seq = {}
+        for i, cam_id in enumerate(self.cam_ids):
+            base = HEADER_SIZE + i * self.section
+            _CAM_ID.pack_into(self.mm, base, cam_id)
+            _CAM_STATE.pack_into(self.mm, base + 8, 0, 0, 0.0)
+            self._seq[cam_id] = 0
+        self._global_seq = 0
+        # Every camera's stream thread publishes through this one writer
+        self._global_lock = threading.Lock()
+
+    def _cam_base(self, cam_id):
+        return HEADER_SIZE + self.cam_ids.index(cam_id) * self.section
+
+    def next_slot(self, cam_id) -> np.ndarray:
+        """
+        Returns a writable (H, W, C) view of the slot the next frame of cam_id goes into.
+        Decode directly into it, then call publish(cam_id).
+        """
+        slot = (self._seq[cam_id] + 1) % self.slots
+        start = self._cam_base(cam_id) + CAM_HEADER_SIZE + slot * self.frame_bytes
+        return np.frombuffer(self.mm, dtype=np.uint8, count=self.frame_bytes, offset=start).reshape(
+            self.height, self.width, self.channels
+        )
+
+    def publish(self, cam_id):
+        """Marks the slot returned by next_slot as the newest frame of cam_id."""
+        seq = self._seq[cam_id] + 1
+        self._seq[cam_id] = seq
+        _CAM_STATE.pack_into(self.mm, self._cam_base(cam_id) + 8, seq, seq % self.slots, time.monotonic())
+        with self._global_lock:
+            # Increment and store together so the shared counter never goes backwards
+            self._global_seq += 1
+            struct.pack_into("<Q", self.mm, _GLOBAL_SEQ_OFFSET, self._global_seq)
+
+    def close(self):
+        try:
+            self.mm.close()
+        except Exception:
+            pass
+
+
+class LiveFrameReader:
+    """Consumer side: maps the file read-only and returns frames when their sequence advances."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, w, h, c, slots, cams = _HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a live frame buffer")
+        self.width, self.height, self.channels, self.slots = w, h, c, slots
+        self.frame_bytes, self.section, _ = _layout(w, h, c, slots, cams)
+        self.cam_ids = [
+            _CAM_ID.unpack_from(self.mm, HEADER_SIZE + i * self.section)[0] for i in range(cams)
+        ]
+
+    def global_sequence(self) -> int:
+        """Total number of frames published; changes whenever any camera has a new frame."""
+        return struct.unpack_from("<Q", self.mm, _GLOBAL_SEQ_OFFSET)[0]
+
+    def latest(self, cam_id, since_seq=0):
+        """
+        Returns (seq, timestamp, frame copy) for cam_id, or None if there is
+        nothing newer than since_seq. The copy is re-validated against the
+        sequence so a slot overwritten mid-copy is never returned.
+        """
+        base = HEADER_SIZE + self.cam_ids.index(cam_id) * self.section
+        for _ in range(3):
+            seq, slot, ts = _CAM_STATE.unpack_from(self.mm, base + 8)
+            if seq == 0 or seq <= since_seq:
+                return None
+            start = base + CAM_HEADER_SIZE + slot * self.frame_bytes
+            frame = np.frombuffer(self.mm, dtype=np.uint8, count=self.frame_bytes, offset=start).copy()
+            # The writer fills slot seq+1 next; only a lap of the whole ring can clobber this one
+            if _CAM_STATE.unpack_from(self.mm, base + 8)[0] < seq + self.slots - 1:
+                return seq, ts, frame.reshape(self.height, self.width, self.channels)
+        return None
+
+    def close(self):
+        try:
+            self.mm.close()
+        except Exception:
+            pass
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
@@ -0,0 +1,214 @@
+"""
+Script Name: perfTrace.py
+Description:
+    Shared, lightweight performance instrumentation for the capture and wiggle
+    pipeline. Code marks work with nested spans (`with perfTrace.span("decode",
+    frame=2):`); when tracing is enabled every finished span is recorded with a
+    monotonic nanosecond timer, its nesting depth and thread, and optionally
+    the tracemalloc peak reached inside it. Output is JSON lines (one span per
+    line, written as it ends) or a Chrome trace-event file (chrome://tracing,
+    Perfetto) written at exit. When tracing is disabled a span is one global
+    check returning a shared no-op object.
+
+Enabling:
+    perfTrace.configure("run.jsonl")            JSON lines (any other extension)
+    perfTrace.configure("run.json")             Chrome trace events
+    perfTrace.configure(None, echo=True)        human-readable "name took x ms" lines on stderr
+    or the environment: WIGGLE_TRACE=path, WIGGLE_TRACE_MEMORY=1, WIGGLE_TRACE_ECHO=1
+    (wiggler.py and streamUSB.py also take --trace PATH, --trace-memory and --timings)
+"""
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+
+_enabled = False
+_memory = False
+_echo = False
+_path = None
+_chrome = False
+_events = []
+_file = None
+_write_lock = threading.Lock()
+_local = threading.local()
+_pid = os.getpid()
+_t0 = time.perf_counter_ns()
+
+
+class _NullSpan:
+    """Shared do-nothing span used while tracing is disabled."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **fields):
+        pass
+
+
+_NULL = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "fields", "start", "depth", "mem_start", "peak_seen")
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+
+    def set(self, **fields):
+        """Attaches extra fields (sizes, counts) known only inside the span."""
+        self.fields.update(fields)
+
+    def __enter__(self):
+        stack = _stack()
+        self.depth = len(stack)
+        if _memory:
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                # reset_peak is process-wide: keep what the parent has seen so far
+                stack[-1].peak_seen = max(stack[-1].peak_seen, peak)
+            tracemalloc.reset_peak()
+            self.mem_start = current
+            self.peak_seen = current
+        stack.append(self)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        stack = _stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        record = {"name": self.name, "ts_us": (self.start - _t0) / 1000, "dur_ms": (end - self.start) / 1e6,
+                  "depth": self.depth, "tid": threading.get_ident()}
+        if _memory:
+            import tracemalloc
+            peak = max(self.peak_seen, tracemalloc.get_traced_memory()[1])
+            record["peak_kb"] = round((peak - self.mem_start) / 1024, 1)
+            if stack:
+                stack[-1].peak_seen = max(stack[-1].peak_seen, peak)
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        if self.fields:
+            record["args"] = self.fields
+        _emit(record)
+        return False
+
+
+def _stack() -> list:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _emit(record: dict):
+    if _echo:
+        extra = f" (peak +{record['peak_kb']:.0f} KiB)" if "peak_kb" in record else ""
+        args = " ".join(f"{k}={v}" for k, v in record.get("args", {}).items())
+        line = f"{'  ' * record['depth']}{record['name']} took {record['dur_ms']:.1f} ms{extra}" + (f" [{args}]" if args else "")
+        with _write_lock:
+            # One write per line so spans ending on different threads do not interleave
+            sys.stderr.write(line + "\n")
+            sys.stderr.flush()
+    if _path is None:
+        return
+    with _write_lock:
+        if _chrome:
+            _events.append({"name": record["name"], "ph": "X", "ts": record["ts_us"], "dur": record["dur_ms"] * 1000,
+                            "pid": _pid, "tid": record["tid"],
+                            "args": dict(record.get("args", {}), **({"peak_kb": record["peak_kb"]} if "peak_kb" in record else {}))})
+        elif _file is not None:
+            _file.write(json.dumps(record, default=str) + "\n")
+            _file.flush()
+
+
+def span(name: str, **fields):
+    """Context manager timing the enclosed block as one (nested) span; a no-op unless enabled."""
+    if not _enabled:
+        return _NULL
+    return _Span(name, fields)
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def configure(path: str = None, memory: bool = False, echo: bool = False):
+    """
+    Turns tracing on (a path and/or echo) or off (neither).
+
+    Args:
+        path (str): Output file; ".json" writes Chrome trace events at close(), anything else JSON lines.
+        memory (bool): Record the tracemalloc peak inside every span (slows the traced code down).
+        echo (bool): Also print every finished span to stderr.
+    """
+    global _enabled, _memory, _echo, _path, _chrome, _file
+    close()
+    _path = path
+    _chrome = bool(path) and path.endswith(".json")
+    _echo = bool(echo)
+    _memory = bool(memory) and bool(path or echo)
+    if path and not _chrome:
+        _file = open(path, "a", encoding="utf-8")
+    if _memory:
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+    _enabled = bool(path or echo)
+
+
+def close():
+    """Flushes and closes the output (writes the Chrome trace file); tracing stays configured off."""
+    global _enabled, _file
+    _enabled = False
+    with _write_lock:
+        if _file is not None:
+            _file.close()
+            _file = None
+        if _chrome and _path and _events:
+            tmp = _path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"traceEvents": _events, "displayTimeUnit": "ms"}, f, default=str)
+            os.replace(tmp, _path)
+            _events.clear()
+
+
+def configure_from_env():
+    """Applies WIGGLE_TRACE / WIGGLE_TRACE_MEMORY / WIGGLE_TRACE_ECHO if set."""
+    path = os.environ.get("WIGGLE_TRACE") or None
+    echo = os.environ.get("WIGGLE_TRACE_ECHO", "") not in ("", "0")
+    if path or echo:
+        configure(path, memory=os.environ.get("WIGGLE_TRACE_MEMORY", "") not in ("", "0"), echo=echo)
+
+
+def add_arguments(parser):
+    """Adds the shared --trace/--trace-memory/--timings options to an argparse parser."""
+    parser.add_argument("--trace", type=str, default=None, metavar="PATH",
+                        help="Record timing spans to PATH (.json: Chrome trace events, otherwise JSON lines)")
+    parser.add_argument("--trace-memory", action="store_true", help="With --trace/--timings, record tracemalloc peaks per span")
+    parser.add_argument("--timings", action="store_true", help="Print every timing span to stderr")
+
+
+def configure_from_args(args):
+    """Enables tracing from add_arguments() options (falls back to the environment)."""
+    if args.trace or args.timings:
+        configure(args.trace, memory=args.trace_memory, echo=args.timings)
+    else:
+        configure_from_env()
+
+
+atexit.register(close)
+configure_from_env()
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
@@ -0,0 +1,145 @@
+"""
+Script Name: registerMap.py
+Description:
+    Register-map handling for the OV5640 sensors behind the STM32 cameras.
+    Builds the effective {register: value} map from an ordered list of entries
+    while reporting duplicate and conflicting registers (which a dict literal
+    would silently collapse), keeps the last-applied state of every camera in
+    camera.db and computes the minimal write set needed to reach a requested
+    configuration.
+
+Usage:
+  python3 scripts/registerMap.py [--exposure 1-10] [--camera ID]
+"""
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
+
+import argparse
+import sqlite3
+import sys
+from pathlib import Path
+
+DB_PATH = Path(__file__).resolve().parent / "camera.db"
+
+
+def build_register_map(entries, strict: bool = False):
+    """
+    Collapses an ordered list of (register, value) pairs into a dict.
+
+    Behaves like the dict literal it replaces (first position, last value wins)
+    but reports every repeated register: "duplicate" if the value is the same,
+    "conflict" if it differs.
+
+    Args:
+        entries (list): Ordered (register, value) tuples.
+        strict (bool): Raise ValueError on conflicts instead of only reporting them.
+
+    Returns:
+        tuple: (dict of register -> value, list of human-readable issue strings)
+    """
+    regs = {}
+    issues = []
+    for reg, val in entries:
+        if not (0 <= reg <= 0xFFFF) or not (0 <= val <= 0xFF):
+            raise ValueError(f"Register entry out of range: 0x{reg:X} = 0x{val:X}")
+        if reg in regs:
+            if regs[reg] == val:
+                issues.append(f"duplicate: 0x{reg:04X} = 0x{val:02X} listed more than once")
+            else:
+                msg = f"conflict: 0x{reg:04X} set to 0x{regs[reg]:02X} and 0x{val:02X} (using 0x{val:02X})"
+                if strict:
+                    raise ValueError(msg)
+                issues.append(msg)
+        regs[reg] = val
+    return regs, issues
+
+
+def _connect(db_path=None):
+    """Opens camera.db and makes sure the per-camera register state table exists."""
+    conn = sqlite3.connect(str(db_path or DB_PATH), timeout=5)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS register_state ("
+        "cam_id INTEGER NOT NULL, reg INTEGER NOT NULL, val INTEGER NOT NULL, "
+        "PRIMARY KEY (cam_id, reg))"
+    )
+    return conn
+
+
+def load_state(cam_id, db_path=None) -> dict:
+    """Returns the registers last applied to a camera as {reg: val} (empty if unknown)."""
+    try:
+        conn = _connect(db_path)
+        try:
+            rows = conn.execute("SELECT reg, val FROM register_state WHERE cam_id = ?", (cam_id,)).fetchall()
+        finally:
+            conn.close()
+        return {reg: val for reg, val in rows}
+    except Exception as e:
+        print(f"[DB ERROR] Could not read register state for Camera {cam_id}: {e}")
+        return {}
+
+
+def save_state(cam_id, regs: dict, db_path=None):
+    """Records registers that were just applied to a camera (merged into its stored state)."""
+    try:
+        conn = _connect(db_path)
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO register_state (cam_id, reg, val) VALUES (?, ?, ?)",
+                [(cam_id, reg, val) for reg, val in regs.items()],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"[DB ERROR] Could not save register state for Camera {cam_id}: {e}")
+
+
+def clear_state(cam_id, db_path=None):
+    """Forgets what a camera holds (e.g. after a power cycle reset its registry)."""
+    try:
+        conn = _connect(db_path)
+        try:
+            conn.execute("DELETE FROM register_state WHERE cam_id = ?", (cam_id,))
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"[DB ERROR] Could not clear register state for Camera {cam_id}: {e}")
+
+
+def minimal_write_set(requested: dict, applied: dict) -> dict:
+    """Registers from `requested` whose value differs from (or is missing in) `applied`, in request order."""
+    return {reg: val for reg, val in requested.items() if applied.get(reg) != val}
+
+
+def main(argv=None) -> int:
+    """Reports register-map issues and, per camera, the writes a configuration would need."""
+    import streamUSB
+
+    parser = argparse.ArgumentParser(description="Check the register map and show minimal write sets.")
+    parser.add_argument('--exposure', type=int, choices=range(1, 11),
+                        help="Include the exposure registers for this scale (1-10).")
+    parser.add_argument('--camera', type=int, choices=sorted(streamUSB.CAMERA_MAP),
+                        help="Only show this camera (default: all).")
+    args = parser.parse_args(argv)
+
+    _, issues = build_register_map(streamUSB.REGISTRY_ENTRIES)
+    print(f"{len(issues)} issue(s) in REGISTRY_ENTRIES")
+    for issue in issues:
+        print(f"  {issue}")
+
+    requested = streamUSB.requested_registers(args.exposure)
+    cams = [args.camera] if args.camera else sorted(streamUSB.CAMERA_MAP)
+    for cam_id in cams:
+        writes = minimal_write_set(requested, load_state(cam_id))
+        print(f"[CAM {cam_id}] {len(writes)} / {len(requested)} registers to write")
+        for reg, val in writes.items():
+            print(f"  W {reg:04X} {val:02X}")
+    return 1 if any(i.startswith("conflict") for i in issues) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
@@ -12,14 +12,24 @@ Description:
 import serial
 import time
 import argparse
+import json
+import os
+import shutil
+import socket
 import sys
 import threading
 import uuid
 import sqlite3
 import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from PIL import Image
 
+import captureCatalog
+import perfTrace
+import registerMap
+import thumbCache
+
 # --- CONFIGURATION ---
 WIDTH = 320
 HEIGHT = 240
@@ -30,68 +40,95 @@ BAUD_RATE = 115200
 TIMEOUT = 5
 
 # --- NEW: REGISTERS TO UPDATE ---
-# Add your I2C registers here. Format: { 0xRegister : 0xValue }
-REGISTRY_UPDATES = {
-0x3503: 0x01,  # AEC PK MANUAL: AEC manual enable (Bit 0=1), AGC auto enable (Bit 1=0)
-    0x350A: 0x00,  # AEC PK REAL GAIN: Real gain [9:8] (High bits of manual gain)
-    0x350B: 0x10,  # AEC PK REAL GAIN: Real gain [7:0] (Low bits of manual gain)
-
-    0x5001: 0x23,  # ISP CONTROL 01: AWB Enable (Bit 0), CMX Enable (Bit 1), Scale Enable (Bit 5)
-    0x5005: 0x32,  # ISP CONTROL 05: AWB Bias Enable (Bit 5), AWB Bias Plus (Bit 4), Gamma Bias (Bit 1)
-
-    0x4302: 0x03,  # YMAX VALUE: Y max clip value [9:8] (High bits)
-    0x4303: 0xFF,  # YMAX VALUE: Y max clip value [7:0] (Low bits) - Set to 1023 (0x3FF)
-    0x4306: 0x03,  # UMAX VALUE: U max clip value [9:8] (High bits)
-    0x4307: 0xFF,  # UMAX VALUE: U max clip value [7:0] (Low bits) - Set to 1023 (0x3FF)
-    0x430A: 0x03,  # VMAX VALUE: V max clip value [9:8] (High bits)
-    0x430B: 0xFF,  # VMAX VALUE: V max clip value [7:0] (Low bits) - Set to 1023 (0x3FF)
-
-    0x5000: 0x21,  # ISP CONTROL 00: RAW Gamma Enable (Bit 5), Color Interpolation Enable (Bit 0)
-    0x5481: 0x26,  # GAMMA YST00: Raw Gamma Curve Point 0
-    0x5482: 0x35,  # GAMMA YST01: Raw Gamma Curve Point 1
-    0x5483: 0x48,  # GAMMA YST02: Raw Gamma Curve Point 2
-    0x5484: 0x57,  # GAMMA YST03: Raw Gamma Curve Point 3
-    0x5485: 0x63,  # GAMMA YST04: Raw Gamma Curve Point 4
-    0x5486: 0x6E,  # GAMMA YST05: Raw Gamma Curve Point 5
-    0x5487: 0x77,  # GAMMA YST06: Raw Gamma Curve Point 6
-    0x5488: 0x80,  # GAMMA YST07: Raw Gamma Curve Point 7
+# Add your I2C registers here. Format: (0xRegister, 0xValue), applied in order
+REGISTRY_ENTRIES = [
+    (0x3503, 0x01),  # AEC PK MANUAL: AEC manual enable (Bit 0=1), AGC auto enable (Bit 1=0)
+    (0x350A, 0x00),  # AEC PK REAL GAIN: Real gain [9:8] (High bits of manual gain)
+    (0x350B, 0x10),  # AEC PK REAL GAIN: Real gain [7:0] (Low bits of manual gain)
+
+    (0x5001, 0x23),  # ISP CONTROL 01: AWB Enable (Bit 0), CMX Enable (Bit 1), Scale Enable (Bit 5)
+    (0x5005, 0x32),  # ISP CONTROL 05: AWB Bias Enable (Bit 5), AWB Bias Plus (Bit 4), Gamma Bias (Bit 1)
+
+    (0x4302, 0x03),  # YMAX VALUE: Y max clip value [9:8] (High bits)
+    (0x4303, 0xFF),  # YMAX VALUE: Y max clip value [7:0] (Low bits) - Set to 1023 (0x3FF)
+    (0x4306, 0x03),  # UMAX VALUE: U max clip value [9:8] (High bits)
+    (0x4307, 0xFF),  # UMAX VALUE: U max clip value [7:0] (Low bits) - Set to 1023 (0x3FF)
+    (0x430A, 0x03),  # VMAX VALUE: V max clip value [9:8] (High bits)
+    (0x430B, 0xFF),  # VMAX VALUE: V max clip value [7:0] (Low bits) - Set to 1023 (0x3FF)
+
+    (0x5000, 0x21),  # ISP CONTROL 00: RAW Gamma Enable (Bit 5), Color Interpolation Enable (Bit 0)
+    (0x5481, 0x26),  # GAMMA YST00: Raw Gamma Curve Point 0
+    (0x5482, 0x35),  # GAMMA YST01: Raw Gamma Curve Point 1
+    (0x5483, 0x48),  # GAMMA YST02: Raw Gamma Curve Point 2
+    (0x5484, 0x57),  # GAMMA YST03: Raw Gamma Curve Point 3
+    (0x5485, 0x63),  # GAMMA YST04: Raw Gamma Curve Point 4
+    (0x5486, 0x6E),  # GAMMA YST05: Raw Gamma Curve Point 5
+    (0x5487, 0x77),  # GAMMA YST06: Raw Gamma Curve Point 6
+    (0x5488, 0x80),  # GAMMA YST07: Raw Gamma Curve Point 7
     
-    0x3801: 0x01,  # TIMING HS: X address start [7:0] (Low byte)
-    0x3821: 0x07,  # TIMING TC REG21: ISP mirror (Bit 2), Sensor mirror (Bit 1), Horiz binning (Bit 0)
+    (0x3801, 0x01),  # TIMING HS: X address start [7:0] (Low byte)
+    (0x3821, 0x07),  # TIMING TC REG21: ISP mirror (Bit 2), Sensor mirror (Bit 1), Horiz binning (Bit 0)
 
     # 0xA3 = 1010 0011 (SDE Enable, Scale Enable, CMX Enable, AWB Enable)
-    0x5001: 0xA3,  # ISP CONTROL 01: SDE (Bit 7), Scale (Bit 5), CMX (Bit 1), AWB (Bit 0) enabled
-    0x3812: 0x00,  # TIMING VOFFSET: ISP vertical offset [10:8] (High byte)
-    0x3811: 0x01,  # TIMING HOFFSET: ISP horizontal offset [7:0] (Low byte)
+    (0x5001, 0xA3),  # ISP CONTROL 01: SDE (Bit 7), Scale (Bit 5), CMX (Bit 1), AWB (Bit 0) enabled
+    (0x3812, 0x00),  # TIMING VOFFSET: ISP vertical offset [10:8] (High byte)
+    (0x3811, 0x01),  # TIMING HOFFSET: ISP horizontal offset [7:0] (Low byte)
 
     # Sign bits (Critical for Green Channel subtractions)
-    0x501F: 0x00, # FORMAT MUX CONTROL: Select ISP YUV422 (0x00)
-    0x4300: 0x30, # FORMAT CONTROL 00: Output YUV422 (Bit 7:4=0x3), Sequence YUYV (Bit 3:0=0x0)
+    (0x501F, 0x00), # FORMAT MUX CONTROL: Select ISP YUV422 (0x00)
+    (0x4300, 0x30), # FORMAT CONTROL 00: Output YUV422 (Bit 7:4=0x3), Sequence YUYV (Bit 3:0=0x0)
     #0x5020: 0x2A, # DITHER CTRL 0: Dither control settings
-    0x503D: 0x00, # PRE ISP TEST SETTING 1: Color bar disable (Bit 7=0)
+    (0x503D, 0x00), # PRE ISP TEST SETTING 1: Color bar disable (Bit 7=0)
 
     # 1. Fix the Window Phase (The original solution)
-    0x3800: 0x00,  # TIMING HS: X address start [11:8] (High byte)
-    0x3801: 0x01,  # TIMING HS: X address start [7:0] (Low byte)
-    0x3802: 0x00,  # TIMING VS: Y address start [10:8] (High byte)
-    0x3803: 0x01,  # TIMING VS: Y address start [7:0] (Low byte)
+    (0x3800, 0x00),  # TIMING HS: X address start [11:8] (High byte)
+    (0x3801, 0x01),  # TIMING HS: X address start [7:0] (Low byte)
+    (0x3802, 0x00),  # TIMING VS: Y address start [10:8] (High byte)
+    (0x3803, 0x01),  # TIMING VS: Y address start [7:0] (Low byte)
     
     # 2. Keep Mirror/Binning (As you had originally)
-    0x3820: 0x00,  # TIMING TC REG20: Vertical flip disable (Bit 2=0, Bit 1=0)
-    0x3821: 0x07,  # TIMING TC REG21: ISP mirror, Sensor mirror, and Horizontal binning enabled
+    (0x3820, 0x00),  # TIMING TC REG20: Vertical flip disable (Bit 2=0, Bit 1=0)
+    (0x3821, 0x07),  # TIMING TC REG21: ISP mirror, Sensor mirror, and Horizontal binning enabled
     
     # 3. Output Format
-    0x4300: 0x30,  # FORMAT CONTROL 00: Output YUV422, YUYV Sequence
-    0x501f: 0x00,  # FORMAT MUX CONTROL: ISP YUV422 select
+    (0x4300, 0x30),  # FORMAT CONTROL 00: Output YUV422, YUYV Sequence
+    (0x501f, 0x00),  # FORMAT MUX CONTROL: ISP YUV422 select
     
     # 4. Revert Color Settings (To what worked before)
     # 0xA3 = 1010 0011. Note: Bit 1 is CMX Enable. 
-    0x5001: 0xA3,  # ISP CONTROL 01: SDE on, Scale on, CMX on, AWB on
-    0x5580: 0x02,  # SDE CTRL 0: SDE Manual Control/UV Adjust Enable (Bit 1=1)
-    0x5583: 0x40,  # SDE CTRL 3: Saturation U (or Fixed U) value
-    0x5584: 0x40,  # SDE CTRL 4: Saturation V (or Fixed V) value
-    0x5587: 0x00,  # SDE CTRL 7: Y bright for contrast (Brightness)
-}
+    (0x5001, 0xA3),  # ISP CONTROL 01: SDE on, Scale on, CMX on, AWB on
+    (0x5580, 0x02),  # SDE CTRL 0: SDE Manual Control/UV Adjust Enable (Bit 1=1)
+    (0x5583, 0x40),  # SDE CTRL 3: Saturation U (or Fixed U) value
+    (0x5584, 0x40),  # SDE CTRL 4: Saturation V (or Fixed V) value
+    (0x5587, 0x00),  # SDE CTRL 7: Y bright for contrast (Brightness)
+]
+
+# Effective map (last value wins, like the old dict literal). Repeated registers
+# are collected in REGISTRY_ISSUES and reported before every upload.
+REGISTRY_UPDATES, REGISTRY_ISSUES = registerMap.build_register_map(REGISTRY_ENTRIES)
+
+# Bulk register upload: "B" + up to 7 " RRRR VV" pairs + "\n" fits the firmware's
+# 64-byte USB receive buffer. Each packet is acknowledged with "K <count>\n".
+BULK_PAIRS_PER_PACKET = 7
+ACK_TIMEOUT = 0.5
+LEGACY_WRITE_DELAY = 0.05
+
+# Chunked frame reception: data is read in READ_CHUNK pieces; a camera that
+# sends nothing for STALL_TIMEOUT after its first byte is treated as stalled
+# and only that camera is asked again (up to CAPTURE_RETRIES times).
+READ_CHUNK = 16384
+READ_POLL = 0.05
+STALL_TIMEOUT = 0.5
+CAPTURE_RETRIES = 1
+
+# Image encoding: frames are handed to ENCODE_WORKERS threads through a queue of
+# at most ENCODE_QUEUE_SIZE frames. ENCODE_FORMAT "png" (zlib, PNG_COMPRESS_LEVEL
+# 0-9), "bmp" (uncompressed, fastest to write) or "npy" (raw RGB array).
+ENCODE_FORMATS = {"png": ".png", "bmp": ".bmp", "npy": ".npy"}
+ENCODE_FORMAT = "png"
+PNG_COMPRESS_LEVEL = 6
+ENCODE_WORKERS = 2
+ENCODE_QUEUE_SIZE = 8
 
 # Paths anchored to script location
 SCRIPT_DIR = Path(__file__).resolve().parent
@@ -106,6 +143,75 @@ DB_PATH = SCRIPT_DIR / "camera.db"
 first_image_saved = False
 first_image_lock = threading.Lock()
 
+def reset_first_image_flag():
+    """Re-arms the first-frame copy to images/ (needed when one process runs many batches)."""
+    global first_image_saved
+    with first_image_lock:
+        first_image_saved = False
+
+# Datagram socket of a running wigglePipeline service
+PIPELINE_SOCKET = os.environ.get("WIGGLE_PIPELINE_SOCKET", "/tmp/wiggle_pipeline.sock")
+
+def notify_pipeline(event: dict):
+    """Fire-and-forget event for the pipeline service; does nothing if none is running."""
+    if not os.path.exists(PIPELINE_SOCKET):
+        return
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as s:
+            s.setblocking(False)
+            s.sendto(json.dumps(event).encode("utf-8"), PIPELINE_SOCKET)
+    except OSError:
+        pass
+
+# batch_uuid -> start time (unix, float) whose whole seconds name every file of that batch
+BATCH_MARKER_EXT = ".done"
+_batch_starts = {}
+_batch_lock = threading.Lock()
+
+def begin_batch(batch_uuid):
+    """
+    Assigns a capture batch its start timestamp, once, before any camera runs.
+    All four frames are named after it ({start}_{cam_id}), so a batch can no
+    longer straddle a second boundary. Returns the start timestamp.
+    """
+    with _batch_lock:
+        start = _batch_starts.setdefault(batch_uuid, time.time())
+    reset_first_image_flag()
+    return int(start)
+
+def batch_start(batch_uuid):
+    """Start timestamp of a begun batch (begun on the fly for callers that skipped begin_batch)."""
+    with _batch_lock:
+        return int(_batch_starts.setdefault(batch_uuid, time.time()))
+
+def commit_batch(batch_uuid, saved: dict):
+    """
+    Marks a batch complete once all its frames are on disk: writes
+    raws/{start}.done (JSON with the frame paths) atomically and stamps the
+    catalog row, so consumers can start at once instead of polling file sizes.
+    Returns the marker path, or None if no frame was saved.
+    """
+    with _batch_lock:
+        start = _batch_starts.pop(batch_uuid, None)
+    frames = {str(c): (str(p) if p else None) for c, p in sorted(saved.items())}
+    if start is None or not any(frames.values()):
+        return None
+    name = str(int(start))
+    marker = BATCH_OUTPUT_DIR / f"{name}{BATCH_MARKER_EXT}"
+    payload = {"name": name, "batch": batch_uuid, "started": start, "completed": time.time(),
+               "ok": all(frames.values()), "frames": frames}
+    try:
+        tmp = marker.with_name(marker.name + ".tmp")
+        tmp.write_text(json.dumps(payload))
+        # Readers see either no marker or a complete one
+        os.replace(tmp, marker)
+    except OSError as e:
+        print(f"[BATCH {batch_uuid}] Could not write commit marker: {e}")
+        return None
+    captureCatalog.mark_complete(name, payload["completed"], db_path=DB_PATH)
+    notify_pipeline(dict(payload, event="batch"))
+    return marker
+
 # Map IDs to Udev Fixed Paths
 CAMERA_MAP = {
     2: '/dev/stm32_cam_1',
@@ -179,6 +285,63 @@ def disable_live_mode(cam_id):
     except Exception as e:
         print(f"[DB ERROR] Could not update database for Camera {cam_id}: {e}")
 
+def applied_exposure_lines(cam_id):
+    """Exposure in sensor lines last written to a camera (from its stored register state), None if unknown."""
+    regs = registerMap.load_state(cam_id, DB_PATH)
+    if not all(r in regs for r in (0x3500, 0x3501, 0x3502)):
+        return None
+    # 20-bit value in 1/16 line units, see set_exposure_config
+    return ((regs[0x3500] << 16) | (regs[0x3501] << 8) | regs[0x3502]) >> 4
+
+def requested_registers(exposure_value=None) -> dict:
+    """The full register configuration for an UPDATE, including exposure if given."""
+    regs = REGISTRY_UPDATES.copy()
+    if exposure_value is not None:
+        regs = set_exposure_config(regs, exposure_value)
+    return regs
+
+def _wait_for_ack(ser, expected) -> bool:
+    """Waits up to ACK_TIMEOUT for the firmware's "K <count>" reply to a bulk packet."""
+    old_timeout = ser.timeout
+    ser.timeout = ACK_TIMEOUT
+    try:
+        deadline = time.monotonic() + ACK_TIMEOUT
+        while time.monotonic() < deadline:
+            line = ser.read_until(b'\n').decode('utf-8', errors='ignore').strip()
+            if not line:
+                return False
+            if line.startswith('K'):
+                return line[1:].strip() == str(expected)
+        return False
+    finally:
+        ser.timeout = old_timeout
+
+def upload_registers(ser, cam_id, regs: dict) -> bool:
+    """
+    Sends registers to the camera in bulk packets, each released by the firmware's ACK.
+    Falls back to one 'W' line per register with fixed delays if the firmware does not
+    acknowledge (older firmware without the 'B' command). Returns True if bulk mode was used.
+    """
+    items = list(regs.items())
+    sent = 0
+    bulk = True
+    while sent < len(items) and bulk:
+        chunk = items[sent:sent + BULK_PAIRS_PER_PACKET]
+        cmd = "B" + "".join(f" {reg:04X} {val:02X}" for reg, val in chunk) + "\n"
+        ser.write(cmd.encode('utf-8'))
+        if _wait_for_ack(ser, len(chunk)):
+            sent += len(chunk)
+        else:
+            bulk = False
+            with print_lock:
+                print(f"[CAM {cam_id}] No bulk ACK, falling back to single register writes.")
+
+    for reg, val in items[sent:]:
+        cmd = f"W {reg:04X} {val:02X}\n"
+        ser.write(cmd.encode('utf-8'))
+        time.sleep(LEGACY_WRITE_DELAY)
+    return bulk
+
 def yuv422_to_rgb(raw_data, width, height):
     """
     Converts raw YUYV422 data to an RGB888 NumPy array.
@@ -224,6 +387,73 @@ def yuv422_to_rgb(raw_data, width, height):
 
     return rgb
 
+# --- Fixed-point YUV decoding (Q16) ---
+# Same JFIF coefficients as yuv422_to_rgb, scaled by 2^16. Because Y is an
+# integer, floor(Y + term) == Y + (term >> 16), so each chroma term is shifted
+# down to int16 once per macropixel and the per-pixel work is add + clip only.
+_FIX_SHIFT = 16
+_R_FROM_U = int(round(1.772 * (1 << _FIX_SHIFT)))
+_G_FROM_V = int(round(1.402 * (1 << _FIX_SHIFT)))
+_B_FROM_U = int(round(-0.344136 * (1 << _FIX_SHIFT)))
+_B_FROM_V = int(round(-0.714136 * (1 << _FIX_SHIFT)))
+
+def make_yuv_buffers(width, height):
+    """
+    Allocates the reusable output and scratch buffers for yuv422_to_rgb_fixed.
+    Keep one set per thread/camera and pass it to every call.
+    """
+    half = (height, width // 2)
+    return {
+        "out": np.empty((height, width, 3), dtype=np.uint8),
+        "u": np.empty(half, dtype=np.int32),
+        "v": np.empty(half, dtype=np.int32),
+        "t": np.empty(half, dtype=np.int32),
+        "r": np.empty(half, dtype=np.int16),
+        "g": np.empty(half, dtype=np.int16),
+        "b": np.empty(half, dtype=np.int16),
+        "y": np.empty(half, dtype=np.int16),
+        "acc": np.empty(half, dtype=np.int16),
+    }
+
+def yuv422_to_rgb_fixed(raw_data, width, height, out=None, buffers=None):
+    """
+    Integer-only equivalent of yuv422_to_rgb (same channel mapping, within 1 LSB).
+    Writes into `out` (H x W x 3 uint8, defaults to buffers["out"]) and works in
+    `buffers` from make_yuv_buffers, so repeated calls allocate no frame arrays.
+    """
+    if buffers is None:
+        buffers = make_yuv_buffers(width, height)
+    if out is None:
+        out = buffers["out"]
+
+    data = np.frombuffer(raw_data, dtype=np.uint8).reshape(height, width // 2, 4)
+    u, v, t = buffers["u"], buffers["v"], buffers["t"]
+    r, g, b = buffers["r"], buffers["g"], buffers["b"]
+    y, acc = buffers["y"], buffers["acc"]
+
+    # 1. Signed chroma, then per-macropixel integer terms (shared by both pixels)
+    np.subtract(data[..., 1], 128, out=u, dtype=np.int32)
+    np.subtract(data[..., 3], 128, out=v, dtype=np.int32)
+
+    np.multiply(u, _R_FROM_U, out=t)
+    np.right_shift(t, _FIX_SHIFT, out=r, casting='unsafe')
+    np.multiply(v, _G_FROM_V, out=t)
+    np.right_shift(t, _FIX_SHIFT, out=g, casting='unsafe')
+    np.multiply(u, _B_FROM_U, out=u)
+    np.multiply(v, _B_FROM_V, out=v)
+    np.add(u, v, out=t)
+    np.right_shift(t, _FIX_SHIFT, out=b, casting='unsafe')
+
+    # 2. Add luma per pixel, clip and write straight into the interleaved output
+    for y_plane, dst in ((data[..., 0], out[:, 0::2]), (data[..., 2], out[:, 1::2])):
+        np.copyto(y, y_plane)
+        for ch, term in enumerate((r, g, b)):
+            np.add(y, term, out=acc)
+            np.clip(acc, 0, 255, out=acc)
+            dst[..., ch] = acc
+
+    return out
+
 def yuv422_to_rgb_rgb565(raw_data, width, height):
     """
     Converts raw data interpreted as RGB565 to an RGB888 NumPy array.
@@ -258,13 +488,43 @@ def yuv422_to_rgb_rgb565(raw_data, width, height):
 
     return rgb
 
+_yuv_local = threading.local()
+
+def _thread_yuv_buffers():
+    """Returns this thread's decode buffers, allocating them on first use."""
+    bufs = getattr(_yuv_local, "buffers", None)
+    if bufs is None:
+        bufs = make_yuv_buffers(WIDTH, HEIGHT)
+        _yuv_local.buffers = bufs
+    return bufs
+
+def _link_or_copy(src_path, dst_path):
+    """Hardlinks an already encoded file to a second name, copying if links are unsupported."""
+    try:
+        if os.path.lexists(dst_path):
+            os.remove(dst_path)
+        os.link(src_path, dst_path)
+    except OSError:
+        shutil.copyfile(src_path, dst_path)
+
+def _write_encoded(path, arr, img):
+    """Writes one decoded frame in ENCODE_FORMAT (PNG level, uncompressed BMP or raw .npy)."""
+    if ENCODE_FORMAT == "npy":
+        np.save(path, arr)
+    elif ENCODE_FORMAT == "bmp":
+        img.save(path, format="BMP")
+    else:
+        img.save(path, format="PNG", compress_level=PNG_COMPRESS_LEVEL)
+
 def save_image(raw_data, cam_id, batch_uuid=None, as_grayscale=False, is_live=False):
     """
-    Decodes raw camera data and saves it as a PNG image.
+    Decodes raw camera data and saves it as a PNG image (or BMP/.npy, see ENCODE_FORMAT).
     Handles file path generation for live, batch, or single capture modes.
+    Returns the saved path, or None on failure.
     """
     try:
         img = None
+        arr = None
         if as_grayscale:
             y_data = None
             if PACKING.upper() == "UYVY":
@@ -273,23 +533,34 @@ def save_image(raw_data, cam_id, batch_uuid=None, as_grayscale=False, is_live=Fa
                 y_data = raw_data[0::2]
             if y_data:
                 img = Image.frombytes("L", (WIDTH, HEIGHT), bytes(y_data))
+                arr = np.asarray(img)
         else:
-            rgb_array = yuv422_to_rgb(raw_data, WIDTH, HEIGHT)
-            img = Image.fromarray(rgb_array, mode='RGB')
+            with perfTrace.span("yuv_decode", cam=cam_id):
+                arr = yuv422_to_rgb_fixed(raw_data, WIDTH, HEIGHT, buffers=_thread_yuv_buffers())
+            img = Image.fromarray(arr, mode='RGB')
 
         if img:
-            unix_time = int(time.time())
+            ext = ENCODE_FORMATS[ENCODE_FORMAT]
+            unix_time = batch_start(batch_uuid) if batch_uuid else int(time.time())
             if is_live:
                 LIVE_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-                filename = LIVE_OUTPUT_DIR / "live.png"
+                filename = LIVE_OUTPUT_DIR / f"live{ext}"
             elif batch_uuid:
                 BATCH_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-                filename = BATCH_OUTPUT_DIR / f"{unix_time}_{cam_id}.png"
+                filename = BATCH_OUTPUT_DIR / f"{unix_time}_{cam_id}{ext}"
             else:
                 SINGLE_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-                filename = SINGLE_OUTPUT_DIR / f"cam_{cam_id}_capture.png"
-
-            img.save(filename, format="PNG")
+                filename = SINGLE_OUTPUT_DIR / f"cam_{cam_id}_capture{ext}"
+
+            with perfTrace.span("save", cam=cam_id, format=ENCODE_FORMAT):
+                _write_encoded(filename, arr, img)
+            if batch_uuid and not is_live:
+                # Lets wiggler and the gallery find the batch without probing the filesystem
+                captureCatalog.record_frame(batch_uuid, cam_id, filename, img.width, img.height,
+                                            exposure=applied_exposure_lines(cam_id), created=unix_time,
+                                            db_path=DB_PATH)
+                # The pipeline service starts decoding while the other cameras are still sending
+                notify_pipeline({"event": "frame", "name": str(unix_time), "cam_id": cam_id, "path": str(filename)})
             
             if not is_live:
                 global first_image_saved
@@ -299,95 +570,207 @@ def save_image(raw_data, cam_id, batch_uuid=None, as_grayscale=False, is_live=Fa
                         try:
                             IMAGES_DIR.mkdir(parents=True, exist_ok=True)
                             identifier = unix_time if batch_uuid else 'single'
-                            extra_name = f"{identifier}_1.png"
+                            extra_name = f"{identifier}_1{ext}"
                             extra_path = IMAGES_DIR / extra_name
-                            img.save(extra_path, format="PNG")
+                            # Same bytes as the file just written: link it instead of encoding twice
+                            _link_or_copy(filename, extra_path)
+                            # Gallery preview is ready before the user opens the library
+                            thumbCache.schedule([extra_path], cache_dir=str(IMAGES_DIR / "thumbs"))
                         except Exception as e:
                             with print_lock:
                                 print(f"[CAM {cam_id}] Extra first-image save error: {e}")
 
             with print_lock:
                 print(f"[CAM {cam_id}] Saved Image: {filename}")
+            return filename
         else:
              with print_lock:
                 print(f"[CAM {cam_id}] Error: No image data processed.")
     except Exception as e:
         with print_lock:
             print(f"[CAM {cam_id}] Image Save Error: {e}")
+    return None
+
+class ImageEncoder:
+    """
+    Bounded worker pool that decodes and saves frames off the serial threads.
+    submit() hands the raw buffer over and returns at once (blocking only while
+    queue_size frames are already waiting); the Future resolves to the saved path.
+    """
+
+    def __init__(self, workers=ENCODE_WORKERS, queue_size=ENCODE_QUEUE_SIZE):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="encode")
+        self._slots = threading.BoundedSemaphore(queue_size)
+
+    def submit(self, raw_data, cam_id, batch_uuid=None, as_grayscale=False, is_live=False) -> Future:
+        self._slots.acquire()
+        try:
+            fut = self._pool.submit(save_image, raw_data, cam_id, batch_uuid, as_grayscale, is_live)
+        except Exception:
+            self._slots.release()
+            raise
+        fut.add_done_callback(lambda _: self._slots.release())
+        return fut
+
+    def close(self):
+        """Waits for all queued frames to be written."""
+        self._pool.shutdown(wait=True)
+
+def resolve_saved(result):
+    """Turns a camera_operation result (path or encoder Future) into the saved path."""
+    if isinstance(result, Future):
+        return result.result()
+    return result
+
+def read_frame(ser, buf=None, first_byte_timeout=TIMEOUT, stall_timeout=STALL_TIMEOUT):
+    """
+    Receives one frame incrementally into a preallocated buffer.
+
+    Reads READ_CHUNK pieces into a memoryview of `buf` (a fresh bytearray of
+    FRAME_SIZE if None) and gives up early if the camera stops sending for
+    stall_timeout seconds once data has started, instead of waiting out the
+    full port timeout. Returns (buf, stats) where stats holds the byte count,
+    perf_counter_ns stamps of the first and last byte, throughput and whether
+    the transfer stalled.
+    """
+    if buf is None:
+        buf = bytearray(FRAME_SIZE)
+    view = memoryview(buf)
+    size = len(buf)
+    got = 0
+    t_first = t_last = None
+
+    with perfTrace.span("serial_receive", port=getattr(ser, "port", None)) as sp:
+        old_timeout = ser.timeout
+        ser.timeout = READ_POLL
+        try:
+            t_start = time.perf_counter_ns()
+            while got < size:
+                chunk = ser.read(min(READ_CHUNK, size - got))
+                now = time.perf_counter_ns()
+                if chunk:
+                    if t_first is None:
+                        t_first = now
+                    view[got:got + len(chunk)] = chunk
+                    got += len(chunk)
+                    t_last = now
+                elif t_first is None:
+                    if now - t_start > first_byte_timeout * 1e9:
+                        break
+                elif now - t_last > stall_timeout * 1e9:
+                    break
+        finally:
+            ser.timeout = old_timeout
+        sp.set(bytes=got, stalled=got < size)
+
+    duration = (t_last - t_first) / 1e9 if t_first is not None and t_last > t_first else 0.0
+    stats = {
+        "bytes": got,
+        "first_byte_ns": t_first,
+        "last_byte_ns": t_last,
+        "throughput_kbps": (got / 1024.0 / duration) if duration > 0 else None,
+        "stalled": got < size,
+    }
+    return buf, stats
+
+def camera_operation(ser, cam_id, mode, dump_hex=False, batch_uuid=None, as_grayscale=False, is_live=False, exposure_value=None, diff_only=False, encoder=None):
+    """
+    Runs one UPDATE, RESET or CAPTURE operation on an already open serial port.
+    Shared by the one-shot camera_worker and the resident camera daemon.
+    With diff_only, UPDATE sends only registers that changed since the last upload.
+    Returns the saved image path for a successful CAPTURE (a Future of it if an
+    ImageEncoder is given, see resolve_saved), otherwise None.
+    """
+    # --- MODE: UPDATE REGISTERS ---
+    if mode == "UPDATE":
+        # 1./2. Local, thread-safe copy of registers, with exposure applied if set via CLI
+        local_regs = requested_registers(exposure_value)
+
+        # 3. In diff mode, drop registers the camera already holds
+        if diff_only:
+            local_regs = registerMap.minimal_write_set(local_regs, registerMap.load_state(cam_id, DB_PATH))
+            if not local_regs:
+                with print_lock:
+                    print(f"[CAM {cam_id}] Registers already up to date. Nothing to upload.")
+                return None
+
+        with print_lock:
+            print(f"[CAM {cam_id}] Uploading {len(local_regs)} registers...")
+        
+        # 4. Clear buffers
+        ser.reset_input_buffer()
+        
+        # 5. Send the local, calculated map (bulk packets, ACK flow control)
+        upload_registers(ser, cam_id, local_regs)
+        
+        with print_lock:
+            print(f"[CAM {cam_id}] Upload complete. Sending Reset...")
+
+        # 6. Send Reset to apply, then remember what the sensor now holds
+        ser.write(b'R\n')
+        time.sleep(0.1)
+        if not diff_only:
+            # A full upload defines the whole known state of this camera
+            registerMap.clear_state(cam_id, DB_PATH)
+        registerMap.save_state(cam_id, local_regs, DB_PATH)
+        
+        with print_lock:
+            print(f"[CAM {cam_id}] Registers Applied & Camera Reset.")
+
+    # --- MODE: RESET ONLY ---
+    elif mode == "RESET":
+        with print_lock:
+            print(f"[CAM {cam_id}] Sending RESET Command 'R'...")
+        
+        ser.write(b'R\n')
+        time.sleep(0.1)
+        response = ser.read_all().decode('utf-8', errors='ignore')
+        
+        with print_lock:
+            print(f"[CAM {cam_id}] Reset Response: {response.strip()}")
+    
+    # --- MODE: CAPTURE ---
+    else:
+        data = bytearray(FRAME_SIZE)
+        for attempt in range(1 + CAPTURE_RETRIES):
+            # Flush stale bytes (e.g. ACKs) first, then stream the frame in chunks
+            ser.reset_input_buffer()
+            ser.write(b'S\n')
+            data, stats = read_frame(ser, data)
 
-def camera_worker(cam_id, port_name, mode, dump_hex=False, batch_uuid=None, as_grayscale=False, is_live=False, exposure_value=None):
+            with print_lock:
+                if not stats["stalled"]:
+                    rate = stats["throughput_kbps"]
+                    rate_txt = f" ({rate:.0f} KiB/s)" if rate else ""
+                    print(f"\n[CAM {cam_id}] SUCCESS. Frame Received{rate_txt}.")
+                    if dump_hex:
+                        print(f"--- [CAM {cam_id}] HEX DUMP START ---")
+                        print(data.hex().upper())
+                        print(f"--- [CAM {cam_id}] HEX DUMP END ---")
+                else:
+                    retry_txt = " Retrying this camera." if attempt < CAPTURE_RETRIES else ""
+                    print(f"\n[CAM {cam_id}] ERROR: Stalled. Got {stats['bytes']} / {FRAME_SIZE} bytes.{retry_txt}")
+
+            if not stats["stalled"]:
+                if encoder is not None:
+                    # Hand the buffer off; this thread is free for the port again
+                    return encoder.submit(data, cam_id, batch_uuid, as_grayscale, is_live)
+                return save_image(data, cam_id, batch_uuid, as_grayscale, is_live)
+    return None
+
+def camera_worker(cam_id, port_name, mode, dump_hex=False, batch_uuid=None, as_grayscale=False, is_live=False, exposure_value=None, diff_only=False, encoder=None, results=None):
     """
     Thread-safe worker function to handle sequential operations for a single camera.
     Supported modes: UPDATE (registers), RESET (sensor), or CAPTURE (frame data).
+    The operation's result (see camera_operation) is stored in results[cam_id] if given.
     """
     try:
         with serial.Serial(port_name, BAUD_RATE, timeout=TIMEOUT) as ser:
             trigger_event.wait() 
 
-            # --- MODE: UPDATE REGISTERS ---
-            if mode == "UPDATE":
-                # 1. Create local, thread-safe copy of registers
-                local_regs = REGISTRY_UPDATES.copy()
-                
-                # 2. If exposure is set via CLI, calculate and update the local copy
-                if exposure_value is not None:
-                    # This calls the calculation function within the worker thread
-                    local_regs = set_exposure_config(local_regs, exposure_value)
-
-                with print_lock:
-                    print(f"[CAM {cam_id}] Uploading {len(local_regs)} registers...")
-                
-                # 3. Clear buffers
-                ser.reset_input_buffer()
-                
-                # 4. Send 'W' commands from the local, calculated map
-                for reg, val in local_regs.items():
-                    cmd = f"W {reg:04X} {val:02X}\n" 
-                    ser.write(cmd.encode('utf-8'))
-                    time.sleep(0.05)
-                
-                with print_lock:
-                    print(f"[CAM {cam_id}] Upload complete. Sending Reset...")
-
-                # 5. Send Reset to apply
-                ser.write(b'R\n')
-                time.sleep(0.1)
-                
-                with print_lock:
-                    print(f"[CAM {cam_id}] Registers Applied & Camera Reset.")
-
-            # --- MODE: RESET ONLY ---
-            elif mode == "RESET":
-                with print_lock:
-                    print(f"[CAM {cam_id}] Sending RESET Command 'R'...")
-                
-                ser.write(b'R\n')
-                time.sleep(0.1)
-                response = ser.read_all().decode('utf-8', errors='ignore')
-                
-                with print_lock:
-                    print(f"[CAM {cam_id}] Reset Response: {response.strip()}")
-            
-            # --- MODE: CAPTURE ---
-            else:
-                ser.write(b'S\n')
-                time.sleep(0.05)
-                ser.reset_input_buffer()
-                
-                data = ser.read(FRAME_SIZE)
-
-                with print_lock:
-                    if len(data) == FRAME_SIZE:
-                        print(f"\n[CAM {cam_id}] SUCCESS. Frame Received.")
-                        if dump_hex:
-                            print(f"--- [CAM {cam_id}] HEX DUMP START ---")
-                            print(data.hex().upper())
-                            print(f"--- [CAM {cam_id}] HEX DUMP END ---")
-                    else:
-                        print(f"\n[CAM {cam_id}] ERROR: Timed out. Got {len(data)} / {FRAME_SIZE} bytes.")
-
-                if len(data) == FRAME_SIZE:
-                    save_image(data, cam_id, batch_uuid, as_grayscale, is_live)
+            result = camera_operation(ser, cam_id, mode, dump_hex, batch_uuid, as_grayscale, is_live, exposure_value, diff_only, encoder)
+            if results is not None:
+                results[cam_id] = result
 
     except serial.SerialException as e:
         with print_lock:
@@ -396,7 +779,206 @@ def camera_worker(cam_id, port_name, mode, dump_hex=False, batch_uuid=None, as_g
         # Added mandatory finally block to ensure try structure is closed
         pass 
 
-def run_camera_batch(target_cameras, mode, dump_hex, batch_uuid=None, as_grayscale=False, is_live=False, exposure_value=None):
+def stream_worker(cam_id, port_name, writer, target_fps, stop_event, max_frames=0):
+    """
+    Continuous live preview for one camera using the firmware's live handshake:
+    'L' starts streaming, each received frame is acknowledged with 'A' (paced to
+    target_fps) and 'X' stops. Frames are decoded straight into the writer's ring
+    buffer and published with a new sequence number.
+    """
+    # The firmware leaves live mode if no ACK arrives within 1 s
+    period = 1.0 / max(float(target_fps), 1.5) if target_fps else 0.0
+    buffers = make_yuv_buffers(WIDTH, HEIGHT)
+    frames = 0
+    try:
+        with serial.Serial(port_name, BAUD_RATE, timeout=TIMEOUT) as ser:
+            trigger_event.wait()
+            ser.reset_input_buffer()
+            ser.write(b'L\n')
+            last = time.monotonic()
+            data = bytearray(FRAME_SIZE)
+            while True:
+                data, stats = read_frame(ser, data)
+                if stats["stalled"]:
+                    with print_lock:
+                        print(f"[CAM {cam_id}] Stream Error: Got {stats['bytes']} / {FRAME_SIZE} bytes.")
+                    break
+
+                frames += 1
+                if stop_event.is_set() or (max_frames and frames >= max_frames):
+                    ser.write(b'X\n')
+                else:
+                    # Pace the ACK so the camera delivers at most target_fps
+                    wait = period - (time.monotonic() - last)
+                    if wait > 0:
+                        time.sleep(wait)
+                    ser.write(b'A\n')
+                last = time.monotonic()
+
+                # Decode while the STM32 is already capturing the next frame
+                with perfTrace.span("yuv_decode", cam=cam_id):
+                    yuv422_to_rgb_fixed(data, WIDTH, HEIGHT, out=writer.next_slot(cam_id), buffers=buffers)
+                writer.publish(cam_id)
+
+                if stop_event.is_set() or (max_frames and frames >= max_frames):
+                    break
+    except serial.SerialException as e:
+        with print_lock:
+            print(f"[CAM {cam_id}] Port Error ({port_name}): {e}")
+    with print_lock:
+        print(f"[CAM {cam_id}] Stream ended after {frames} frames.")
+
+def run_live_stream(target_cameras, target_fps=10.0, max_frames=0, buffer_path=None):
+    """
+    Streams live frames from all target cameras into a memory-mapped ring buffer
+    (liveBuffer.py) until Ctrl+C or max_frames per camera.
+    """
+    import liveBuffer
+
+    trigger_event.clear()
+    print(f"\n--- PREPARING LIVE STREAM ({target_fps} fps target) ---")
+    for c_id in target_cameras.keys():
+        disable_live_mode(c_id)
+    time.sleep(0.5)
+
+    path = Path(buffer_path) if buffer_path else LIVE_OUTPUT_DIR / "live.frames"
+    writer = liveBuffer.LiveFrameWriter(path, list(target_cameras.keys()), WIDTH, HEIGHT)
+    print(f">>> Publishing frames to {path} <<<")
+
+    stop_event = threading.Event()
+    threads = []
+    for c_id, c_port in target_cameras.items():
+        t = threading.Thread(target=stream_worker, args=(c_id, c_port, writer, target_fps, stop_event, max_frames))
+        threads.append(t)
+        t.start()
+    trigger_event.set()
+
+    try:
+        while any(t.is_alive() for t in threads):
+            for t in threads:
+                t.join(timeout=0.2)
+    except KeyboardInterrupt:
+        stop_event.set()
+        for t in threads:
+            t.join()
+    finally:
+        writer.close()
+    print("--- LIVE STREAM COMPLETE ---\n")
+
+def timed_capture(ser, cam_id, release_barrier, t0_holder):
+    """
+    Pre-armed capture for one camera: waits at the barrier with a flushed port,
+    sends 'S' the moment all cameras are released and records monotonic
+    timestamps (ns) at send, first byte and last byte.
+    Returns (frame bytes, timing dict).
+    """
+    buf = bytearray(FRAME_SIZE)
+    release_barrier.wait()
+    t_send = time.perf_counter_ns()
+    ser.write(b'S\n')
+    t_sent = time.perf_counter_ns()
+
+    data, stats = read_frame(ser, buf)
+
+    t0 = t0_holder[0]
+    first, last = stats["first_byte_ns"], stats["last_byte_ns"]
+    timing = {
+        "cam": cam_id,
+        "bytes": stats["bytes"],
+        "send_ms": (t_send - t0) / 1e6,
+        "sent_ms": (t_sent - t0) / 1e6,
+        "first_byte_ms": (first - t0) / 1e6 if first is not None else None,
+        "last_byte_ms": (last - t0) / 1e6 if last is not None else None,
+        "throughput_kbps": stats["throughput_kbps"],
+    }
+    return (data if not stats["stalled"] else data[:stats["bytes"]]), timing
+
+def _skew(values):
+    """Spread (max - min) of the non-None values, or None."""
+    values = [v for v in values if v is not None]
+    return (max(values) - min(values)) if len(values) > 1 else None
+
+def run_synced_capture(target_cameras, batch_uuid=None, as_grayscale=False, save=True):
+    """
+    Synchronized capture: opens and flushes every port first (pre-arm), releases
+    all 'S' writes through one barrier and reports per-camera timestamps plus the
+    inter-camera skew at send, first byte and last byte. Returns the report dict.
+    """
+    print("\n--- PREPARING SYNCED CAPTURE ---")
+    if save and batch_uuid:
+        begin_batch(batch_uuid)
+    for c_id in target_cameras.keys():
+        disable_live_mode(c_id)
+    time.sleep(0.5)
+
+    # --- STEP 1: PRE-ARM (open + flush) BEFORE ANY THREAD IS RELEASED ---
+    ports = {}
+    for c_id, c_port in target_cameras.items():
+        try:
+            ser = serial.Serial(c_port, BAUD_RATE, timeout=TIMEOUT)
+            ser.reset_input_buffer()
+            ports[c_id] = ser
+        except serial.SerialException as e:
+            print(f"[CAM {c_id}] Port Error ({c_port}): {e}")
+
+    timings = {}
+    frames = {}
+    # The main thread joins the barrier too, so t0 is taken at the release point
+    barrier = threading.Barrier(len(ports) + 1)
+    t0_holder = [0]
+
+    def _worker(c_id, ser):
+        try:
+            frames[c_id], timings[c_id] = timed_capture(ser, c_id, barrier, t0_holder)
+        except serial.SerialException as e:
+            with print_lock:
+                print(f"[CAM {c_id}] Port Error: {e}")
+
+    threads = [threading.Thread(target=_worker, args=(c_id, ser)) for c_id, ser in ports.items()]
+    for t in threads:
+        t.start()
+    try:
+        t0_holder[0] = time.perf_counter_ns()
+        print("!!! TRIGGERING SYNCED CAPTURE NOW !!!")
+        barrier.wait()
+        for t in threads:
+            t.join()
+    finally:
+        for ser in ports.values():
+            ser.close()
+
+    # --- STEP 2: SAVE (after timing, so encoding does not skew the measurement) ---
+    if save:
+        encoder = ImageEncoder()
+        saved = {c_id: None for c_id in target_cameras}
+        for c_id, data in frames.items():
+            if len(data) == FRAME_SIZE:
+                saved[c_id] = encoder.submit(data, c_id, batch_uuid, as_grayscale)
+            else:
+                print(f"[CAM {c_id}] ERROR: Timed out. Got {len(data)} / {FRAME_SIZE} bytes.")
+        encoder.close()
+        if batch_uuid:
+            commit_batch(batch_uuid, {c: resolve_saved(r) for c, r in saved.items()})
+
+    rows = [timings[c] for c in sorted(timings)]
+    report = {
+        "cameras": rows,
+        "send_skew_ms": _skew([r["send_ms"] for r in rows]),
+        "first_byte_skew_ms": _skew([r["first_byte_ms"] for r in rows]),
+        "last_byte_skew_ms": _skew([r["last_byte_ms"] for r in rows]),
+    }
+
+    def _fmt(v):
+        return f"{v:9.3f}" if v is not None else "        -"
+
+    print(f"{'CAM':>4} {'bytes':>7} {'send':>9} {'first':>9} {'last':>9}   (ms after release)")
+    for r in rows:
+        print(f"{r['cam']:>4} {r['bytes']:>7} {_fmt(r['send_ms'])} {_fmt(r['first_byte_ms'])} {_fmt(r['last_byte_ms'])}")
+    print(f"SKEW send={_fmt(report['send_skew_ms'])} first={_fmt(report['first_byte_skew_ms'])} last={_fmt(report['last_byte_skew_ms'])}")
+    print("--- SYNCED CAPTURE COMPLETE ---\n")
+    return report
+
+def run_camera_batch(target_cameras, mode, dump_hex, batch_uuid=None, as_grayscale=False, is_live=False, exposure_value=None, diff_only=False):
     """
     Launches and manages multi-threaded execution across multiple cameras.
     Ensures live mode is disabled in the DB before proceeding.
@@ -413,11 +995,18 @@ def run_camera_batch(target_cameras, mode, dump_hex, batch_uuid=None, as_graysca
     time.sleep(0.5) 
     
     threads = []
+    results = {}
+    # Captures are encoded off the serial threads
+    encoder = ImageEncoder() if mode == "CAPTURE" else None
+    batch = mode == "CAPTURE" and batch_uuid and not is_live
+    if batch:
+        # One id and start time for the whole batch, whichever second each frame lands in
+        print(f">>> BATCH {batch_uuid} STARTED AT {begin_batch(batch_uuid)} <<<")
     
     # --- STEP 2: LAUNCH THREADS ---
     for c_id, c_port in target_cameras.items():
         # Pass the exposure_value down to the worker
-        t = threading.Thread(target=camera_worker, args=(c_id, c_port, mode, dump_hex, batch_uuid, as_grayscale, is_live, exposure_value))
+        t = threading.Thread(target=camera_worker, args=(c_id, c_port, mode, dump_hex, batch_uuid, as_grayscale, is_live, exposure_value, diff_only, encoder, results))
         threads.append(t)
         t.start()
     
@@ -426,11 +1015,52 @@ def run_camera_batch(target_cameras, mode, dump_hex, batch_uuid=None, as_graysca
 
     for t in threads:
         t.join()
+    if encoder is not None:
+        encoder.close()
+    if batch:
+        marker = commit_batch(batch_uuid, {c: resolve_saved(results.get(c)) for c in target_cameras})
+        if marker:
+            print(f">>> BATCH COMMITTED: {marker} <<<")
     
     print(f"--- {mode} BATCH COMPLETE ---\n")
 
+def _forward_to_daemon(args, cam_ids, exposure_val):
+    """
+    Sends the CLI request to a running camera daemon instead of opening the ports here.
+    Returns True if a daemon handled it, False if none is running.
+    """
+    import cameraDaemon
+
+    if args.init_regs or exposure_val is not None:
+        request = {"cmd": "update", "exposure": exposure_val,
+                   "diff": not args.init_regs and not args.full_upload}
+    elif args.live:
+        request = {"cmd": "live"}
+    elif args.camera_id:
+        if args.reset:
+            request = {"cmd": "reset"}
+        else:
+            request = {"cmd": "capture", "reset": False, "dump_hex": True, "grayscale": args.grayscale}
+    elif args.reset:
+        request = {"cmd": "reset"}
+    else:
+        request = {"cmd": "capture", "reset": True, "grayscale": args.grayscale}
+    request["cameras"] = cam_ids
+    if request["cmd"] in ("live", "capture"):
+        request["format"] = args.format
+        request["png_level"] = args.png_level
+
+    reply = cameraDaemon.send_command(request)
+    if reply is None:
+        return False
+    print(f">>> HANDLED BY CAMERA DAEMON: {reply} <<<")
+    if not reply.get("ok", False):
+        sys.exit(1)
+    return True
+
 def main():
     """CLI entry point for controlling STM32 cameras and managing captures."""
+    global ENCODE_FORMAT, PNG_COMPRESS_LEVEL
     #parse console argument
     parser = argparse.ArgumentParser(description="Control STM32 Cameras.")
     parser.add_argument('camera_id', type=int, nargs='?', choices=[1, 2, 3, 4], 
@@ -444,6 +1074,9 @@ def main():
     # --- NEW EXPOSURE ARGUMENT ---
     parser.add_argument('--exposure', type=int, choices=range(1, 11),
                         help="Set manual exposure time in lines (1-10).")
+    parser.add_argument('--full-upload', action='store_true',
+                        help="With --exposure, resend every register instead of only the changed ones "
+                             "(use after a camera power cycle).")
 
     # --- CAPTURE OPTIONS ---
     parser.add_argument('--grayscale', action='store_true', 
@@ -451,7 +1084,34 @@ def main():
     parser.add_argument('--live', action='store_true',
                         help="Capture single COLOR frame without reset and save as live.pmg (overwrites).")
 
+    parser.add_argument('--stream', action='store_true',
+                        help="Continuous COLOR live preview into a memory-mapped ring buffer (images/live/live.frames).")
+    parser.add_argument('--fps', type=float, default=10.0,
+                        help="Target frame rate per camera for --stream (default: 10).")
+    parser.add_argument('--stream-frames', type=int, default=0,
+                        help="Stop --stream after this many frames per camera (default: run until Ctrl+C).")
+
+    parser.add_argument('--format', choices=sorted(ENCODE_FORMATS), default=ENCODE_FORMAT,
+                        help="Saved frame format: png (default), bmp (uncompressed, fastest) or npy (raw array).")
+    parser.add_argument('--png-level', type=int, choices=range(0, 10), default=PNG_COMPRESS_LEVEL,
+                        help="zlib compression level for PNG output (0 = fastest, 9 = smallest).")
+    parser.add_argument('--sync', action='store_true',
+                        help="Full capture with pre-armed ports and per-camera timestamps; prints inter-camera skew.")
+    parser.add_argument('--skew-runs', type=int, default=0,
+                        help="Only measure: run N synced captures without saving and summarize the skew.")
+
+    # --- DAEMON OPTIONS ---
+    parser.add_argument('--daemon', action='store_true',
+                        help="Run as a resident camera daemon holding the serial ports open (see cameraDaemon.py).")
+    parser.add_argument('--no-daemon', action='store_true',
+                        help="Talk to the ports directly even if a camera daemon is running.")
+    perfTrace.add_arguments(parser)
+
     args = parser.parse_args()
+    perfTrace.configure_from_args(args)
+
+    ENCODE_FORMAT = args.format
+    PNG_COMPRESS_LEVEL = args.png_level
 
     # --- TARGET Camera SELECTION ---
     target_cameras = {}
@@ -466,15 +1126,40 @@ def main():
         # User did NOT specify a number -> Select ALL
         target_cameras = CAMERA_MAP
 
-    # --- LOGIC FLOW ---
+    # --- DAEMON MODE / FORWARDING ---
+    if args.daemon:
+        import cameraDaemon
+        sys.exit(cameraDaemon.serve(target_cameras))
 
     exposure_val = args.exposure if args.exposure is not None else None
+
+    direct_only = args.stream or args.sync or args.skew_runs > 0
+    if not args.no_daemon and not direct_only and _forward_to_daemon(args, list(target_cameras), exposure_val):
+        return
+
+    # --- LOGIC FLOW ---
     
     # If -I is called OR if --exposure is called, run the UPDATE mode
     if args.init_regs or exposure_val is not None:
         print(">>> REGISTER UPDATE MODE <<<")
+        for issue in REGISTRY_ISSUES:
+            print(f"[REGISTERS] {issue}")
         # Run in update mode, passing the exposure value if set. The worker will handle the calculation.
-        run_camera_batch(target_cameras, "UPDATE", False, exposure_value=exposure_val)
+        # -I always uploads everything; an exposure change only sends what differs
+        diff_only = not args.init_regs and not args.full_upload
+        run_camera_batch(target_cameras, "UPDATE", False, exposure_value=exposure_val, diff_only=diff_only)
+
+    elif args.skew_runs > 0:
+        print(f">>> SKEW MEASUREMENT: {args.skew_runs} SYNCED CAPTURES <<<")
+        reports = [run_synced_capture(target_cameras, save=False) for _ in range(args.skew_runs)]
+        for key in ("send_skew_ms", "first_byte_skew_ms", "last_byte_skew_ms"):
+            vals = [r[key] for r in reports if r[key] is not None]
+            if vals:
+                print(f"{key}: mean {sum(vals) / len(vals):.3f}  max {max(vals):.3f}  min {min(vals):.3f}")
+
+    elif args.stream:
+        print(">>> STREAM MODE DETECTED: CONTINUOUS LIVE PREVIEW <<<")
+        run_live_stream(target_cameras, args.fps, args.stream_frames)
 
     elif args.live:
         print(">>> LIVE MODE DETECTED: CAPTURING SINGLE FRAME (NO RESET) <<<")
@@ -499,7 +1184,10 @@ def main():
         unique_id = uuid.uuid4().hex[:8]
         print(f">>> BATCH UUID: {unique_id} <<<")
 
-        run_camera_batch(target_cameras, "CAPTURE", False, batch_uuid=unique_id, as_grayscale=args.grayscale)
+        if args.sync:
+            run_synced_capture(target_cameras, batch_uuid=unique_id, as_grayscale=args.grayscale)
+        else:
+            run_camera_batch(target_cameras, "CAPTURE", False, batch_uuid=unique_id, as_grayscale=args.grayscale)
 
 if __name__ == "__main__":
     main()
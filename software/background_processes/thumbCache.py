@@ -0,0 +1,193 @@
+"""
+Script Name: thumbCache.py
+Description:
+    Preview cache for the gallery. Small JPEG previews of captures, GIFs and
+    other animations are stored in images/thumbs/, keyed by source path +
+    mtime + size, so an edited or re-created file gets a fresh preview and a
+    stale one is never served. The cache is bounded by CACHE_MAX_BYTES with
+    least-recently-used eviction (a hit touches the preview's mtime). Previews
+    are generated in the background right after capture (streamUSB) and GIF
+    creation (wiggler), so scrolling the gallery only reads small files.
+    The library page resolves its previews through the CLI below, one call per
+    page of items (UI services/thumb_service.dart); missing ones are made then.
+
+Usage:
+  python3 scripts/thumbCache.py IMAGE_OR_GIF... [--size 320]   (prints one preview path per input)
+  python3 scripts/thumbCache.py --prune [--max-mb 64]
+"""
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
+
+import argparse
+import hashlib
+import math
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+THUMBS_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'images', 'thumbs'))
+# Longer side of a preview in pixels
+THUMB_SIZE = 320
+THUMB_QUALITY = 80
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+_EXIF_ORIENTATION = 0x0112
+# EXIF orientation -> transpose that turns the stored pixels upright (as ImageOps.exif_transpose)
+_ORIENTATION_TRANSPOSE = {
+    2: Image.FLIP_LEFT_RIGHT,
+    3: Image.ROTATE_180,
+    4: Image.FLIP_TOP_BOTTOM,
+    5: Image.TRANSPOSE,
+    6: Image.ROTATE_270,
+    7: Image.TRANSVERSE,
+    8: Image.ROTATE_90,
+}
+
+_evict_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def cache_key(path: str, size: int = THUMB_SIZE) -> str:
+    """Key of the preview of path at size; changes whenever the file's mtime or length does."""
+    st = os.stat(path)
+    ident = f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}|{size}"
+    return hashlib.sha1(ident.encode("utf-8")).hexdigest()
+
+
+def _render(path: str, size: int) -> Image.Image:
+    """Decodes just enough of path for a size x size preview."""
+    if path.endswith(".npy"):
+        # Strided read of the memory-mapped frame instead of loading it whole
+        arr = np.load(path, mmap_mode="r")
+        step = max(1, math.ceil(max(arr.shape[:2]) / size))
+        img = Image.fromarray(np.ascontiguousarray(arr[::step, ::step]))
+    else:
+        img = Image.open(path)
+        try:
+            orientation = int(img.getexif().get(_EXIF_ORIENTATION, 1))
+        except Exception:
+            orientation = 1
+        if getattr(img, "is_animated", False):
+            img.seek(0)
+        if img.mode in ("P", "PA"):
+            # Palette frames (GIF) would otherwise be resized with nearest neighbour
+            img = img.convert("RGB")
+        # thumbnail() drafts JPEGs (DCT scaling), so only the small result is rotated
+        img.thumbnail((size, size))
+        if orientation in _ORIENTATION_TRANSPOSE:
+            img = img.transpose(_ORIENTATION_TRANSPOSE[orientation])
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    img.thumbnail((size, size))
+    return img
+
+
+def thumbnail_path(path: str, size: int = THUMB_SIZE, cache_dir: Optional[str] = None) -> Optional[str]:
+    """
+    Path of the cached preview of path, generating it on a miss.
+
+    Returns:
+        str: Preview path, or None if path does not exist or cannot be decoded.
+    """
+    cache_dir = cache_dir or THUMBS_DIR
+    try:
+        key = cache_key(path, size)
+    except OSError:
+        return None
+    dest = os.path.join(cache_dir, key + ".jpg")
+    if os.path.exists(dest):
+        try:
+            # Mark as recently used for eviction
+            os.utime(dest)
+        except OSError:
+            pass
+        return dest
+
+    try:
+        img = _render(path, size)
+    except Exception as e:
+        print(f"thumbCache: cannot preview {path}: {e}", file=sys.stderr)
+        return None
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{dest}.{threading.get_ident()}.tmp"
+    img.save(tmp, format="JPEG", quality=THUMB_QUALITY)
+    # Readers never see a half-written preview
+    os.replace(tmp, dest)
+    evict(cache_dir)
+    return dest
+
+
+def evict(cache_dir: Optional[str] = None, max_bytes: int = None) -> int:
+    """Deletes least-recently-used previews until the cache fits max_bytes; returns files removed."""
+    cache_dir = cache_dir or THUMBS_DIR
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    with _evict_lock:
+        entries = []
+        try:
+            with os.scandir(cache_dir) as it:
+                for e in it:
+                    if e.name.endswith(".jpg"):
+                        st = e.stat()
+                        entries.append((st.st_mtime_ns, st.st_size, e.path))
+        except FileNotFoundError:
+            return 0
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, p in sorted(entries):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(p)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+
+def schedule(paths, size: int = THUMB_SIZE, cache_dir: Optional[str] = None) -> list:
+    """
+    Generates previews of paths on a background thread and returns the futures.
+    A CLI process waits for pending previews at exit (concurrent.futures joins its workers).
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumbs")
+    return [_executor.submit(thumbnail_path, str(p), size, cache_dir) for p in paths if p]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Print (and create if needed) gallery preview paths.")
+    parser.add_argument("paths", nargs="*", help="Images, GIFs or animations to preview")
+    parser.add_argument("--size", type=int, default=THUMB_SIZE, help="Longer side of the preview in pixels")
+    parser.add_argument("--cache-dir", type=str, default=None, help="Preview directory (default: images/thumbs)")
+    parser.add_argument("--prune", action="store_true", help="Evict least-recently-used previews down to --max-mb")
+    parser.add_argument("--max-mb", type=float, default=CACHE_MAX_BYTES / (1024 * 1024))
+    args = parser.parse_args(argv)
+
+    ok = True
+    for p in args.paths:
+        if not os.path.exists(p):
+            # Same fallback as the gallery: a missing GIF previews its first frame
+            import wiggler
+            p = wiggler._resolve_gif_or_first_jpg(p) or p
+        out = thumbnail_path(p, args.size, args.cache_dir)
+        print(out or "")
+        ok = ok and out is not None
+    if args.prune:
+        removed = evict(args.cache_dir, int(args.max_mb * 1024 * 1024))
+        print(f"evicted {removed} previews", file=sys.stderr)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
@@ -0,0 +1,141 @@
+"""
+Script Name: warpAlign.py
+Description:
+    Resampling-based frame alignment for the wiggler pipeline. Instead of
+    rounding per-frame crops and then shifting windows to equalize sizes, one
+    affine transform (uniform scale + translation) is computed per frame from
+    the focus points, and every frame is resampled once into a preallocated
+    (N, H, W, 3) buffer of identical size. Integer translations are plain copies;
+    fractional ones (sub-pixel focus points, scaling) go through Pillow's
+    bilinear Image.transform.
+
+Geometry (pixel index space, after remapCoordinates):
+    every focus point f_i is moved onto their mean c; the output window is the
+    part of that aligned space covered by all frames, trimmed to the original
+    aspect ratio (the trim split by c's position, like crop_image_sides).
+"""
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
+
+import math
+from dataclasses import dataclass
+
+import numpy as np
+from PIL import Image
+
+try:
+    _BILINEAR = Image.Resampling.BILINEAR
+    _AFFINE = Image.Transform.AFFINE
+except AttributeError:
+    _BILINEAR = Image.BILINEAR  # older Pillow
+    _AFFINE = Image.AFFINE
+
+# Translations closer than this to an integer are treated as integer (plain copy)
+_INTEGER_EPS = 1e-6
+
+
+@dataclass
+class WarpPlan:
+    """Output size and, per frame, source = scale * (output + 0.5) - 0.5 + (tx, ty); None = missing frame."""
+    width: int
+    height: int
+    scale: float
+    offsets: list
+
+
+def plan_alignment(focus_points, size, scale: float = 1.0) -> WarpPlan:
+    """
+    Computes the common output window for frames aligned on their focus points.
+
+    Args:
+        focus_points (list): (x, y) per frame in pixel coordinates (None for a missing frame); may be fractional.
+        size (tuple): (W, H) of the source frames.
+        scale (float): Source pixels per output pixel (> 1 shrinks the output).
+
+    Returns:
+        WarpPlan
+    """
+    W, H = size
+    pts = [p for p in focus_points if p is not None]
+    if not pts:
+        raise ValueError("plan_alignment needs at least one focus point")
+    fx = [float(p[0]) for p in pts]
+    fy = [float(p[1]) for p in pts]
+    cx, cy = sum(fx) / len(fx), sum(fy) / len(fy)
+
+    # Window shared by all frames: each frame can move the focus at most to its own border
+    win_w = W - (max(fx) - min(fx))
+    win_h = H - (max(fy) - min(fy))
+    if win_w < 1 or win_h < 1:
+        raise ValueError("focus points are too far apart to leave a common window")
+    left, top = 0.0, 0.0
+
+    # Back to the source aspect ratio, trimming the excess on the side away from the focus
+    aspect = W / H
+    if win_w / win_h > aspect:
+        excess = win_w - win_h * aspect
+        left = excess * (cx / W)
+        win_w -= excess
+    else:
+        excess = win_h - win_w / aspect
+        top = excess * (cy / H)
+        win_h -= excess
+    if scale == 1.0:
+        # Whole-pixel trims keep integer focus points on integer translations
+        left, top = float(round(left)), float(round(top))
+
+    out_w = max(1, int(math.floor(win_w / scale + _INTEGER_EPS)))
+    out_h = max(1, min(int(math.floor(win_h / scale + _INTEGER_EPS)), int(round(out_w / aspect))))
+
+    offsets = []
+    for p in focus_points:
+        if p is None:
+            offsets.append(None)
+            continue
+        # Window origin in this frame: shift so this frame's focus lands on the shared position
+        offsets.append((float(p[0]) - min(fx) + left, float(p[1]) - min(fy) + top))
+    return WarpPlan(out_w, out_h, float(scale), offsets)
+
+
+def make_output_buffer(plan: WarpPlan, count: int, channels: int = 3) -> np.ndarray:
+    """Preallocated (count, H, W, channels) uint8 buffer for warp_frames."""
+    return np.empty((count, plan.height, plan.width, channels), dtype=np.uint8)
+
+
+def _is_integer(v: float) -> bool:
+    return abs(v - round(v)) < _INTEGER_EPS
+
+
+def warp_frames(frames, plan: WarpPlan, out: np.ndarray = None) -> list:
+    """
+    Resamples every frame into its slot of out (allocated if None).
+
+    Returns:
+        list: One (H, W, C) view of out per frame, None for missing frames.
+    """
+    if out is None:
+        channels = next(f.shape[2] if f.ndim == 3 else 1 for f in frames if f is not None)
+        out = make_output_buffer(plan, len(frames), channels)
+    views = []
+    for i, (frame, off) in enumerate(zip(frames, plan.offsets)):
+        if frame is None or off is None:
+            views.append(None)
+            continue
+        dst = out[i]
+        tx, ty = off
+        if plan.scale == 1.0 and _is_integer(tx) and _is_integer(ty):
+            x0, y0 = int(round(tx)), int(round(ty))
+            src = frame[y0:y0 + plan.height, x0:x0 + plan.width]
+            if src.shape[:2] == dst.shape[:2]:
+                np.copyto(dst, src.reshape(dst.shape))
+                views.append(dst)
+                continue
+        # Pillow samples source index scale * (u + 0.5) + c - 0.5, i.e. c = (tx, ty)
+        img = Image.fromarray(frame).transform(
+            (plan.width, plan.height), _AFFINE, (plan.scale, 0, tx, 0, plan.scale, ty), resample=_BILINEAR
+        )
+        np.copyto(dst, np.asarray(img).reshape(dst.shape))
+        views.append(dst)
+    return views
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
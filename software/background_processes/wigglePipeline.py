@@ -0,0 +1,268 @@
+"""
+Script Name: wigglePipeline.py
+Description:
+    Event-driven capture-to-wiggle service. Instead of the UI running
+    streamUSB.py and then wiggler.py and waiting on each, this resident process
+    reacts to capture events: every frame is decoded as soon as it is saved
+    (while the other cameras are still sending), and the wiggle is aligned and
+    encoded the moment the batch is committed. Events come from a local
+    datagram socket that streamUSB notifies, and/or from inotify on
+    images/raws/ (frames and the {name}.done commit markers), so captures made
+    by other producers are picked up too.
+
+Events (one JSON object per datagram):
+    {"event": "frame", "name": "1718000000", "cam_id": 2, "path": ".../1718000000_2.png"}
+    {"event": "batch", "name": "1718000000", "ok": true, "started": 1718000000.42, "frames": {"1": "...", ...}}
+
+Usage:
+  python3 scripts/wigglePipeline.py [--source both|socket|inotify] [--focus X Y] [--max-size 800]
+"""
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
+
+import argparse
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import socket
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import wiggler
+
+# Same default as streamUSB.PIPELINE_SOCKET (not imported: that would pull in pyserial)
+PIPELINE_SOCKET = os.environ.get("WIGGLE_PIPELINE_SOCKET", "/tmp/wiggle_pipeline.sock")
+BATCH_MARKER_EXT = ".done"
+DEFAULT_SPEED = 150
+# Decode threads; one frame per camera can be in flight
+DECODE_WORKERS = 4
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class Pipeline:
+    """Per-capture frame stores fed by events; builds each wiggle once its batch is complete."""
+
+    def __init__(self, focus=None, speed=DEFAULT_SPEED, quantize_mode="dither", output_format="gif",
+                 max_size=None, align_mode="warp"):
+        self.focus = focus
+        self.speed = speed
+        self.quantize_mode = quantize_mode
+        self.output_format = output_format
+        self.max_size = max_size
+        self.align_mode = align_mode
+        self._stores = {}
+        self._started = {}
+        self._built = set()
+        self._queued = set()
+        self._lock = threading.Lock()
+        self._decode = ThreadPoolExecutor(max_workers=DECODE_WORKERS, thread_name_prefix="decode")
+        # One build at a time keeps the decode threads free for the next capture
+        self._build = ThreadPoolExecutor(max_workers=1, thread_name_prefix="build")
+
+    def _store(self, name):
+        with self._lock:
+            if name in self._built:
+                return None
+            store = self._stores.get(name)
+            if store is None:
+                store = wiggler._FrameStore(name, self.max_size)
+                self._stores[name] = store
+            return store
+
+    def on_frame(self, name: str, cam_id: int, path: str):
+        """A frame landed: start decoding it right away."""
+        if not 1 <= cam_id <= 4:
+            return
+        store = self._store(name)
+        if store is None:
+            return
+        with self._lock:
+            # Socket and inotify usually both report the same frame
+            if (name, cam_id, path) in self._queued:
+                return
+            self._queued.add((name, cam_id, path))
+        store.set_path(cam_id, path)
+        self._decode.submit(store.get, cam_id)
+
+    def on_batch(self, name: str, frames: dict = None, started=None):
+        """The batch is committed: align and encode it (once, even if several sources report it)."""
+        store = self._store(name)
+        if store is None:
+            return
+        for cam_id, path in (frames or {}).items():
+            if path and store.path(int(cam_id)) != path:
+                self.on_frame(name, int(cam_id), path)
+        with self._lock:
+            if name in self._built:
+                return
+            self._built.add(name)
+            self._started[name] = started
+        self._build.submit(self._run, name)
+
+    def _run(self, name):
+        with self._lock:
+            store = self._stores.pop(name)
+            started = self._started.pop(name, None)
+            self._queued = {q for q in self._queued if q[0] != name}
+        start = time.time()
+        focus = [self.focus] if self.focus else []
+        try:
+            wiggler.fullFunction(name, *(focus + [None] * 4)[:4], self.speed,
+                                 quantize_mode=self.quantize_mode, output_format=self.output_format,
+                                 auto_align=True, align_mode=self.align_mode, max_size=self.max_size,
+                                 frame_store=store)
+            since_shutter = f", {time.time() - started:.2f} s after the shutter" if started else ""
+            print(f"[{name}] ready in {time.time() - start:.2f} s{since_shutter}", flush=True)
+        except Exception as e:
+            print(f"[{name}] FAILED: {e}", file=sys.stderr, flush=True)
+
+    def handle_event(self, event: dict):
+        kind = event.get("event")
+        if kind == "frame":
+            self.on_frame(str(event["name"]), int(event["cam_id"]), str(event["path"]))
+        elif kind == "batch":
+            self.on_batch(str(event["name"]), event.get("frames"), event.get("started"))
+
+    def handle_file(self, raws_dir: str, filename: str):
+        """Maps a new file in raws/ to a frame or batch event."""
+        if filename.endswith(BATCH_MARKER_EXT):
+            try:
+                with open(os.path.join(raws_dir, filename), "r", encoding="utf-8") as f:
+                    marker = json.load(f)
+            except (OSError, ValueError):
+                marker = {}
+            self.on_batch(filename[:-len(BATCH_MARKER_EXT)], marker.get("frames"), marker.get("started"))
+            return
+        stem, ext = os.path.splitext(filename)
+        base, _, idx = stem.rpartition("_")
+        if ext.lower() in wiggler._COMMON_EXTS and base and idx in ("1", "2", "3", "4"):
+            self.on_frame(base, int(idx), os.path.join(raws_dir, filename))
+
+    def close(self):
+        self._build.shutdown(wait=True)
+        self._decode.shutdown(wait=True)
+
+
+def serve_socket(pipeline: Pipeline, stop: threading.Event, socket_path: str = PIPELINE_SOCKET):
+    """Receives streamUSB's event datagrams until stop is set."""
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    sock.bind(socket_path)
+    sock.settimeout(0.5)
+    print(f">>> PIPELINE LISTENING ON {socket_path} <<<", flush=True)
+    try:
+        while not stop.is_set():
+            try:
+                data = sock.recv(65536)
+            except socket.timeout:
+                continue
+            try:
+                pipeline.handle_event(json.loads(data.decode("utf-8")))
+            except (ValueError, KeyError, TypeError) as e:
+                print(f"ignored malformed event: {e}", file=sys.stderr)
+    finally:
+        sock.close()
+        try:
+            os.unlink(socket_path)
+        except OSError:
+            pass
+
+
+def _inotify():
+    """libc's inotify functions, or None where they do not exist (non-Linux)."""
+    libc_name = ctypes.util.find_library("c")
+    try:
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        return libc if hasattr(libc, "inotify_init1") else None
+    except OSError:
+        return None
+
+
+def serve_inotify(pipeline: Pipeline, stop: threading.Event, raws_dir: str):
+    """Watches raws_dir for finished frames (close after write) and renamed-in commit markers."""
+    libc = _inotify()
+    if libc is None:
+        print("inotify is not available here; use --source socket", file=sys.stderr)
+        return
+    fd = libc.inotify_init1(os.O_CLOEXEC)
+    if fd < 0:
+        raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+    try:
+        if libc.inotify_add_watch(fd, os.fsencode(raws_dir), _IN_CLOSE_WRITE | _IN_MOVED_TO) < 0:
+            raise OSError(ctypes.get_errno(), f"cannot watch {raws_dir}")
+        print(f">>> PIPELINE WATCHING {raws_dir} <<<", flush=True)
+        while not stop.is_set():
+            ready, _, _ = select.select([fd], [], [], 0.5)
+            if not ready:
+                continue
+            buf = os.read(fd, 65536)
+            offset = 0
+            while offset < len(buf):
+                _, _, _, length = _INOTIFY_EVENT.unpack_from(buf, offset)
+                offset += _INOTIFY_EVENT.size
+                name = buf[offset:offset + length].rstrip(b"\0").decode("utf-8", errors="replace")
+                offset += length
+                if name:
+                    pipeline.handle_file(raws_dir, name)
+    finally:
+        os.close(fd)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build wiggles as soon as captures complete.")
+    parser.add_argument("--source", choices=("both", "socket", "inotify"), default="both",
+                        help="Event source: streamUSB notifications, inotify on images/raws/, or both (default)")
+    parser.add_argument("--socket", type=str, default=PIPELINE_SOCKET, help="Datagram socket path")
+    parser.add_argument("--focus", type=int, nargs=2, metavar=("X", "Y"),
+                        help="Focus point in frame 1, matched across frames (default: auto-picked)")
+    parser.add_argument("--speed", type=int, default=DEFAULT_SPEED, help="Frame time in ms")
+    parser.add_argument("--images-dir", type=str, default=None, help="Path to images directory")
+    parser.add_argument("--quantize", choices=wiggler.gifPalette.QUANTIZE_MODES, default="dither")
+    parser.add_argument("--format", choices=sorted(wiggler.animEncoders.ENCODERS), default="gif")
+    parser.add_argument("--align", choices=("warp", "crop"), default="warp")
+    parser.add_argument("--max-size", type=int, default=None, metavar="PX",
+                        help="Downscale frames so the longer side is at most PX")
+    args = parser.parse_args(argv)
+
+    if args.images_dir:
+        wiggler.IMAGES_DIR = os.path.abspath(args.images_dir)
+        wiggler.PROCESSING_DIR = os.path.join(wiggler.IMAGES_DIR, 'processing')
+        wiggler.RAWS_DIR = os.path.join(wiggler.IMAGES_DIR, 'raws')
+        wiggler._ensure_dirs()
+
+    pipeline = Pipeline(tuple(args.focus) if args.focus else None, args.speed, args.quantize, args.format,
+                        args.max_size, args.align)
+    stop = threading.Event()
+    threads = []
+    if args.source in ("both", "socket"):
+        threads.append(threading.Thread(target=serve_socket, args=(pipeline, stop, args.socket), daemon=True))
+    if args.source in ("both", "inotify"):
+        threads.append(threading.Thread(target=serve_inotify, args=(pipeline, stop, wiggler.RAWS_DIR), daemon=True))
+    for t in threads:
+        t.start()
+    try:
+        while any(t.is_alive() for t in threads):
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        for t in threads:
+            t.join(2)
+        pipeline.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
@@ -8,15 +8,11 @@ Description:
 
 #all code written by me with minimal AI assistance, comments added using AI and verified by me
 
-import time
-from tracemalloc import start
-import matplotlib.pyplot as plt
-import matplotlib.image as mpimg
 import argparse
 from pathlib import Path
 import os
 import sys
-from PIL import Image, ImageOps
+from PIL import Image
 import numpy as np
 import shutil
 import traceback
@@ -25,6 +21,14 @@ from concurrent.futures import ThreadPoolExecutor
 import faulthandler
 import threading
 
+import animEncoders
+import autoAlign
+import captureCatalog
+import gifPalette
+import perfTrace
+import thumbCache
+import warpAlign
+
 IMAGES_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'images'))
 PROCESSING_DIR = os.path.join(IMAGES_DIR, 'processing')
 RAWS_DIR = os.path.join(IMAGES_DIR, 'raws')
@@ -36,7 +40,17 @@ def _ensure_dirs():
 
 _ensure_dirs()
 
-_COMMON_EXTS = (".jpg", ".jpeg", ".png")
+# .bmp/.npy are written by streamUSB.py --format bmp|npy
+_COMMON_EXTS = (".jpg", ".jpeg", ".png", ".bmp", ".npy")
+
+# Longer side of the image shown by pick_point
+PICK_PREVIEW_SIZE = 1600
+
+# Downscaling filter for --max-size (Pillow widens the kernel when shrinking, so this antialiases)
+try:
+    _RESIZE_FILTER = Image.Resampling.BILINEAR
+except AttributeError:
+    _RESIZE_FILTER = Image.BILINEAR  # older Pillow
 
 def _install_error_hooks():
     """Sets up robust error logging to stderr for both main and background threads."""
@@ -82,16 +96,196 @@ def _resolve_existing(base_path_no_ext: str) -> Optional[str]:
         if os.path.exists(p):
             return p
     return None
-def _load_image_corrected(path: str):
+
+
+_EXIF_ORIENTATION = 0x0112
+
+# EXIF orientation -> NumPy view turning the stored pixels upright; same result
+# as ImageOps.exif_transpose, but strides only, no pixel copy
+_ORIENTATION_VIEWS = {
+    2: lambda a: a[:, ::-1],                     # mirror horizontal
+    3: lambda a: a[::-1, ::-1],                  # rotate 180
+    4: lambda a: a[::-1],                        # mirror vertical
+    5: lambda a: a.swapaxes(0, 1),               # transpose
+    6: lambda a: np.rot90(a, -1),                # rotate 90 CW
+    7: lambda a: a[::-1, ::-1].swapaxes(0, 1),   # transverse
+    8: lambda a: np.rot90(a),                    # rotate 90 CCW
+}
+
+
+def _exif_orientation(img: Image.Image) -> int:
+    try:
+        return int(img.getexif().get(_EXIF_ORIENTATION, 1))
+    except Exception:
+        return 1
+
+
+def _scale_box(box, sx: float, sy: float) -> tuple:
+    left, top, right, bottom = box
+    return (int(round(left * sx)), int(round(top * sy)), int(round(right * sx)), int(round(bottom * sy)))
+
+
+def _load_image_corrected(path: str, size: Optional[tuple] = None, box: Optional[tuple] = None):
     """Loads an image and applies EXIF orientation to ensure canonical pixel data."""
-    """Load an image with EXIF orientation applied, return as NumPy array."""
+    """Load an image with EXIF orientation applied, return as NumPy array.
+
+    size (W, H), if given, is the wanted (oriented) size of the whole frame:
+    JPEGs are DCT-scaled during decode with Image.draft, then resized to
+    exactly size. box (left, top, right, bottom), in full-resolution oriented
+    pixels, returns only that region (scaled with size); .npy frames then read
+    just those rows from disk. The result may be a read-only, non-contiguous view.
+    """
+    if path.endswith(".npy"):
+        # Raw RGB array saved by streamUSB, already in canonical orientation
+        arr = np.load(path, mmap_mode="r" if box is not None else None)
+        if box is not None and size is None:
+            left, top, right, bottom = box
+            return np.array(arr[top:bottom, left:right])
+        full = (arr.shape[1], arr.shape[0])
+        if size is not None and full != tuple(size):
+            arr = np.asarray(Image.fromarray(np.ascontiguousarray(arr)).resize(tuple(size), _RESIZE_FILTER))
+            if box is not None:
+                box = _scale_box(box, size[0] / full[0], size[1] / full[1])
+        if box is None:
+            return arr
+        return np.array(arr[box[1]:box[3], box[0]:box[2]])
+
     img = Image.open(path)
+    orientation = _exif_orientation(img)
+    transposed = orientation in (5, 6, 7, 8)
+    # Work in the stored (unrotated) frame until the final view
+    full = img.size[::-1] if transposed else img.size
+    stored_size = None
+    if size is not None and tuple(size) != tuple(full):
+        stored_size = tuple(size)[::-1] if transposed else tuple(size)
+        if img.format == "JPEG":
+            # DCT scaling by 1/2, 1/4 or 1/8, never below the requested size
+            img.draft("RGB", stored_size)
+    if stored_size is not None and img.size != stored_size:
+        img = img.resize(stored_size, _RESIZE_FILTER)
+    arr = np.asarray(img)
+    view = _ORIENTATION_VIEWS.get(orientation)
+    if view is not None:
+        arr = view(arr)
+    if box is not None:
+        if stored_size is not None:
+            box = _scale_box(box, size[0] / full[0], size[1] / full[1])
+        arr = arr[box[1]:box[3], box[0]:box[2]]
+    return arr
+
+
+def _fit_size(size: tuple, max_size: Optional[int]) -> tuple:
+    """(H, W) scaled down (never up) so the longer side is at most max_size, aspect kept."""
+    H, W = size
+    if not max_size or max(H, W) <= max_size:
+        return (H, W)
+    f = max_size / max(H, W)
+    return (max(1, int(round(H * f))), max(1, int(round(W * f))))
+
+
+def _image_size_corrected(path: str) -> Optional[tuple]:
+    """Reads (H, W) from the image header, honouring EXIF orientation, without decoding pixels."""
+    if path.endswith(".npy"):
+        try:
+            return tuple(np.load(path, mmap_mode="r").shape[:2])
+        except Exception:
+            return None
     try:
-        # Apply EXIF orientation so width/height and pixel data are canonical
-        img = ImageOps.exif_transpose(img)
+        with Image.open(path) as img:
+            W, H = img.size
+            orientation = _exif_orientation(img)
     except Exception:
-        pass
-    return np.array(img)
+        return None
+    # Orientations 5-8 transpose the image, so width and height swap
+    if orientation in (5, 6, 7, 8):
+        W, H = H, W
+    return (H, W)
+
+
+def _catalog_frames(filename: str) -> dict:
+    """
+    {cam_id: {"path", "size": (H, W) or None}} of the catalogued frames of a capture
+    that live in the current RAWS_DIR and still exist (the gallery may delete files).
+    """
+    entry = captureCatalog.lookup(filename)
+    if not entry:
+        return {}
+    frames = {}
+    for cam_id, f in entry["frames"].items():
+        if os.path.realpath(os.path.dirname(f["path"])) != os.path.realpath(RAWS_DIR) or not os.path.exists(f["path"]):
+            continue
+        size = None
+        if f["width"] and f["height"]:
+            # Stored size; orientations 5-8 swap width and height
+            size = (f["width"], f["height"]) if f["orientation"] in (5, 6, 7, 8) else (f["height"], f["width"])
+        frames[cam_id] = {"path": f["path"], "size": size}
+    return frames
+
+
+class _FrameStore:
+    """
+    Per-run cache of the four RAW frames of a capture.
+    Each {filename}_{i} is decoded (EXIF-corrected) at most once; sizes come from headers.
+    With max_size, frames are downscaled during/right after decode (see _fit_size).
+    """
+
+    def __init__(self, filename: str, max_size: Optional[int] = None):
+        self.filename = filename
+        self.max_size = max_size
+        # Catalogued frames need no extension probing and no header read for their size
+        catalogued = _catalog_frames(filename)
+        self.paths = [
+            catalogued[i]["path"] if i in catalogued else _resolve_existing(os.path.join(RAWS_DIR, f"{filename}_{i}"))
+            for i in range(1, 5)
+        ]
+        self._sizes = {i: f["size"] for i, f in catalogued.items() if f["size"]}
+        self._arrays = [None] * 4
+        self._locks = [threading.Lock() for _ in range(4)]
+
+    def path(self, idx: int) -> Optional[str]:
+        """Resolved RAW path for frame idx (1-based), or None if missing."""
+        return self.paths[idx - 1]
+
+    def set_path(self, idx: int, path: str):
+        """Registers frame idx once it lands on disk (for stores created before the capture finished)."""
+        with self._locks[idx - 1]:
+            if self.paths[idx - 1] != path:
+                self.paths[idx - 1] = path
+                self._arrays[idx - 1] = None
+
+    def size(self, idx: int) -> Optional[tuple]:
+        """Full-resolution (H, W) of frame idx after EXIF correction, read from the header only."""
+        p = self.path(idx)
+        if not p:
+            return None
+        arr = self._arrays[idx - 1]
+        if arr is not None and not self.max_size:
+            return (arr.shape[0], arr.shape[1])
+        if idx in self._sizes:
+            return self._sizes[idx]
+        return _image_size_corrected(p)
+
+    def decoded_size(self, idx: int) -> Optional[tuple]:
+        """(H, W) that get(idx) returns, i.e. size(idx) fitted to max_size."""
+        size = self.size(idx)
+        return _fit_size(size, self.max_size) if size is not None else None
+
+    def get(self, idx: int) -> Optional[np.ndarray]:
+        """Decoded, EXIF-corrected pixels of frame idx; decodes on first access only."""
+        p = self.path(idx)
+        if not p:
+            return None
+        with self._locks[idx - 1]:
+            if self._arrays[idx - 1] is None:
+                target = None
+                if self.max_size:
+                    full = self.size(idx)
+                    fitted = _fit_size(full, self.max_size) if full else None
+                    if fitted and fitted != full:
+                        target = (fitted[1], fitted[0])
+                with perfTrace.span("decode", frame=idx, size=target):
+                    self._arrays[idx - 1] = _load_image_corrected(p, target)
+            return self._arrays[idx - 1]
 
 
 def _resolve_gif_or_first_jpg(path: str) -> Optional[str]:
@@ -118,6 +312,12 @@ def _resolve_gif_or_first_jpg(path: str) -> Optional[str]:
         base_no_ext = os.path.join(dir_path, stem + "_1")
         return _resolve_existing(base_no_ext)
 
+    if ext in (".gif", ""):
+        # 0) Catalogued captures map straight to their first frame
+        catalogued = _catalog_frames(stem)
+        if catalogued and not (ext == "" and os.path.exists(path + ".gif")):
+            return catalogued[min(catalogued)]["path"]
+
     if ext == ".gif":
         # 1) Try alongside the provided path
         if base_dir:
@@ -159,12 +359,10 @@ def _resolve_gif_or_first_jpg(path: str) -> Optional[str]:
 def _raw_aspect(filename: str) -> Optional[float]:
     """Computes the native aspect ratio (H/W) from the first raw frame of a capture."""
     """Compute H/W from the first existing RAW (index 1)."""
-    base_no_ext = os.path.join(RAWS_DIR, f"{filename}_1")
-    p = _resolve_existing(base_no_ext)
-    if not p:
+    size = _FrameStore(filename).size(1)
+    if size is None:
         return None
-    img = _load_image_corrected(p)
-    H, W = img.shape[0], img.shape[1]
+    H, W = size
     if W == 0:
         return None
     return H / W
@@ -213,12 +411,24 @@ def pick_point(image_path: str):
     """Launches a Matplotlib window for manual selection of a focus point on an image."""
     # Allow callers to pass a .gif reference; map to a matching _1.jpg if needed
     resolved = _resolve_gif_or_first_jpg(image_path) or image_path
-    img = _load_image_corrected(resolved)
+    full = _image_size_corrected(resolved)
+    if full is not None:
+        # A screen-sized (draft-decoded) preview is plenty to click on
+        H, W = full
+        preview = _fit_size(full, PICK_PREVIEW_SIZE)
+        img = _load_image_corrected(resolved, (preview[1], preview[0]))
+    else:
+        img = _load_image_corrected(resolved)
+        H, W = img.shape[:2]
+
+    # Imported here so the headless GIF path never pays for matplotlib
+    import matplotlib.pyplot as plt
 
     fig, ax = plt.subplots()
     fig.canvas.manager.toolbar_visible = False  # hide toolbar (new Matplotlib versions)
 
-    ax.imshow(img)
+    # extent keeps click coordinates in full-resolution pixels
+    ax.imshow(img, extent=(-0.5, W - 0.5, H - 0.5, -0.5))
     ax.axis("off")  # no ticks or border
 
     clicked = {"xy": None}
@@ -232,14 +442,16 @@ def pick_point(image_path: str):
     plt.show()
     return clicked["xy"]
 
-def crop_image_sides(image_path: str, crop_x: int, crop_y: int, W, H, center_x_percentage: float, center_y_percentage: float):
+def _crop_sides_array(img: np.ndarray, crop_x: int, crop_y: int, W, H, center_x_percentage: float, center_y_percentage: float) -> np.ndarray:
     """
-    Performs a single-sided crop and aspect ratio correction based on focus alignment data.
+    Array-level core of crop_image_sides: returns the cropped region as a NumPy view (no copy, no I/O).
     """
-    # Accept .gif references and resolve to the corresponding _1.jpg in-place
-    resolved = _resolve_gif_or_first_jpg(image_path) or image_path
-    img = _load_image_corrected(resolved)
+    left, top, right, bottom = _crop_sides_box(crop_x, crop_y, W, H, center_x_percentage, center_y_percentage)
+    return img[top:bottom, left:right, ...]
+
 
+def _crop_sides_box(crop_x: int, crop_y: int, W, H, center_x_percentage: float, center_y_percentage: float) -> tuple:
+    """(left, top, right, bottom) of the single-sided, aspect-corrected crop of a W x H frame."""
     # Round crop values
     crop_x = int(round(crop_x))
     crop_y = int(round(crop_y))
@@ -323,7 +535,18 @@ def crop_image_sides(image_path: str, crop_x: int, crop_y: int, W, H, center_x_p
     start_y = int(round(start_y))
     end_y   = int(round(end_y))
 
-    img_cropped = img[start_y:end_y, start_x:end_x, ...]
+    return (start_x, start_y, end_x, end_y)
+
+
+def crop_image_sides(image_path: str, crop_x: int, crop_y: int, W, H, center_x_percentage: float, center_y_percentage: float):
+    """
+    Performs a single-sided crop and aspect ratio correction based on focus alignment data.
+    """
+    # Accept .gif references and resolve to the corresponding _1.jpg in-place
+    resolved = _resolve_gif_or_first_jpg(image_path) or image_path
+    # Only the kept region is materialized (.npy frames read just its rows)
+    box = _crop_sides_box(crop_x, crop_y, W, H, center_x_percentage, center_y_percentage)
+    img_cropped = _load_image_corrected(resolved, box=box)
 
     # Save cropped image
     base_in = os.path.splitext(os.path.basename(image_path))[0]
@@ -348,18 +571,29 @@ def adjustZoom(filename, minHeight, centerXpercentage, centerYpercentage):
         p = _resolve_existing(cb) or _resolve_existing(rb)
         inputs.append(p)
 
-    # Load images and collect shapes
-    imgs = []
+    # Load images
+    imgs = [_load_image_corrected(p) if p else None for p in inputs]
+
+    for idx, img2 in enumerate(_zoom_arrays(imgs, centerXpercentage, centerYpercentage), start=1):
+        if img2 is None:
+            continue
+        out_path = os.path.join(PROCESSING_DIR, f"{filename}_{idx}_zoom.jpg")
+        _save_image_no_exif(out_path, img2)
+
+
+def _zoom_arrays(imgs, centerXpercentage, centerYpercentage):
+    """
+    Array-level core of adjustZoom: returns one aligned view per input frame (None stays None).
+    """
     shapes = []  # list of (H, W)
-    for p in inputs:
-        if p:
-            arr = _load_image_corrected(p)
-            imgs.append(arr)
+    for arr in imgs:
+        if arr is not None:
             shapes.append((arr.shape[0], arr.shape[1]))
         else:
-            imgs.append(None)
             shapes.append((0, 0))
 
+    out = [None] * len(imgs)
+
     # Choose reference frame: smallest height (ties: first occurrence)
     ref_idx = None
     ref_H = None
@@ -372,7 +606,7 @@ def adjustZoom(filename, minHeight, centerXpercentage, centerYpercentage):
 
     if ref_idx is None:
         # No valid inputs; nothing to do
-        return
+        return out
 
     # Reference frame sizes and center in pixels
     H_ref, W_ref = shapes[ref_idx]
@@ -393,7 +627,7 @@ def adjustZoom(filename, minHeight, centerXpercentage, centerYpercentage):
     # Safety: the math above must give exactly the reference size
     # but round safeguards ensure consistent slicing.
 
-    for idx, (arr, (H, W)) in enumerate(zip(imgs, shapes), start=1):
+    for idx, (arr, (H, W)) in enumerate(zip(imgs, shapes)):
         if arr is None or H <= 0 or W <= 0:
             continue
 
@@ -459,12 +693,11 @@ def adjustZoom(filename, minHeight, centerXpercentage, centerYpercentage):
             end_y   = cy + half_h_bot + 1
 
         # Perform crop (exclusive slicing)
-        img2 = arr[start_y:end_y, start_x:end_x, ...]
+        out[idx] = arr[start_y:end_y, start_x:end_x, ...]
 
-        out_path = os.path.join(PROCESSING_DIR, f"{filename}_{idx}_zoom.jpg")
-        _save_image_no_exif(out_path, img2)
+    return out
 
-def convertToGif(filename, speed) -> bool:
+def convertToGif(filename, speed, quantize_mode: str = "dither") -> bool:
     """
     Assembles a sequence of aligned frames into an animated GIF.
     Includes forward/backward boomerang effect and color quantization.
@@ -485,63 +718,7 @@ def convertToGif(filename, speed) -> bool:
                 except Exception:
                     pass
 
-    if not frames:
-        return False
-
-    # Create forward and backward sequence (exclude duplicate endpoints)
-    if len(frames) > 1:
-        base_seq = frames + frames[-2:0:-1]
-    else:
-        base_seq = frames
-
-    try:
-        method = Image.Quantize.FASTOCTREE
-        #dither = Image.Dither.NONE
-        dither = Image.Dither.FLOYDSTEINBERG
-    except AttributeError:
-        method = 2  # FASTOCTREE fallback for older Pillow
-        #dither = 0  # NONE
-        dither = 1  # FLOYDSTEINBERG
-
-    try:
-        first_p = base_seq[0].quantize(colors=256, method=method, dither=dither)
-    except Exception:
-        # Fallback to default quantize if FASTOCTREE not available
-        first_p = base_seq[0].quantize(colors=256)
-    pal = first_p.getpalette()
-    pal_frames = [first_p]
-    for im in base_seq[1:]:
-        try:
-            q = im.quantize(palette=first_p, dither=dither)
-        except Exception:
-            q = im.quantize(colors=256)
-        if q.getpalette() is None and pal is not None:
-            try:
-                q.putpalette(pal)
-            except Exception:
-                pass
-        pal_frames.append(q)
-
-    gif_out = os.path.join(IMAGES_DIR, f"{filename}.gif")
-    # Remove existing gif if present
-    if os.path.exists(gif_out):
-        try:
-            os.remove(gif_out)
-        except OSError:
-            pass
-
-    try:
-        pal_frames[0].save(
-            gif_out,
-            save_all=True,
-            append_images=pal_frames[1:],
-            duration=int(speed),  # ms per frame
-            loop=0,
-            disposal=2,       # replace frame for robustness
-            optimize=False    # keep off for speed
-        )
-    except Exception as e:
-        report_error("Error saving GIF", e)
+    if not _save_gif(frames, filename, speed, quantize_mode):
         return False
 
     # Cleanup generated intermediates
@@ -559,15 +736,46 @@ def convertToGif(filename, speed) -> bool:
                 os.remove(cropped_path)
             except OSError:
                 pass
-    success = os.path.exists(gif_out)
+    return _finish_gif(filename)
+
+
+def _save_gif(frames, filename, speed, quantize_mode: str = "dither", output_format: str = "gif") -> bool:
+    """
+    Encodes RGB PIL frames (boomerang order) as {filename}.<ext> in IMAGES_DIR
+    with the animEncoders format (GIF by default).
+    """
+    if not frames:
+        return False
+
+    out_path = os.path.join(IMAGES_DIR, filename + animEncoders.extension(output_format))
+    # Remove existing output if present
+    if os.path.exists(out_path):
+        try:
+            os.remove(out_path)
+        except OSError:
+            pass
+
+    try:
+        animEncoders.encode(output_format, frames, out_path, speed, quantize_mode=quantize_mode)
+    except Exception as e:
+        report_error(f"Error saving {output_format.upper()}", e)
+        return False
+    return True
+
+
+def _finish_gif(filename, output_format: str = "gif") -> bool:
+    """Checks the output landed and removes the sample copy of frame 1 from IMAGES_DIR."""
+    out_path = os.path.join(IMAGES_DIR, filename + animEncoders.extension(output_format))
+    success = os.path.exists(out_path)
     if success:
         # Remove the sample image copy in the images folder (leave RAWs intact)
-        sample_path = os.path.join(IMAGES_DIR, f"{filename}_1.png")
-        if os.path.exists(sample_path):
-            try:
-                os.remove(sample_path)
-            except OSError:
-                pass
+        for ext in _COMMON_EXTS:
+            sample_path = os.path.join(IMAGES_DIR, f"{filename}_1{ext}")
+            if os.path.exists(sample_path):
+                try:
+                    os.remove(sample_path)
+                except OSError:
+                    pass
 
     return success
 
@@ -618,9 +826,30 @@ def remapFullSize(originalImageSize):
     height = originalImageSize[0]
     return (width, height)
 
-def fullFunction(filename, focus1, focus2, focus3, focus4, speed, images_dir_str=None):
+def _save_intermediates(filename, arrays, suffix):
+    """Writes in-memory pipeline frames to PROCESSING_DIR as {filename}_{i}_{suffix}.jpg for debugging."""
+    for idx, arr in enumerate(arrays, start=1):
+        if arr is None:
+            continue
+        out_path = os.path.join(PROCESSING_DIR, f"{filename}_{idx}_{suffix}.jpg")
+        _save_image_no_exif(out_path, arr)
+
+def fullFunction(filename, focus1, focus2, focus3, focus4, speed, images_dir_str=None, keep_intermediates=False, quantize_mode="dither", output_format="gif", auto_align=False, align_mode="warp", max_size=None, frame_store=None):
     """
     High-level entry point that orchestrates the entire alignment and GIF-creation pipeline.
+
+    Frames travel from crop to zoom to quantization as in-memory NumPy views; the
+    *_cropped/*_zoom JPEGs are only written when keep_intermediates is set.
+    quantize_mode selects the gifPalette mapping ("dither" or the faster "fast").
+    output_format picks the animEncoders output (gif, webp, apng, mp4).
+    With auto_align, focus2-4 are found by autoAlign (focus1 may be None too).
+    align_mode "warp" (default) aligns with one sub-pixel resample per frame
+    (warpAlign); "crop" keeps the integer crop + zoom path.
+    max_size limits the longer side of the decoded frames: everything after
+    decode (alignment, crop, quantization) runs at that size, and the focus
+    points, always given at full resolution, are scaled to match.
+    frame_store lets a caller pass a _FrameStore whose frames are already
+    (being) decoded, e.g. wigglePipeline decoding frames as they arrive.
     """
     global IMAGES_DIR, PROCESSING_DIR, RAWS_DIR
     
@@ -630,48 +859,89 @@ def fullFunction(filename, focus1, focus2, focus3, focus4, speed, images_dir_str
         RAWS_DIR = os.path.join(IMAGES_DIR, 'raws')
         _ensure_dirs()
 
-    print(f"DEBUG: IMAGES_DIR={IMAGES_DIR}")
-    print(f"DEBUG: RAWS_DIR={RAWS_DIR}")
-
-    mainstart = time.time()
     try:
-        print("idkf2")
-
-        print(f"fullFunction called with: filename={filename}, focus1={focus1}, focus2={focus2}, focus3={focus3}, focus4={focus4}, speed={speed}, images_dir={images_dir_str}")
-
-        # Resolve available raw paths for frames 1..4 (support .jpg/.jpeg/.png)
-        resolved_raws = []
-        for i in range(1, 5):
-            base_no_ext = os.path.join(RAWS_DIR, f"{filename}_{i}")
-            p = _resolve_existing(base_no_ext)
-            print(f"DEBUG: Checking {base_no_ext} -> {p}")
-            resolved_raws.append(p)
-
-        # Get the original image size (H, W): prefer frame 1, else first available
-        originalImageSize = None
-        pref = resolved_raws[0] if resolved_raws and resolved_raws[0] else None
-        src_for_size = pref or next((p for p in resolved_raws if p), None)
-        if src_for_size:
-            img = _load_image_corrected(src_for_size)
-            originalImageSize = (img.shape[0], img.shape[1])
-        if originalImageSize is None:
-            raise FileNotFoundError("No RAW inputs found for base name '%s'" % filename)
-
-        focus1 = remapCoordinates(focus1, originalImageSize)
-        focus2 = remapCoordinates(focus2, originalImageSize)
-        focus3 = remapCoordinates(focus3, originalImageSize)
-        focus4 = remapCoordinates(focus4, originalImageSize)
-
-        originalImageSize = remapFullSize(originalImageSize)
-
-        centerx = (focus1[0] + focus2[0] + focus3[0] + focus4[0]) / 4
-        centery = (focus1[1] + focus2[1] + focus3[1] + focus4[1]) / 4
-
-        # Percentages must be normalized by width for x and height for y
-        centerxPercentage = centerx / originalImageSize[0]
-        centeryPercentage = centery / originalImageSize[1]
-
-        start = time.time()
+        with perfTrace.span("fullFunction", filename=filename, align=align_mode, quantize=quantize_mode,
+                            format=output_format, max_size=max_size):
+            _full_function(filename, (focus1, focus2, focus3, focus4), speed, keep_intermediates, quantize_mode,
+                           output_format, auto_align, align_mode, max_size, frame_store)
+    except Exception as e:
+        report_error("Error in fullFunction", e)
+        raise
+
+
+def _full_function(filename, focus_points, speed, keep_intermediates, quantize_mode, output_format, auto_align,
+                   align_mode, max_size, frame_store):
+    """Body of fullFunction; every stage is a perfTrace span."""
+    focus1, focus2, focus3, focus4 = focus_points
+    # Resolve available raw paths for frames 1..4 (support .jpg/.jpeg/.png);
+    # the store decodes each frame once for the whole run
+    store = frame_store or _FrameStore(filename, max_size)
+    resolved_raws = store.paths
+
+    # Get the original image size (H, W) from the header: prefer frame 1, else first available
+    originalImageSize = None
+    for i in range(1, 5):
+        originalImageSize = store.size(i)
+        if originalImageSize is not None:
+            break
+    if originalImageSize is None:
+        raise FileNotFoundError("No RAW inputs found for base name '%s'" % filename)
+
+    fullImageSize = originalImageSize
+    originalImageSize = _fit_size(fullImageSize, max_size)
+    sy, sx = originalImageSize[0] / fullImageSize[0], originalImageSize[1] / fullImageSize[1]
+    if (sx, sy) != (1.0, 1.0):
+        # Same geometry, smaller pixels: the focus points scale with the frames
+        focus1, focus2, focus3, focus4 = [
+            (p[0] * sx, p[1] * sy) if p is not None else None for p in (focus1, focus2, focus3, focus4)
+        ]
+        print(f"max-size {max_size}: processing at {originalImageSize[1]}x{originalImageSize[0]} (full {fullImageSize[1]}x{fullImageSize[0]})")
+
+    if auto_align:
+        # Match frame 1's focus point (or an auto-picked one) in frames 2-4;
+        # the decoded frames stay in the store for the crops below
+        # Matching runs in pixel coordinates; remapCoordinates converts both ways (x -> W - x)
+        pixel_focus1 = remapCoordinates(focus1, originalImageSize) if focus1 is not None else None
+        frames = [store.get(i) for i in range(1, 5)]
+        with perfTrace.span("autoAlign"):
+            pixel_points, scores = autoAlign.align_focus_points(frames, pixel_focus1, subpixel=(align_mode == "warp"))
+        focus_points = [remapCoordinates(p, originalImageSize) for p in pixel_points]
+        focus1, focus2, focus3, focus4 = focus_points
+        # Reported at full resolution, like the points passed on the command line
+        points_str = ", ".join(f"({x / sx:.1f}, {y / sy:.1f})" for x, y in focus_points)
+        print(f"autoAlign: {points_str} (scores {', '.join(f'{s:.2f}' for s in scores)})")
+        if min(scores) < autoAlign.MIN_SCORE:
+            print(f"WARNING: weak auto-align match (score {min(scores):.2f}); check the result or pick points manually", file=sys.stderr)
+
+    focus1 = remapCoordinates(focus1, originalImageSize)
+    focus2 = remapCoordinates(focus2, originalImageSize)
+    focus3 = remapCoordinates(focus3, originalImageSize)
+    focus4 = remapCoordinates(focus4, originalImageSize)
+
+    originalImageSize = remapFullSize(originalImageSize)
+
+    centerx = (focus1[0] + focus2[0] + focus3[0] + focus4[0]) / 4
+    centery = (focus1[1] + focus2[1] + focus3[1] + focus4[1]) / 4
+
+    # Percentages must be normalized by width for x and height for y
+    centerxPercentage = centerx / originalImageSize[0]
+    centeryPercentage = centery / originalImageSize[1]
+
+    if align_mode == "warp":
+        # One resample per frame into identical preallocated buffers (see warpAlign)
+        if not any(resolved_raws):
+            raise FileNotFoundError("No source frames found to align for '%s'" % filename)
+        with ThreadPoolExecutor(max_workers=4) as ex:
+            decoded = list(ex.map(store.get, range(1, 5)))
+        available = [(f if img is not None else None) for f, img in zip((focus1, focus2, focus3, focus4), decoded)]
+        with perfTrace.span("warpAlign") as sp:
+            plan = warpAlign.plan_alignment(available, originalImageSize)
+            zoomed = warpAlign.warp_frames(decoded, plan)
+            sp.set(width=plan.width, height=plan.height)
+
+        if keep_intermediates:
+            _save_intermediates(filename, zoomed, "zoom")
+    else:
         crop1x = calculateCrop(originalImageSize[0], focus1[0], centerx)
         crop2x = calculateCrop(originalImageSize[0], focus2[0], centerx)
         crop3x = calculateCrop(originalImageSize[0], focus3[0], centerx)
@@ -681,24 +951,24 @@ def fullFunction(filename, focus1, focus2, focus3, focus4, speed, images_dir_str
         crop2y = calculateCrop(originalImageSize[1], focus2[1], centery)
         crop3y = calculateCrop(originalImageSize[1], focus3[1], centery)
         crop4y = calculateCrop(originalImageSize[1], focus4[1], centery)
-        end = time.time()
-        print(f"calculateCrop took {end - start:.2f} seconds")
 
         # Run the crops in parallel for existing frames (I/O-bound work benefits from threads)
         per_frame_crops = [
-            (resolved_raws[0], crop1x, crop1y),
-            (resolved_raws[1], crop2x, crop2y),
-            (resolved_raws[2], crop3x, crop3y),
-            (resolved_raws[3], crop4x, crop4y),
+            (1, crop1x, crop1y),
+            (2, crop2x, crop2y),
+            (3, crop3x, crop3y),
+            (4, crop4x, crop4y),
         ]
-        crop_args = [(p, cx, cy) for (p, cx, cy) in per_frame_crops if p]
-        if not crop_args:
+        if not any(resolved_raws):
             raise FileNotFoundError("No source frames found to crop for '%s'" % filename)
 
-        start = time.time()
-        def _run_crop(path, cx, cy):
-            return crop_image_sides(
-                path,
+        def _run_crop(idx, cx, cy):
+            img = store.get(idx)
+            if img is None:
+                return None
+            # Crops stay in memory as NumPy views of the decoded frame
+            return _crop_sides_array(
+                img,
                 cx,
                 cy,
                 originalImageSize[0],
@@ -707,32 +977,31 @@ def fullFunction(filename, focus1, focus2, focus3, focus4, speed, images_dir_str
                 centeryPercentage,
             )
 
-        with ThreadPoolExecutor(max_workers=4) as ex:
-            futures = [ex.submit(_run_crop, p, cx, cy) for (p, cx, cy) in crop_args]
-            heights = [f.result() for f in futures]
-        end = time.time()
-        print(f"crop_image_sides took {end - start:.2f} seconds")
-
-        targetH = min(heights)
-        
-        start = time.time()
-        adjustZoom(filename, targetH, centerxPercentage, centeryPercentage)
-        end = time.time()
-        print(f"adjustZoom took {end - start:.2f} seconds")
-
-        start = time.time()
-        ok = convertToGif(filename, speed)
-        end = time.time()
-        print(f"convertToGif took {end - start:.2f} seconds")
-
-        mainend = time.time()
-        print(f"fullFunction took {mainend - mainstart:.2f} seconds")
-        
-        if not ok:
-            raise FileNotFoundError(f"GIF not created for '{filename}'")
-    except Exception as e:
-        report_error("Error in fullFunction", e)
-        raise
+        with perfTrace.span("crop"), ThreadPoolExecutor(max_workers=4) as ex:
+            futures = [ex.submit(_run_crop, idx, cx, cy) for (idx, cx, cy) in per_frame_crops]
+            cropped = [f.result() for f in futures]
+
+        if keep_intermediates:
+            _save_intermediates(filename, cropped, "cropped")
+
+        with perfTrace.span("zoom"):
+            zoomed = _zoom_arrays(cropped, centerxPercentage, centeryPercentage)
+
+        if keep_intermediates:
+            _save_intermediates(filename, zoomed, "zoom")
+
+    frames = [_array_to_pil(arr).convert("RGB") for arr in zoomed if arr is not None]
+    with perfTrace.span("encode", format=output_format, frames=len(frames)):
+        ok = _save_gif(frames, filename, speed, quantize_mode, output_format) and _finish_gif(filename, output_format)
+    if ok:
+        captureCatalog.record_output(filename, os.path.join(IMAGES_DIR, filename + animEncoders.extension(output_format)),
+                                     output_format)
+    if ok and output_format != "mp4":
+        # Background gallery preview; a CLI run waits for it at exit
+        thumbCache.schedule([os.path.join(IMAGES_DIR, filename + animEncoders.extension(output_format))],
+                            cache_dir=os.path.join(IMAGES_DIR, "thumbs"))
+    if not ok:
+        raise FileNotFoundError(f"{output_format.upper()} not created for '{filename}'")
 
 
 
@@ -742,23 +1011,45 @@ if __name__ == "__main__":
         import argparse
         parser = argparse.ArgumentParser(description="Run wiggler fullFunction for image cropping and GIF creation.")
         parser.add_argument("filename", type=str, help="Base filename (without _1.jpg etc)")
-        parser.add_argument("focus1", type=int, nargs=2, metavar="F1", help="Focus point 1 as: x y")
-        parser.add_argument("focus2", type=int, nargs=2, metavar="F2", help="Focus point 2 as: x y")
-        parser.add_argument("focus3", type=int, nargs=2, metavar="F3", help="Focus point 3 as: x y")
-        parser.add_argument("focus4", type=int, nargs=2, metavar="F4", help="Focus point 4 as: x y")
+        parser.add_argument("focus", type=int, nargs="*", metavar="X Y",
+                            help="Focus points 1-4 as: x1 y1 x2 y2 x3 y3 x4 y4 (with --auto-align: x1 y1 or nothing)")
         parser.add_argument("--speed", type=int, default=150, help="GIF frame speed in ms (default: 200)")
         parser.add_argument("--images-dir", type=str, default=None, help="Path to images directory")
+        parser.add_argument("--keep-intermediates", action="store_true", help="Also write *_cropped/*_zoom JPEGs to processing/ for debugging")
+        parser.add_argument("--quantize", choices=gifPalette.QUANTIZE_MODES, default="dither",
+                            help="Palette mapping: dither (Floyd-Steinberg, default), fast or lut (both without dithering)")
+        parser.add_argument("--format", choices=sorted(animEncoders.ENCODERS), default="gif",
+                            help="Output format: gif (default), webp, apng or mp4 (needs ffmpeg on PATH)")
+        parser.add_argument("--auto-align", action="store_true",
+                            help="Find focus points 2-4 automatically from focus point 1 (or from an auto-picked point)")
+        parser.add_argument("--align", choices=("warp", "crop"), default="warp",
+                            help="warp: one sub-pixel resample per frame (default); crop: integer crop + zoom")
+        parser.add_argument("--max-size", type=int, default=None, metavar="PX",
+                            help="Downscale frames right after decode so the longer side is at most PX (faster, smaller output)")
+        perfTrace.add_arguments(parser)
         args = parser.parse_args()
+        perfTrace.configure_from_args(args)
+
+        if args.max_size is not None and args.max_size < 1:
+            parser.error("--max-size must be a positive number of pixels")
+        expected = (0, 2) if args.auto_align else (8,)
+        if len(args.focus) not in expected:
+            parser.error(f"expected {' or '.join(map(str, expected))} focus coordinates, got {len(args.focus)}")
+        points = [tuple(args.focus[i:i + 2]) for i in range(0, len(args.focus), 2)]
+        points += [None] * (4 - len(points))
 
         # Call the main function
         fullFunction(
             args.filename,
-            tuple(args.focus1),
-            tuple(args.focus2),
-            tuple(args.focus3),
-            tuple(args.focus4),
+            *points,
             args.speed,
-            args.images_dir
+            args.images_dir,
+            keep_intermediates=args.keep_intermediates,
+            quantize_mode=args.quantize,
+            output_format=args.format,
+            auto_align=args.auto_align,
+            align_mode=args.align,
+            max_size=args.max_size,
         )
     except Exception as e:
         report_error("Error in __main__", e)
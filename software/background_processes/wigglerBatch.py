@@ -0,0 +1,243 @@
+"""
+Script Name: wigglerBatch.py
+Description:
+    Batch front end for wiggler.fullFunction. Runs many captures through a
+    worker pool inside one warm Python process instead of paying the interpreter,
+    import and setup cost of a fresh `wiggler.py` run per GIF. Jobs come from a
+    manifest or from watching images/raws/ for newly completed captures, and a
+    per-job timing summary is printed (and optionally written as JSON).
+
+Manifest (one job per line, blank lines and # comments ignored):
+    JSON: {"filename": "1718000000", "focus": [[x1, y1], [x2, y2], [x3, y3], [x4, y4]], "speed": 150}
+          (optional "format" and "max_size" keys override the command line per job)
+    CSV : 1718000000,x1,y1,x2,y2,x3,y3,x4,y4[,speed]
+    With fewer than four points (JSON: 0 or 1, CSV: filename[,x1,y1]) the
+    remaining ones are found by autoAlign.
+
+Usage:
+  python3 scripts/wigglerBatch.py manifest.jsonl [--workers 2] [--report timings.json]
+  python3 scripts/wigglerBatch.py --watch [--existing] [--focus X Y] [--auto-align]
+"""
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import wiggler
+
+# Same suffix as streamUSB.BATCH_MARKER_EXT (not imported: that would pull in pyserial)
+BATCH_MARKER_EXT = ".done"
+DEFAULT_SPEED = 150
+DEFAULT_WORKERS = 2
+WATCH_INTERVAL_S = 1.0
+
+
+def parse_manifest_line(line: str):
+    """Returns a job dict for one manifest line, or None for blank/comment lines."""
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    if line.startswith("{"):
+        row = json.loads(line)
+        if "focus" in row:
+            focus = [tuple(int(v) for v in p) for p in row["focus"]]
+        else:
+            focus = [tuple(int(v) for v in row[f"focus{i}"]) for i in range(1, 5) if f"focus{i}" in row]
+        if len(focus) not in (0, 1, 4):
+            raise ValueError(f"expected 0, 1 or 4 focus points, got {len(focus)}")
+        job = {"filename": str(row["filename"]), "focus": focus, "speed": int(row.get("speed", DEFAULT_SPEED))}
+        if "format" in row:
+            job["format"] = row["format"]
+        if "max_size" in row:
+            job["max_size"] = int(row["max_size"])
+        return job
+
+    fields = [f.strip() for f in next(csv.reader([line]))]
+    if len(fields) in (1, 3):
+        return {"filename": fields[0], "focus": [tuple(int(v) for v in fields[1:3])] if len(fields) == 3 else [],
+                "speed": DEFAULT_SPEED}
+    if len(fields) not in (9, 10):
+        raise ValueError(f"expected filename, 8 focus coordinates and optional speed, got {len(fields)} fields")
+    coords = [int(v) for v in fields[1:9]]
+    return {
+        "filename": fields[0],
+        "focus": [tuple(coords[i:i + 2]) for i in range(0, 8, 2)],
+        "speed": int(fields[9]) if len(fields) == 10 else DEFAULT_SPEED,
+    }
+
+
+def read_manifest(path: str) -> list:
+    jobs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, start=1):
+            try:
+                job = parse_manifest_line(line)
+            except (ValueError, KeyError, TypeError) as e:
+                print(f"{path}:{lineno}: skipped ({e})", file=sys.stderr)
+                continue
+            if job:
+                jobs.append(job)
+    return jobs
+
+
+def run_job(job: dict, quantize_mode: str, output_format: str, max_size: int = None) -> dict:
+    """Runs one fullFunction call and returns its timing record."""
+    start = time.perf_counter()
+    fmt = job.get("format", output_format)
+    try:
+        focus = list(job["focus"])
+        auto_align = len(focus) < 4
+        f1, f2, f3, f4 = (focus + [None] * 4)[:4]
+        wiggler.fullFunction(job["filename"], f1, f2, f3, f4, job["speed"],
+                             quantize_mode=quantize_mode, output_format=fmt, auto_align=auto_align,
+                             max_size=job.get("max_size", max_size))
+        ok, error = True, None
+    except Exception as e:
+        ok, error = False, str(e)
+    return {"filename": job["filename"], "ok": ok, "seconds": time.perf_counter() - start, "error": error}
+
+
+def run_jobs(jobs, workers: int = DEFAULT_WORKERS, quantize_mode: str = "dither", output_format: str = "gif",
+             max_size: int = None) -> list:
+    """Processes jobs on a thread pool; returns the timing records in job order."""
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        return list(ex.map(lambda j: run_job(j, quantize_mode, output_format, max_size), jobs))
+
+
+def print_summary(results: list, wall: float):
+    print(f"{'capture':<24} {'status':<6} {'seconds':>8}")
+    for r in results:
+        print(f"{r['filename']:<24} {'ok' if r['ok'] else 'FAIL':<6} {r['seconds']:8.2f}" + (f"  {r['error']}" if r['error'] else ""))
+    done = sum(r["ok"] for r in results)
+    print(f"{done}/{len(results)} captures in {wall:.2f} s wall" + (f", {wall / len(results):.2f} s/capture" if results else ""))
+
+
+def _complete_captures(raws_dir: str) -> dict:
+    """{base name: total size} for captures whose four RAW frames are all present."""
+    found = {}
+    try:
+        names = os.listdir(raws_dir)
+    except FileNotFoundError:
+        return {}
+    for name in names:
+        stem, ext = os.path.splitext(name)
+        base, _, idx = stem.rpartition("_")
+        if ext.lower() in wiggler._COMMON_EXTS and idx in ("1", "2", "3", "4") and base:
+            found.setdefault(base, {})[idx] = os.path.getsize(os.path.join(raws_dir, name))
+    return {b: sum(parts.values()) for b, parts in found.items() if len(parts) == 4}
+
+
+def _committed_batches(raws_dir: str) -> set:
+    """Base names with a streamUSB commit marker ({base}.done): all their frames are on disk."""
+    try:
+        names = os.listdir(raws_dir)
+    except FileNotFoundError:
+        return set()
+    return {n[:-len(BATCH_MARKER_EXT)] for n in names if n.endswith(BATCH_MARKER_EXT)}
+
+
+def _centre_focus(filename: str):
+    """Frame centre of capture 1 as the default focus point (no alignment shift)."""
+    store = wiggler._FrameStore(filename)
+    size = store.size(1)
+    if size is None:
+        raise FileNotFoundError(f"No RAW inputs found for base name '{filename}'")
+    h, w = size
+    return (w // 2, h // 2)
+
+
+def watch(workers: int, focus, speed: int, include_existing: bool, quantize_mode: str, output_format: str,
+          interval: float = WATCH_INTERVAL_S, auto_align: bool = False, max_size: int = None):
+    """
+    Polls RAWS_DIR and queues every capture once its four frames exist and
+    either streamUSB has committed the batch (marker file) or, for captures
+    without a marker, their sizes have stopped changing for one poll (so
+    half-written files are skipped).
+    With auto_align, focus (or an auto-picked point) is matched across the frames.
+    """
+    seen = set() if include_existing else set(_complete_captures(wiggler.RAWS_DIR))
+    pending = {}
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    print(f">>> WATCHING {wiggler.RAWS_DIR} <<<", flush=True)
+
+    def _process(base):
+        if auto_align:
+            job = {"filename": base, "speed": speed, "focus": [focus] if focus else []}
+        else:
+            job = {"filename": base, "speed": speed, "focus": [focus or _centre_focus(base)] * 4}
+        r = run_job(job, quantize_mode, output_format, max_size)
+        print(f"[{base}] {'ok' if r['ok'] else 'FAIL'} in {r['seconds']:.2f} s" + (f": {r['error']}" if r['error'] else ""), flush=True)
+
+    try:
+        while True:
+            committed = _committed_batches(wiggler.RAWS_DIR)
+            for base, size in _complete_captures(wiggler.RAWS_DIR).items():
+                if base in seen:
+                    continue
+                if base in committed or pending.get(base) == size:
+                    seen.add(base)
+                    pending.pop(base, None)
+                    pool.submit(_process, base)
+                else:
+                    pending[base] = size
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.shutdown(wait=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Create many wiggle GIFs in one process.")
+    parser.add_argument("manifest", nargs="?", help="JSON/CSV lines manifest of jobs")
+    parser.add_argument("--watch", action="store_true", help="Watch images/raws/ for new captures instead of reading a manifest")
+    parser.add_argument("--existing", action="store_true", help="With --watch, also process captures already present")
+    parser.add_argument("--focus", type=int, nargs=2, metavar=("X", "Y"),
+                        help="With --watch, focus point used for all four frames (default: frame centre)")
+    parser.add_argument("--auto-align", action="store_true",
+                        help="With --watch, match the focus point (or an auto-picked one) across frames")
+    parser.add_argument("--speed", type=int, default=DEFAULT_SPEED, help="With --watch, frame time in ms")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Captures processed in parallel")
+    parser.add_argument("--images-dir", type=str, default=None, help="Path to images directory")
+    parser.add_argument("--quantize", choices=wiggler.gifPalette.QUANTIZE_MODES, default="dither")
+    parser.add_argument("--format", choices=sorted(wiggler.animEncoders.ENCODERS), default="gif")
+    parser.add_argument("--max-size", type=int, default=None, metavar="PX",
+                        help="Downscale frames so the longer side is at most PX (per-job \"max_size\" in JSON overrides)")
+    parser.add_argument("--report", type=str, default=None, help="Write per-job timings as JSON to this path")
+    args = parser.parse_args(argv)
+
+    if bool(args.manifest) == args.watch:
+        parser.error("give either a manifest or --watch")
+
+    if args.images_dir:
+        wiggler.IMAGES_DIR = os.path.abspath(args.images_dir)
+        wiggler.PROCESSING_DIR = os.path.join(wiggler.IMAGES_DIR, 'processing')
+        wiggler.RAWS_DIR = os.path.join(wiggler.IMAGES_DIR, 'raws')
+        wiggler._ensure_dirs()
+
+    if args.watch:
+        watch(args.workers, tuple(args.focus) if args.focus else None, args.speed, args.existing,
+              args.quantize, args.format, auto_align=args.auto_align, max_size=args.max_size)
+        return 0
+
+    jobs = read_manifest(args.manifest)
+    start = time.perf_counter()
+    results = run_jobs(jobs, args.workers, args.quantize, args.format, args.max_size)
+    wall = time.perf_counter() - start
+    print_summary(results, wall)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"wall_seconds": wall, "jobs": results}, f, indent=2)
+    return 0 if all(r["ok"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
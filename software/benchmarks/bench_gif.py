@@ -0,0 +1,109 @@
+"""
+Script Name: bench_gif.py
+Description:
+    Benchmark for writing the wiggle GIF. Compares the previous Pillow save
+    (full-canvas frames, disposal=2, optimize=False) with gifWriter in full-frame
+    and delta mode on the same quantized boomerang: encode time, file size and a
+    check that every decoded frame matches the Pillow output. Two scenes: the
+    whole view shifting between frames, and a static view with a moving subject.
+
+Usage:
+  python3 benchmarks/bench_gif.py [--width 320] [--height 240] [--iterations 10]
+"""
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
+
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'background_processes'))
+
+import gifPalette
+import gifWriter
+from bench_quantize import _synthetic_frames
+
+DURATION_MS = 150
+
+
+def _subject_frames(width: int, height: int, count: int = 4) -> list:
+    """Static background with one block moving a few pixels per frame."""
+    base = np.asarray(_synthetic_frames(width, height, 1)[0])
+    out = []
+    for i in range(count):
+        f = base.copy()
+        y0, x0 = height // 3, width // 3 + i * max(1, width // 64)
+        f[y0:y0 + height // 3, x0:x0 + width // 4] = (200, 60, 40)
+        out.append(Image.fromarray(f))
+    return out
+
+
+def _pillow_save(frames) -> bytes:
+    buf = io.BytesIO()
+    frames[0].save(buf, format="GIF", save_all=True, append_images=frames[1:],
+                   duration=DURATION_MS, loop=0, disposal=2, optimize=False)
+    return buf.getvalue()
+
+
+def _writer_save(frames, delta: bool) -> bytes:
+    buf = io.BytesIO()
+    gifWriter.write_gif(buf, frames, DURATION_MS, delta=delta)
+    return buf.getvalue()
+
+
+def _decoded(data: bytes) -> list:
+    with Image.open(io.BytesIO(data)) as im:
+        out = []
+        for i in range(im.n_frames):
+            im.seek(i)
+            out.append(np.asarray(im.convert("RGB")))
+    return out
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark GIF writing.")
+    parser.add_argument("--width", type=int, default=320)
+    parser.add_argument("--height", type=int, default=240)
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    cases = [
+        ("Pillow save (previous)", _pillow_save),
+        ("gifWriter full frames", lambda f: _writer_save(f, delta=False)),
+        ("gifWriter delta", lambda f: _writer_save(f, delta=True)),
+    ]
+    scenes = [
+        ("shifting view", _synthetic_frames(args.width, args.height)),
+        ("moving subject", _subject_frames(args.width, args.height)),
+    ]
+
+    ok = True
+    for scene, rgb in scenes:
+        frames = gifPalette.boomerang(gifPalette.quantize_frames(rgb, "dither", colors=255))
+        print(f"{scene}: {len(frames)} frames {args.width}x{args.height}, {args.iterations} iterations")
+        print(f"  {'writer':<24} {'ms/GIF':>8} {'KiB':>9} {'vs Pillow':>10} {'frames match':>13}")
+        reference = None
+        for name, fn in cases:
+            data = fn(frames)
+            start = time.perf_counter()
+            for _ in range(args.iterations):
+                fn(frames)
+            per_gif = (time.perf_counter() - start) / args.iterations
+            decoded = _decoded(data)
+            if reference is None:
+                reference, ref_size = decoded, len(data)
+            match = len(decoded) == len(reference) and all(np.array_equal(a, b) for a, b in zip(decoded, reference))
+            ok &= match
+            print(f"  {name:<24} {per_gif * 1000:8.2f} {len(data) / 1024:9.1f} {len(data) / ref_size:10.1%} {str(match):>13}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
@@ -0,0 +1,328 @@
+"""
+Script Name: bench_pipeline.py
+Description:
+    Reproducible end-to-end benchmark of the capture and wiggle pipeline, run
+    headless on synthetic data (no cameras or serial ports needed). For every
+    resolution (320x240 like streamUSB up to 5MP) it writes a synthetic
+    four-frame capture (one scene shifted a few pixels per camera) and a
+    synthetic UYVY buffer to a temporary images directory, then times
+    yuv422_to_rgb, yuv422_to_rgb_rgb565, crop_image_sides, adjustZoom,
+    convertToGif and fullFunction. Every case runs in its own child process so
+    its peak RSS is its own; the table shows median ms per call, megapixels per
+    second, peak RSS (and the part added by the case over its setup) and the
+    tracemalloc peak allocated during one call.
+    Results can be saved as a JSON baseline and later runs compared against it;
+    --compare exits non-zero when the best call of a case is slower than
+    --tolerance times its baseline.
+
+Usage:
+  python3 benchmarks/bench_pipeline.py [--sizes 320x240 1280x960 2592x1944] [--iterations 5]
+  python3 benchmarks/bench_pipeline.py --save-baseline [PATH]
+  python3 benchmarks/bench_pipeline.py --compare [PATH] [--tolerance 1.25]
+"""
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
+
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'background_processes'))
+
+from bench_quantize import _synthetic_frames
+
+DEFAULT_SIZES = ("320x240", "1280x960", "2592x1944")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baselines", "pipeline.json")
+CASES = ("yuv422_to_rgb", "yuv422_to_rgb_rgb565", "crop_image_sides", "adjustZoom", "convertToGif", "fullFunction")
+CAPTURE_NAME = "bench"
+SPEED_MS = 150
+# Fast cases are repeated until they have run at least this long, so their medians are stable
+MIN_CASE_SECONDS = 0.5
+MAX_ITERATIONS = 1000
+# _synthetic_frames shifts the scene this many pixels per camera
+SHIFT_PX = 4
+
+
+def _parse_size(text: str) -> tuple:
+    w, _, h = text.lower().partition("x")
+    try:
+        size = (int(w), int(h))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got '{text}'")
+    if size[0] < 64 or size[1] < 64 or size[0] % 2:
+        raise argparse.ArgumentTypeError(f"size {text} must be at least 64x64 with an even width")
+    return size
+
+
+def _focus_points(width: int, height: int) -> list:
+    """CLI focus points (x mirrored, see wiggler.remapCoordinates) of the frame-1 centre in all four frames."""
+    cx, cy = width // 2, height // 2
+    return [(width - (cx - SHIFT_PX * i), cy) for i in range(4)]
+
+
+def _write_capture(images_dir: str, width: int, height: int, frame_format: str):
+    """Four shifted frames as raws/bench_{i}, plus a UYVY buffer of the same size."""
+    raws = os.path.join(images_dir, "raws")
+    os.makedirs(raws, exist_ok=True)
+    os.makedirs(os.path.join(images_dir, "processing"), exist_ok=True)
+    for i, frame in enumerate(_synthetic_frames(width, height), start=1):
+        path = os.path.join(raws, f"{CAPTURE_NAME}_{i}.{frame_format}")
+        if frame_format == "png":
+            frame.save(path, format="PNG", compress_level=1)
+        else:
+            frame.save(path, format="JPEG", quality=92)
+    rng = np.random.default_rng(1)
+    rng.integers(0, 256, width * height * 2, dtype=np.uint8).tofile(os.path.join(images_dir, "frame.uyvy"))
+
+
+def _proc_status_mib(field: str):
+    """VmRSS/VmHWM of this process from /proc (Linux), or None."""
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _max_rss_mib() -> float:
+    """Peak RSS; ru_maxrss survives exec on Linux (it would include the parent), so VmHWM is preferred."""
+    hwm = _proc_status_mib("VmHWM")
+    if hwm is not None:
+        return hwm
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _reset_peak_rss() -> float:
+    """Restarts the peak RSS count where the kernel allows it; returns the RSS the case starts from."""
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+    except OSError:
+        return _max_rss_mib()
+    return _proc_status_mib("VmRSS") or _max_rss_mib()
+
+
+def _crop_plan(wiggler, width: int, height: int) -> tuple:
+    """Same crops fullFunction computes in --align crop mode, for the synthetic focus points."""
+    focus = [wiggler.remapCoordinates(p, (height, width)) for p in _focus_points(width, height)]
+    centerx = sum(p[0] for p in focus) / 4
+    centery = sum(p[1] for p in focus) / 4
+    crops = [(wiggler.calculateCrop(width, p[0], centerx), wiggler.calculateCrop(height, p[1], centery)) for p in focus]
+    return crops, centerx / width, centery / height
+
+
+def _setup_case(case: str, images_dir: str, width: int, height: int):
+    """
+    Imports the pipeline against images_dir and returns (call, prepare, frames):
+    call() is timed, prepare() runs untimed before every call, frames is the pixel count factor.
+    """
+    import captureCatalog
+    # Keep the benchmark's catalog rows out of the real camera.db
+    captureCatalog.DB_PATH = os.path.join(images_dir, "camera.db")
+    import wiggler
+    wiggler.IMAGES_DIR = images_dir
+    wiggler.PROCESSING_DIR = os.path.join(images_dir, "processing")
+    wiggler.RAWS_DIR = os.path.join(images_dir, "raws")
+    import thumbCache
+    thumbCache.THUMBS_DIR = os.path.join(images_dir, "thumbs")
+
+    if case.startswith("yuv"):
+        import streamUSB
+        with open(os.path.join(images_dir, "frame.uyvy"), "rb") as f:
+            raw = f.read()
+        fn = getattr(streamUSB, case)
+        return (lambda: fn(raw, width, height)), None, 1
+
+    crops, cxp, cyp = _crop_plan(wiggler, width, height)
+    paths = [wiggler._resolve_existing(os.path.join(wiggler.RAWS_DIR, f"{CAPTURE_NAME}_{i}")) for i in range(1, 5)]
+
+    def crop_all():
+        return [wiggler.crop_image_sides(p, cx, cy, width, height, cxp, cyp) for p, (cx, cy) in zip(paths, crops)]
+
+    def zoom():
+        wiggler.adjustZoom(CAPTURE_NAME, None, cxp, cyp)
+
+    if case == "crop_image_sides":
+        return crop_all, None, 4
+    if case == "adjustZoom":
+        crop_all()
+        return zoom, None, 4
+    if case == "convertToGif":
+        # convertToGif deletes the zoom frames it consumed, so they are rebuilt untimed before every call
+        def prepare():
+            crop_all()
+            zoom()
+        return (lambda: wiggler.convertToGif(CAPTURE_NAME, SPEED_MS)), prepare, 4
+    if case == "fullFunction":
+        points = _focus_points(width, height)
+        return (lambda: wiggler.fullFunction(CAPTURE_NAME, *points, SPEED_MS)), None, 4
+    raise ValueError(f"unknown case {case}")
+
+
+def run_case(case: str, images_dir: str, width: int, height: int, iterations: int) -> dict:
+    """Runs one case in this process; returns its measurements."""
+    call, prepare, frames = _setup_case(case, images_dir, width, height)
+    if prepare:
+        prepare()
+    # What the case adds on top of imports and inputs is its own
+    rss_setup = _reset_peak_rss()
+    start = time.perf_counter()
+    call()  # warm-up: lazily imported modules, cached tables, page cache
+    warm = max(time.perf_counter() - start, 1e-6)
+
+    times = []
+    for _ in range(min(MAX_ITERATIONS, max(iterations, int(MIN_CASE_SECONDS / warm)))):
+        if prepare:
+            prepare()
+        start = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - start)
+    rss_peak = _max_rss_mib()
+
+    if prepare:
+        prepare()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        call()
+        _, alloc_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    median = statistics.median(times)
+    return {
+        "ms": median * 1000,
+        "min_ms": min(times) * 1000,
+        "calls": len(times),
+        "mpix_s": width * height * frames / median / 1e6,
+        "rss_mib": rss_peak,
+        "rss_case_mib": max(0.0, rss_peak - rss_setup),
+        "alloc_mib": max(0, alloc_peak - base) / (1024 * 1024),
+    }
+
+
+def _run_child(case: str, images_dir: str, size: tuple, iterations: int) -> dict:
+    cmd = [sys.executable, os.path.realpath(__file__), "--child", case, images_dir, f"{size[0]}x{size[1]}",
+           "--iterations", str(iterations)]
+    env = dict(os.environ, MPLBACKEND="Agg")
+    env.pop("WIGGLE_TRACE", None)
+    env.pop("WIGGLE_TRACE_ECHO", None)
+    proc = subprocess.run(cmd, capture_output=True, text=True, env=env)
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        raise RuntimeError(f"{case} at {size[0]}x{size[1]} failed:\n{proc.stderr.strip()[-2000:]}")
+    return json.loads(lines[-1])
+
+
+def _environment() -> dict:
+    import PIL
+    return {"python": platform.python_version(), "numpy": np.__version__, "pillow": PIL.__version__,
+            "machine": platform.machine(), "node": platform.node(), "cpus": os.cpu_count()}
+
+
+def _compare(results: dict, baseline: dict, tolerance: float) -> bool:
+    """
+    Prints time ratios against the baseline; returns True if any case regressed beyond tolerance.
+    The best call is compared, not the median: it is the least disturbed by other load.
+    """
+    env, base_env = _environment(), baseline.get("environment", {})
+    changed = [k for k in ("machine", "node", "python", "numpy", "pillow") if base_env.get(k) != env.get(k)]
+    if changed:
+        print(f"note: baseline was recorded with different {', '.join(changed)}; ratios are indicative only")
+    regressed = False
+    print(f"\n{'case':<22} {'size':>10} {'baseline min':>12} {'now min':>10} {'ratio':>7}")
+    for key, now in results.items():
+        old = baseline.get("results", {}).get(key)
+        case, size = key.split("@")
+        if old is None:
+            print(f"{case:<22} {size:>10} {'-':>12} {now['min_ms']:10.2f} {'new':>7}")
+            continue
+        ratio = now["min_ms"] / old["min_ms"] if old["min_ms"] else float("inf")
+        flag = ""
+        if ratio > tolerance:
+            flag = "  SLOWER"
+            regressed = True
+        print(f"{case:<22} {size:>10} {old['min_ms']:12.2f} {now['min_ms']:10.2f} {ratio:7.2f}{flag}")
+    return regressed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the capture/wiggle pipeline on synthetic captures.")
+    parser.add_argument("--sizes", type=_parse_size, nargs="+", default=[_parse_size(s) for s in DEFAULT_SIZES],
+                        metavar="WxH", help=f"Frame sizes (default: {' '.join(DEFAULT_SIZES)})")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--iterations", type=int, default=5,
+                        help=f"Minimum timed calls per case; fast cases run for {MIN_CASE_SECONDS} s (median is reported)")
+    parser.add_argument("--frame-format", choices=("png", "jpg"), default="png",
+                        help="Format of the synthetic raws (png like streamUSB, jpg like phone captures)")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, default=None, metavar="PATH",
+                        help="Store the results as a baseline (default: benchmarks/baselines/pipeline.json)")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, default=None, metavar="PATH",
+                        help="Compare against a stored baseline")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+                        help="With --compare, fail if a case takes more than this times its baseline")
+    parser.add_argument("--child", nargs=3, metavar=("CASE", "DIR", "WxH"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.iterations < 1:
+        parser.error("--iterations must be at least 1")
+
+    if args.child:
+        case, images_dir, size = args.child
+        w, h = _parse_size(size)
+        print(json.dumps(run_case(case, images_dir, w, h, args.iterations)))
+        return 0
+
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.compare, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"error: cannot read baseline {args.compare}: {e}", file=sys.stderr)
+            return 2
+
+    results = {}
+    print(f"{'case':<22} {'size':>10} {'ms/call':>9} {'MPix/s':>8} {'RSS MiB':>8} {'+case':>7} {'alloc MiB':>10}")
+    for w, h in args.sizes:
+        with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as images_dir:
+            _write_capture(images_dir, w, h, args.frame_format)
+            for case in args.cases:
+                r = _run_child(case, images_dir, (w, h), args.iterations)
+                results[f"{case}@{w}x{h}"] = r
+                print(f"{case:<22} {f'{w}x{h}':>10} {r['ms']:9.2f} {r['mpix_s']:8.1f} {r['rss_mib']:8.1f} "
+                      f"{r['rss_case_mib']:7.1f} {r['alloc_mib']:10.1f}", flush=True)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"environment": _environment(), "iterations": args.iterations,
+                       "frame_format": args.frame_format, "results": results}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline written to {args.save_baseline}")
+    if baseline is not None and _compare(results, baseline, args.tolerance):
+        print(f"error: slower than {args.tolerance:.2f}x the baseline", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
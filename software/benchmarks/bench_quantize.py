@@ -0,0 +1,96 @@
+"""
+Script Name: bench_quantize.py
+Description:
+    Benchmark for GIF palette quantization. Compares the old per-frame path
+    (palette from frame 1, every boomerang frame re-quantized with dithering)
+    with the gifPalette global-palette modes (fresh and reused palette) on four
+    synthetic wiggle frames: time per GIF, number of quantize calls and PSNR of
+    the indexed frames against their RGB source.
+
+Usage:
+  python3 benchmarks/bench_quantize.py [--width 320] [--height 240] [--iterations 20]
+"""
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'background_processes'))
+
+import gifPalette
+
+
+def _synthetic_frames(width: int, height: int, count: int = 4, seed: int = 1) -> list:
+    """Smooth colour field with a few shapes and sensor noise, shifted a little per frame like a wiggle."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width + 4 * count].astype(np.float32)
+    base = np.stack([
+        128 + 100 * np.sin(x / 37.0) * np.cos(y / 53.0),
+        128 + 90 * np.cos((x + y) / 61.0),
+        128 + 110 * np.sin(y / 29.0 + x / 97.0),
+    ], axis=2)
+    for _ in range(6):
+        cx, cy, r = rng.integers(0, width), rng.integers(0, height), rng.integers(10, height // 4)
+        base[(x - cx) ** 2 + (y - cy) ** 2 < r * r] = rng.integers(0, 256, 3)
+    base += rng.normal(0, 4, base.shape)
+    base = np.clip(base, 0, 255).astype(np.uint8)
+    return [Image.fromarray(np.ascontiguousarray(base[:, 4 * i:4 * i + width])) for i in range(count)]
+
+
+def _legacy(frames):
+    """The previous _save_gif quantization: palette from frame 1, each boomerang frame quantized again."""
+    seq = frames + frames[-2:0:-1]
+    first = seq[0].quantize(colors=256, method=gifPalette._FASTOCTREE, dither=gifPalette._FLOYDSTEINBERG)
+    return [first] + [im.quantize(palette=first, dither=gifPalette._FLOYDSTEINBERG) for im in seq[1:]]
+
+
+def _psnr(src: Image.Image, indexed: Image.Image) -> float:
+    a = np.asarray(src, dtype=np.float32)
+    b = np.asarray(indexed.convert("RGB"), dtype=np.float32)
+    mse = float(np.mean((a - b) ** 2))
+    return float("inf") if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark GIF palette quantization.")
+    parser.add_argument("--width", type=int, default=320)
+    parser.add_argument("--height", type=int, default=240)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    frames = _synthetic_frames(args.width, args.height)
+    seq_src = gifPalette.boomerang(frames)
+    palette = gifPalette.build_palette(frames)
+    cases = [
+        ("legacy (frame-1 palette)", _legacy, len(seq_src)),
+        ("global dither", lambda f: gifPalette.boomerang(gifPalette.quantize_frames(f, "dither")), len(frames)),
+        ("global fast", lambda f: gifPalette.boomerang(gifPalette.quantize_frames(f, "fast")), len(frames)),
+        ("global lut", lambda f: gifPalette.boomerang(gifPalette.quantize_frames(f, "lut")), len(frames)),
+        # Palette reused from an earlier capture: only the per-frame mapping is paid
+        ("reused palette, lut", lambda f: gifPalette.boomerang(gifPalette.quantize_frames(f, "lut", palette=palette)), len(frames)),
+        ("reused palette, fast", lambda f: gifPalette.boomerang(gifPalette.quantize_frames(f, "fast", palette=palette)), len(frames)),
+    ]
+
+    print(f"{len(frames)} frames {args.width}x{args.height}, boomerang of {len(seq_src)}, {args.iterations} iterations")
+    print(f"{'mode':<27} {'ms/GIF':>8} {'quantized':>10} {'PSNR dB':>8}")
+    for name, fn, calls in cases:
+        fn(frames)
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            out = fn(frames)
+        per_gif = (time.perf_counter() - start) / args.iterations
+        psnr = np.mean([_psnr(s, q) for s, q in zip(seq_src, out)])
+        print(f"{name:<27} {per_gif * 1000:8.2f} {calls:>10} {psnr:8.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
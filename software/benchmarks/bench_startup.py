@@ -0,0 +1,85 @@
+"""
+Script Name: bench_startup.py
+Description:
+    Start-up benchmark for the headless wiggler path. Imports wiggler in fresh
+    interpreters with `python -X importtime`, reports the median cumulative import
+    time and the slowest imported packages, and fails if the median exceeds the
+    budget or if a module the headless path must not load (matplotlib,
+    tracemalloc) shows up.
+
+Usage:
+  python3 benchmarks/bench_startup.py [--runs 5] [--budget-ms 400] [--module wiggler]
+"""
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'background_processes')
+
+# Regression budget for `import wiggler` (cumulative, interpreter start excluded).
+# Measured ~210 ms on a desktop x86 after matplotlib was made lazy (~790 ms before).
+IMPORT_BUDGET_MS = 400
+FORBIDDEN_MODULES = ("matplotlib", "tracemalloc")
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _import_profile(module: str) -> tuple:
+    """Runs one fresh import; returns ({top-level package: cumulative us}, total us of module, loaded modules)."""
+    code = f"import sys, {module}; print(' '.join(sorted(sys.modules)))"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=SCRIPTS_DIR,
+                          capture_output=True, text=True, check=True)
+    packages, total = {}, 0
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if not m:
+            continue
+        cumulative, indent, name = int(m.group(2)), len(m.group(3)), m.group(4)
+        if name == module:
+            total = cumulative
+        elif indent == 3:
+            # Direct imports of the module under test
+            packages[name] = packages.get(name, 0) + cumulative
+    return packages, total, set(proc.stdout.split())
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure headless wiggler start-up time.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--module", default="wiggler")
+    parser.add_argument("--top", type=int, default=8, help="Slowest direct imports to list")
+    args = parser.parse_args(argv)
+
+    totals, last_packages, loaded = [], {}, set()
+    for _ in range(args.runs):
+        last_packages, total, loaded = _import_profile(args.module)
+        totals.append(total / 1000)
+
+    median = statistics.median(totals)
+    print(f"import {args.module}: median {median:.1f} ms over {args.runs} runs (min {min(totals):.1f}, max {max(totals):.1f}), budget {args.budget_ms:.0f} ms")
+    print("slowest direct imports (last run):")
+    for name, us in sorted(last_packages.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+        print(f"  {name:<24} {us / 1000:8.1f} ms")
+
+    failed = False
+    bad = sorted(m for m in loaded if m.split(".")[0] in FORBIDDEN_MODULES)
+    if bad:
+        print(f"error: headless import loaded {', '.join(bad)}", file=sys.stderr)
+        failed = True
+    if median > args.budget_ms:
+        print(f"error: start-up {median:.1f} ms exceeds budget {args.budget_ms:.0f} ms", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
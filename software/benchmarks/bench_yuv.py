@@ -0,0 +1,98 @@
+"""
+Script Name: bench_yuv.py
+Description:
+    Benchmark for the streamUSB YUV422 decoders. Compares the float reference
+    (yuv422_to_rgb) with the fixed-point decoder (yuv422_to_rgb_fixed) on a
+    synthetic UYVY frame: time per frame, frames per second and peak scratch
+    memory per call (tracemalloc). Also checks that the fixed-point output stays
+    within ACCURACY_LSB of the reference and exits non-zero if it does not.
+
+Usage:
+  python3 benchmarks/bench_yuv.py [--width 320] [--height 240] [--iterations 200]
+"""
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'background_processes'))
+
+import streamUSB
+
+ACCURACY_LSB = 1
+
+
+def _synthetic_uyvy(width: int, height: int, seed: int = 1) -> bytes:
+    """Random UYVY frame covering the full 0-255 range of every component."""
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, width * height * 2, dtype=np.uint8).tobytes()
+
+
+def _time_per_call(fn, iterations: int) -> float:
+    """Average wall time of fn() in seconds (one warm-up call first)."""
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def _peak_scratch(fn) -> int:
+    """Peak bytes allocated while fn() runs, excluding what was live before."""
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return max(0, peak - base)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark streamUSB YUV422 -> RGB decoders.")
+    parser.add_argument("--width", type=int, default=streamUSB.WIDTH)
+    parser.add_argument("--height", type=int, default=streamUSB.HEIGHT)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    w, h = args.width, args.height
+    raw = _synthetic_uyvy(w, h)
+    buffers = streamUSB.make_yuv_buffers(w, h)
+    frame_bytes = w * h * 3
+
+    cases = [
+        ("yuv422_to_rgb (float)", lambda: streamUSB.yuv422_to_rgb(raw, w, h)),
+        ("yuv422_to_rgb_fixed", lambda: streamUSB.yuv422_to_rgb_fixed(raw, w, h, buffers=buffers)),
+    ]
+
+    print(f"Frame {w}x{h}, {args.iterations} iterations")
+    print(f"{'decoder':<24} {'ms/frame':>9} {'fps':>8} {'scratch KiB':>12} {'RGB frames':>11}")
+    for name, fn in cases:
+        per_call = _time_per_call(fn, args.iterations)
+        scratch = _peak_scratch(fn)
+        print(f"{name:<24} {per_call * 1000:9.3f} {1.0 / per_call:8.1f} {scratch / 1024:12.1f} {scratch / frame_bytes:11.2f}")
+
+    # Accuracy against the float reference
+    ref = streamUSB.yuv422_to_rgb(raw, w, h).astype(np.int16)
+    fixed = streamUSB.yuv422_to_rgb_fixed(raw, w, h).astype(np.int16)
+    diff = np.abs(ref - fixed)
+    max_diff = int(diff.max())
+    print(f"accuracy: max |diff| = {max_diff} LSB, differing samples = {np.count_nonzero(diff) / diff.size:.4%}")
+    if max_diff > ACCURACY_LSB:
+        print(f"error: fixed-point decoder exceeds {ACCURACY_LSB} LSB bound", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
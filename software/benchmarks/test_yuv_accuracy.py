@@ -0,0 +1,68 @@
+"""
+Script Name: test_yuv_accuracy.py
+Description:
+    Accuracy check for the fixed-point YUV422 decoder (no timing). Compares
+    yuv422_to_rgb_fixed with the float reference yuv422_to_rgb on random frames
+    and on every combination of luma/chroma extremes, and checks that a caller's
+    output buffer is the one written and returned. Runs under pytest or as a script.
+
+Usage:
+  python3 -m pytest benchmarks/test_yuv_accuracy.py
+  python3 benchmarks/test_yuv_accuracy.py
+"""
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
+
+import itertools
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'background_processes'))
+
+import streamUSB
+
+ACCURACY_LSB = 1
+EXTREMES = (0, 1, 16, 127, 128, 129, 235, 240, 254, 255)
+
+
+def _max_diff(raw: bytes, width: int, height: int) -> int:
+    ref = streamUSB.yuv422_to_rgb(raw, width, height).astype(np.int16)
+    fixed = streamUSB.yuv422_to_rgb_fixed(raw, width, height).astype(np.int16)
+    return int(np.abs(ref - fixed).max())
+
+
+def test_random_frames_within_one_lsb():
+    rng = np.random.default_rng(3)
+    for width, height in ((320, 240), (64, 2), (2, 1)):
+        raw = rng.integers(0, 256, width * height * 2, dtype=np.uint8).tobytes()
+        assert _max_diff(raw, width, height) <= ACCURACY_LSB, f"{width}x{height}"
+
+
+def test_extremes_within_one_lsb():
+    # One macropixel per (Y0, U, Y1, V) combination, incl. 0/255 luma and the chroma extremes
+    quads = np.array(list(itertools.product(EXTREMES, repeat=4)), dtype=np.uint8)
+    width = 2 * len(quads)
+    assert _max_diff(quads.tobytes(), width, 1) <= ACCURACY_LSB
+
+
+def test_writes_into_given_buffer():
+    width, height = 16, 4
+    raw = np.random.default_rng(5).integers(0, 256, width * height * 2, dtype=np.uint8).tobytes()
+    buffers = streamUSB.make_yuv_buffers(width, height)
+    out = np.zeros((height, width, 3), dtype=np.uint8)
+    result = streamUSB.yuv422_to_rgb_fixed(raw, width, height, out=out, buffers=buffers)
+    assert result is out
+    assert np.array_equal(out, streamUSB.yuv422_to_rgb_fixed(raw, width, height))
+    # Without out, the caller's buffers["out"] is used
+    assert streamUSB.yuv422_to_rgb_fixed(raw, width, height, buffers=buffers) is buffers["out"]
+
+
+if __name__ == "__main__":
+    for name, fn in sorted(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"ok  {name}")
+
+#all code written by me with minimal AI assistance, comments added using AI and verified by me
@@ -37,6 +37,7 @@
 #include <stdbool.h>
 #include <stdint.h> // for uint8_t, uint32_t, etc.
 #include <stdio.h>  // for printf, setvbuf
+#include <stdlib.h> // for strtoul
 #include <string.h> // for memset, memcpy (optional)
 
 /* USER CODE END Includes */
@@ -96,6 +97,8 @@ void Registry_Set(uint16_t reg, uint8_t val);
 void Registry_LoadDefaults(void);
 void Registry_ApplyAll(void);
 void Parse_USB_Command(char *cmd);
+int Parse_USB_BulkWrite(char *args);
+void USB_SendAck(int count);
 void Camera_LiveLoop(void);
 /* USER CODE BEGIN PFP */
 
@@ -649,6 +652,55 @@ void Parse_USB_Command(char *cmd) {
   }
 }
 
+/**
+ * @brief Decodes a bulk register write received via USB.
+ *
+ * Parses "<HEX_REG> <HEX_VAL>" pairs (as many as fit in one 64-byte packet,
+ * e.g. "3503 01 350A 00 350B 10") and stores each in the local registry.
+ *
+ * @param args The command string after the leading 'B'.
+ * @return int Number of register pairs stored.
+ */
+int Parse_USB_BulkWrite(char *args) {
+  int count = 0;
+  char *end;
+
+  while (1) {
+    uint32_t reg = strtoul(args, &end, 16);
+    if (end == args)
+      break;
+    args = end;
+
+    uint32_t val = strtoul(args, &end, 16);
+    if (end == args)
+      break;
+    args = end;
+
+    Registry_Set((uint16_t)reg, (uint8_t)val);
+    count++;
+  }
+  return count;
+}
+
+/**
+ * @brief Acknowledges a processed command to the host over USB CDC.
+ *
+ * Sends "K <count>\n" so the host can send the next packet immediately
+ * instead of sleeping between writes. The buffer is static because the USB
+ * transfer completes asynchronously.
+ *
+ * @param count Number of items processed (echoed back for verification).
+ */
+void USB_SendAck(int count) {
+  static char ack[16];
+  int len = snprintf(ack, sizeof(ack), "K %d\n", count);
+  uint8_t status;
+
+  do {
+    status = CDC_Transmit_HS((uint8_t *)ack, (uint16_t)len);
+  } while (status == USBD_BUSY);
+}
+
 void DCMI_DumpAll(const char *label) {
   DCMI_TypeDef *d = DCMI; // or hdcmi.Instance
 
@@ -1082,6 +1134,17 @@ int main(void) {
         } else {
           printf("ERROR: Bad W format. Got %d items.\n", items);
         }
+      } else if (local_cmd[0] == 'B' || local_cmd[0] == 'b') {
+        // Bulk write: several "REG VAL" pairs per packet, acknowledged over USB.
+        // Cut at the newline so stale bytes from a longer previous packet are
+        // not parsed as pairs.
+        char *eol = strpbrk(local_cmd, "\r\n");
+        if (eol)
+          *eol = '\0';
+
+        int count = Parse_USB_BulkWrite(local_cmd + 1);
+        printf("PARSED BULK: %d registers\n", count);
+        USB_SendAck(count);
       }
     }
   }